@@ -1,7 +1,8 @@
-import pandas as pd
 import sys
 import os
 
+from cache_planilhas import ler_aba, listar_abas
+
 # Caminho: 1º argumento, 2º env EXCEL_PATH, 3º default
 excel_path = (
     sys.argv[1] if len(sys.argv) > 1 else
@@ -15,14 +16,14 @@ if not os.path.exists(excel_path):
     sys.exit(1)
 
 try:
-    xls = pd.ExcelFile(excel_path)
-    print(f"Abas encontradas: {xls.sheet_names}\n")
+    sheet_names = listar_abas(excel_path)
+    print(f"Abas encontradas: {sheet_names}\n")
     
-    for sheet in xls.sheet_names:
+    for sheet in sheet_names:
         print(f"\n{'='*80}")
         print(f"ABA: {sheet}")
         print(f"{'='*80}")
-        df = pd.read_excel(xls, sheet_name=sheet, nrows=10)
+        df = ler_aba(excel_path, sheet, header=0, nrows=10)
         print(f"\nColunas ({len(df.columns)}):")
         for i, col in enumerate(df.columns, 1):
             print(f"  {i}. {col}")
@@ -2,15 +2,20 @@ import pandas as pd
 import sys
 import os
 
-excel_path = r'C:\Users\joaop\BPMA\Resumos Estatísticas 2025 a 2020.xlsx'
+from cache_planilhas import ler_aba, listar_abas
+
+# Caminho: 1º argumento, 2º env EXCEL_PATH, 3º default
+excel_path = (
+    sys.argv[1] if len(sys.argv) > 1 else
+    os.environ.get('EXCEL_PATH', r'C:\Users\joaop\BPMA\Resumos Estatísticas 2025 a 2020.xlsx')
+)
 
 if not os.path.exists(excel_path):
     print(f"Arquivo não encontrado: {excel_path}")
     sys.exit(1)
 
 try:
-    xls = pd.ExcelFile(excel_path)
-    print(f"Abas encontradas: {xls.sheet_names}\n")
+    print(f"Abas encontradas: {listar_abas(excel_path)}\n")
     
     # Analisar uma aba completa para entender a estrutura
     sheet = '2025'
@@ -18,7 +23,7 @@ try:
     print(f"ANÁLISE COMPLETA DA ABA: {sheet}")
     print(f"{'='*80}")
     
-    df = pd.read_excel(xls, sheet_name=sheet, header=None)
+    df = ler_aba(excel_path, sheet)
     print(f"\nTotal de linhas: {len(df)}")
     print(f"Total de colunas: {len(df.columns)}")
     
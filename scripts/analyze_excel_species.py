@@ -2,22 +2,26 @@ import pandas as pd
 import sys
 import os
 
-excel_path = r'C:\Users\joaop\BPMA\Resumos Estatísticas 2025 a 2020.xlsx'
+from cache_planilhas import ler_aba
+
+# Caminho: 1º argumento, 2º env EXCEL_PATH, 3º default
+excel_path = (
+    sys.argv[1] if len(sys.argv) > 1 else
+    os.environ.get('EXCEL_PATH', r'C:\Users\joaop\BPMA\Resumos Estatísticas 2025 a 2020.xlsx')
+)
 
 if not os.path.exists(excel_path):
     print(f"Arquivo não encontrado: {excel_path}")
     sys.exit(1)
 
 try:
-    xls = pd.ExcelFile(excel_path)
-    
     # Analisar a aba 2025 completamente
     sheet = '2025'
     print(f"\n{'='*80}")
     print(f"ANÁLISE COMPLETA DA ABA: {sheet}")
     print(f"{'='*80}")
     
-    df = pd.read_excel(xls, sheet_name=sheet, header=None)
+    df = ler_aba(excel_path, sheet)
     
     # Procurar seções específicas
     print("\nProcurando seções de dados...")
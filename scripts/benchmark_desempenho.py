@@ -0,0 +1,412 @@
+"""
+Benchmark dos caminhos quentes dos scripts de dados, com planilhas sintéticas em 1x, 10x e 100x
+
+Etapas medidas em cada escala (planilhas_sinteticas.py; nada toca o Supabase real):
+  leitura_xlsx        decodificar o workbook "Resumos Estatísticas" (cache_planilhas, cache vazio)
+  parse_resumos       processar_aba de todas as abas (process_excel_to_supabase.py)
+  gravar_parquet      atendimentos/resgates em Parquet (dados_processados.py)
+  gravar_csv          exportação CSV (dados_processados.py)
+  gerar_sql           generate_sql_inserts_adapted.py (resgates em lote)
+  dividir_sql         dividir_migration.py em partes de 64 KB
+  parse_afastamentos  registros da aba de férias (importar_ferias_2026.iterar_registros)
+  importar_ferias     importar_ferias_2026.py completo contra o stub de PostgREST (stub_postgrest.py)
+  importar_ferias_async  o mesmo com --async (só se httpx estiver instalado)
+  importar_ferias_snapshot  importar_ferias com o snapshot de dim_efetivo já no disco
+                      (cache_efetivo.py: só o delta vai ao stub); as duas anteriores
+                      rodam sem o snapshot, para continuarem comparáveis entre commits
+
+Cada etapa roda --repeticoes vezes; o mínimo é o número comparado entre commits. Os
+resultados são acrescentados a data/benchmarks/historico.jsonl com o commit, se a árvore
+tinha alterações e a máquina. --comparar confronta a execução com a última de outro commit
+na mesma máquina e sai com código 1 se alguma etapa ficou mais lenta que --tolerancia.
+
+Uso:
+  python scripts/benchmark_desempenho.py                       # 1x, 10x e 100x
+  python scripts/benchmark_desempenho.py --escalas 1 10 --comparar
+  python scripts/benchmark_desempenho.py --etapas parse_resumos gerar_sql --repeticoes 5
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import cache_planilhas
+import planilhas_sinteticas
+from dados_processados import exportar_csv, gravar_tabela, tipar
+from dividir_migration import dividir
+from process_excel_to_supabase import processar_aba
+from stub_postgrest import StubPostgrest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+scripts_dir = os.path.join(base_dir, 'scripts')
+HISTORICO_PADRAO = os.path.join(base_dir, 'data', 'benchmarks', 'historico.jsonl')
+# Planilhas sintéticas geradas uma vez e reaproveitadas (data/cache não vai para o git)
+PLANILHAS_DIR = os.path.join(base_dir, 'data', 'cache', 'benchmarks')
+# Mudou o layout gerado por planilhas_sinteticas.py: incrementar para regenerar
+VERSAO_PLANILHAS = 1
+
+ESCALAS_PADRAO = [1, 10, 100]
+REPETICOES_PADRAO = 3
+# Aumento relativo do tempo mínimo tolerado em --comparar
+TOLERANCIA_PADRAO = 0.25
+# Diferenças absolutas menores que isso (segundos) não contam como regressão (ruído)
+DIFERENCA_MINIMA = 0.05
+MAX_KB_PARTES = 64
+
+ETAPAS = [
+    'leitura_xlsx', 'parse_resumos', 'gravar_parquet', 'gravar_csv', 'gerar_sql', 'dividir_sql',
+    'parse_afastamentos', 'importar_ferias', 'importar_ferias_async', 'importar_ferias_snapshot',
+]
+
+
+def planilha(tipo, escala, semente):
+    """Caminho da planilha sintética (gerada na primeira vez)"""
+    caminho = os.path.join(PLANILHAS_DIR, f'{tipo}_{escala}x_s{semente}_v{VERSAO_PLANILHAS}.xlsx')
+    if not os.path.exists(caminho):
+        print(f"  gerando {os.path.basename(caminho)}...", flush=True)
+        gerar = planilhas_sinteticas.gerar_resumos if tipo == 'resumos' else planilhas_sinteticas.gerar_afastamentos
+        gerar(caminho, escala, semente)
+    return caminho
+
+
+def medir(funcao, repeticoes, preparar=None):
+    """Tempos (segundos) de cada repetição; preparar() roda antes de cada uma, fora da medição"""
+    tempos = []
+    with open(os.devnull, 'w') as nulo:
+        for _ in range(repeticoes):
+            if preparar:
+                preparar()
+            with contextlib.redirect_stdout(nulo):
+                inicio = time.perf_counter()
+                funcao()
+                tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def _limpar(diretorio):
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio)
+
+
+class Escala:
+    """Estado de uma escala: planilhas, diretório de trabalho e o resultado de cada etapa"""
+
+    def __init__(self, escala, semente, trabalho, stub):
+        self.escala = escala
+        self.resumos = planilha('resumos', escala, semente)
+        self.afastamentos = planilha('afastamentos', escala, semente)
+        self.stub = stub
+        # Mesmo layout do repositório: os geradores acham data/ e supabase/ a partir de scripts/
+        self.trabalho = trabalho
+        self.cache = os.path.join(trabalho, 'cache')
+        self.cache_efetivo = os.path.join(trabalho, 'cache_efetivo')
+        self.processados = os.path.join(trabalho, 'data', 'processed')
+        self.migrations = os.path.join(trabalho, 'supabase', 'migrations')
+        self.partes = os.path.join(self.migrations, 'partes')
+        os.makedirs(os.path.join(trabalho, 'scripts'))
+        os.makedirs(self.processados)
+        self.gerador_sql = os.path.join(trabalho, 'scripts', 'generate_sql_inserts_adapted.py')
+        shutil.copy(os.path.join(scripts_dir, 'generate_sql_inserts_adapted.py'), self.gerador_sql)
+        self.atendimentos = self.resgates = None
+        self.migration = None
+        self.volume = {}
+
+    # leitura_xlsx
+    def preparar_leitura_xlsx(self):
+        cache_planilhas.CACHE_DIR = self.cache
+        _limpar(self.cache)
+
+    def leitura_xlsx(self):
+        self.abas = cache_planilhas.listar_abas(self.resumos)
+
+    # parse_resumos
+    def parse_resumos(self):
+        atendimentos, resgates = [], []
+        for aba in self.abas:
+            _, linhas_at, linhas_rs = processar_aba(self.resumos, aba)
+            atendimentos.extend(linhas_at)
+            resgates.extend(linhas_rs)
+        self.atendimentos = pd.DataFrame(atendimentos)
+        self.resgates = pd.DataFrame(resgates)
+        self.volume['atendimentos'] = len(self.atendimentos)
+        self.volume['resgates'] = len(self.resgates)
+
+    # gravar_parquet / gravar_csv
+    def gravar_parquet(self):
+        gravar_tabela(self.atendimentos, 'atendimentos', self.processados)
+        gravar_tabela(self.resgates, 'resgates', self.processados)
+
+    def gravar_csv(self):
+        exportar_csv(tipar(self.atendimentos, 'atendimentos'), 'atendimentos', self.processados)
+        exportar_csv(tipar(self.resgates, 'resgates'), 'resgates', self.processados)
+
+    # gerar_sql
+    def preparar_gerar_sql(self):
+        _limpar(self.migrations)
+
+    def gerar_sql(self):
+        argv = sys.argv
+        sys.argv = [self.gerador_sql]
+        try:
+            runpy.run_path(self.gerador_sql, run_name='__main__')
+        finally:
+            sys.argv = argv
+        self.migration = os.path.join(self.migrations, os.listdir(self.migrations)[0])
+        self.volume['migration_bytes'] = os.path.getsize(self.migration)
+
+    # dividir_sql
+    def dividir_sql(self):
+        self.volume['partes'] = len(dividir(self.migration, self.partes, MAX_KB_PARTES * 1024))
+
+    # parse_afastamentos
+    def preparar_parse_afastamentos(self):
+        importador_ferias()
+        cache_planilhas.CACHE_DIR = self.cache
+        # Cache da aba construído fora da medição (a leitura do xlsx já é medida em leitura_xlsx)
+        cache_planilhas.listar_abas(self.afastamentos)
+
+    def parse_afastamentos(self):
+        importador = importador_ferias()
+        linhas = importador.linhas_dataframe(importador.ler_aba(self.afastamentos, importador.ABA_NOME))
+        self.volume['registros_ferias'] = sum(1 for _ in importador.iterar_registros(linhas))
+
+    # importar_ferias / importar_ferias_async
+    def preparar_importar_ferias(self):
+        self.preparar_parse_afastamentos()
+        importador = importador_ferias()
+        importador.EXCEL_PATH = self.afastamentos
+        importador._matricula_cache.clear()
+        importador._resolvedor = None
+        importador.cache_efetivo.CACHE_DIR = self.cache_efetivo
+        importador.cache_efetivo.CACHE_ATIVO = False
+        self.stub.reiniciar(planilhas_sinteticas.matriculas_cadastradas(self.escala))
+
+    def importar_ferias(self, assincrono=False):
+        importador = importador_ferias()
+        requisicoes = self.stub.banco.requisicoes
+        importador.processar_ferias_excel(assincrono=assincrono)
+        self.volume['ferias_gravadas'] = len(self.stub.banco.tabelas['fat_ferias'])
+        self.volume['requisicoes_http' + ('_async' if assincrono else '')] = self.stub.banco.requisicoes - requisicoes
+
+    preparar_importar_ferias_async = preparar_importar_ferias
+
+    def importar_ferias_async(self):
+        self.importar_ferias(assincrono=True)
+
+    # importar_ferias_snapshot
+    def preparar_importar_ferias_snapshot(self):
+        self.preparar_importar_ferias()
+        cache_efetivo = importador_ferias().cache_efetivo
+        cache_efetivo.CACHE_ATIVO = True
+        # Snapshot completo fora da medição: a etapa mede a execução seguinte (só o delta)
+        cache_efetivo.resolvedor_em_cache()
+
+    def importar_ferias_snapshot(self):
+        importador = importador_ferias()
+        requisicoes = self.stub.banco.requisicoes
+        importador.processar_ferias_excel()
+        self.volume['requisicoes_http_snapshot'] = self.stub.banco.requisicoes - requisicoes
+
+    def medir(self, etapa, repeticoes):
+        return medir(getattr(self, etapa), repeticoes, getattr(self, f'preparar_{etapa}', None))
+
+
+def importador_ferias():
+    """importar_ferias_2026 (importado só depois que o stub está no ar: a URL é lida no import)"""
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        import importar_ferias_2026
+    return importar_ferias_2026
+
+
+def httpx_instalado():
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=base_dir, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def identificar_execucao():
+    """Commit, se há alterações locais em scripts/ e a máquina da execução"""
+    alteracoes = _git('status', '--porcelain', '--', 'scripts')
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git('rev-parse', 'HEAD'),
+        'alterado': bool(alteracoes) if alteracoes is not None else None,
+        'maquina': platform.node(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+    }
+
+
+def executar(escalas, etapas, repeticoes, semente=0, latencia_ms=0):
+    """{escala: {etapa: {'min', 'mediana', 'tempos'}}} e {escala: volumes}"""
+    resultados, volumes = {}, {}
+    diretorio_original = cache_planilhas.CACHE_DIR
+    with StubPostgrest([], latencia_ms) as stub:
+        # O stub faz o papel do Supabase para todos os módulos importados a partir daqui
+        os.environ['VITE_SUPABASE_URL'] = stub.url
+        os.environ['SUPABASE_SERVICE_ROLE_KEY'] = 'stub.stub.stub'
+        try:
+            for escala in escalas:
+                print(f"\nEscala {escala}x", flush=True)
+                with tempfile.TemporaryDirectory(prefix='benchmark_') as trabalho:
+                    estado = Escala(escala, semente, trabalho, stub)
+                    resultados[escala] = {}
+                    for etapa in ETAPAS:
+                        if etapa not in etapas:
+                            continue
+                        if etapa == 'importar_ferias_async' and not httpx_instalado():
+                            print(f"  {etapa:<22} ignorada (httpx não instalado)")
+                            continue
+                        tempos = estado.medir(etapa, repeticoes)
+                        resultados[escala][etapa] = {
+                            'min': min(tempos),
+                            'mediana': float(pd.Series(tempos).median()),
+                            'tempos': tempos,
+                        }
+                        print(f"  {etapa:<22} min {min(tempos):9.3f}s  mediana {resultados[escala][etapa]['mediana']:9.3f}s",
+                              flush=True)
+                    volumes[escala] = estado.volume
+                    print(f"  volume: {estado.volume}")
+        finally:
+            cache_planilhas.CACHE_DIR = diretorio_original
+    return resultados, volumes
+
+
+# Etapas que dependem do resultado de uma anterior
+DEPENDENCIAS = {
+    'parse_resumos': 'leitura_xlsx',
+    'gravar_parquet': 'parse_resumos',
+    'gravar_csv': 'parse_resumos',
+    'gerar_sql': 'gravar_parquet',
+    'dividir_sql': 'gerar_sql',
+}
+
+
+def com_dependencias(etapas):
+    """Etapas pedidas mais as que elas precisam, na ordem de ETAPAS"""
+    pedidas = set(etapas)
+    for etapa in etapas:
+        while etapa in DEPENDENCIAS:
+            etapa = DEPENDENCIAS[etapa]
+            pedidas.add(etapa)
+    return [etapa for etapa in ETAPAS if etapa in pedidas]
+
+
+def carregar_historico(caminho):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def registrar(caminho, execucao):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(execucao, ensure_ascii=False, sort_keys=True) + '\n')
+
+
+def referencia(historico, execucao, commit=None):
+    """Última execução de outro commit (ou do commit informado) na mesma máquina e com alguma escala em comum"""
+    for anterior in reversed(historico):
+        if anterior.get('maquina') != execucao['maquina']:
+            continue
+        if not set(anterior.get('resultados', {})) & set(execucao['resultados']):
+            continue
+        if commit is not None:
+            if (anterior.get('commit') or '').startswith(commit):
+                return anterior
+        elif anterior.get('commit') != execucao['commit']:
+            return anterior
+    return None
+
+
+def comparar(anterior, execucao, tolerancia=TOLERANCIA_PADRAO):
+    """Linhas (escala, etapa, antes, agora, razão, regrediu) das etapas medidas nas duas execuções"""
+    linhas = []
+    for escala, etapas in execucao['resultados'].items():
+        for etapa, medida in etapas.items():
+            antes = anterior['resultados'].get(escala, {}).get(etapa)
+            if antes is None:
+                continue
+            agora = medida['min']
+            razao = agora / antes['min'] if antes['min'] else float('inf')
+            regrediu = razao > 1 + tolerancia and agora - antes['min'] > DIFERENCA_MINIMA
+            linhas.append((escala, etapa, antes['min'], agora, razao, regrediu))
+    return linhas
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark dos scripts de dados com planilhas sintéticas')
+    parser.add_argument('--escalas', type=int, nargs='+', default=ESCALAS_PADRAO,
+                        help=f'Multiplicadores das planilhas (padrão: {ESCALAS_PADRAO})')
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=ETAPAS,
+                        help='Etapas a medir (as etapas de que dependem também rodam)')
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO,
+                        help=f'Repetições de cada etapa (padrão: {REPETICOES_PADRAO})')
+    parser.add_argument('--semente', type=int, default=0, help='Semente das planilhas sintéticas')
+    parser.add_argument('--latencia-ms', type=float, default=0,
+                        help='Atraso por requisição no stub de PostgREST (simula a rede)')
+    parser.add_argument('--historico', default=HISTORICO_PADRAO,
+                        help='Arquivo JSONL com as execuções (padrão: data/benchmarks/historico.jsonl)')
+    parser.add_argument('--sem-historico', action='store_true', help='Não grava esta execução no histórico')
+    parser.add_argument('--comparar', nargs='?', const='', default=None, metavar='COMMIT',
+                        help='Compara com a última execução de outro commit (ou do COMMIT informado)')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO,
+                        help=f'Aumento relativo tolerado em --comparar (padrão: {TOLERANCIA_PADRAO})')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    execucao = identificar_execucao()
+    print(f"Commit {execucao['commit'] or '?'}{' (com alterações)' if execucao['alterado'] else ''} "
+          f"em {execucao['maquina']}, {args.repeticoes} repetições", flush=True)
+
+    resultados, volumes = executar(args.escalas, com_dependencias(args.etapas), args.repeticoes,
+                                   args.semente, args.latencia_ms)
+    # Chaves de texto, como ficam depois de passar pelo JSON
+    execucao.update({
+        'repeticoes': args.repeticoes,
+        'semente': args.semente,
+        'latencia_ms': args.latencia_ms,
+        'resultados': {str(escala): etapas for escala, etapas in resultados.items()},
+        'volumes': {str(escala): volume for escala, volume in volumes.items()},
+    })
+
+    historico = carregar_historico(args.historico)
+    if not args.sem_historico:
+        registrar(args.historico, execucao)
+        print(f"\nHistórico: {args.historico}")
+
+    if args.comparar is not None:
+        anterior = referencia(historico, execucao, args.comparar or None)
+        if anterior is None:
+            print("\nNenhuma execução anterior para comparar nesta máquina")
+            sys.exit(0)
+        print(f"\nComparação com {(anterior['commit'] or '?')[:10]} ({anterior['data']}):")
+        regressoes = 0
+        for escala, etapa, antes, agora, razao, regrediu in comparar(anterior, execucao, args.tolerancia):
+            regressoes += regrediu
+            print(f"  {escala:>4}x {etapa:<22} {antes:9.3f}s -> {agora:9.3f}s  {razao:6.2f}x{'  REGRESSÃO' if regrediu else ''}")
+        if regressoes:
+            print(f"\n{regressoes} etapa(s) mais lenta(s) que a tolerância de {args.tolerancia:.0%}")
+            sys.exit(1)
@@ -0,0 +1,254 @@
+"""
+Snapshot local de dim_efetivo (id, matrícula, ativo, created_at) em SQLite
+
+Os importadores de férias e os scripts de teste resolvem matrícula -> efetivo_id a
+partir deste snapshot, sem consultar dim_efetivo a cada execução. A cada uso só o
+delta vai para a rede:
+  - delta: linhas com created_at acima da marca d'água (maior created_at do snapshot),
+    em páginas order=created_at,id + limit/offset;
+  - contagem: um GET com Prefer: count=exact; se o total do banco não bate com o
+    snapshot depois do delta (linhas removidas, ou inseridas por uma transação que
+    terminou depois com created_at anterior à marca), o snapshot é recarregado inteiro;
+  - recarga completa também quando o snapshot não existe, é de outra versão ou passou
+    de EFETIVO_CACHE_TTL_HORAS (alterações de matrícula/ativo em linhas antigas não
+    mudam created_at; dim_efetivo não tem updated_at).
+
+Um arquivo por projeto (hash de VITE_SUPABASE_URL) em data/cache/efetivo/.
+
+Variáveis de ambiente:
+  EFETIVO_CACHE=0            desativa o snapshot (resolução direto no banco, em lote)
+  EFETIVO_CACHE_DIR=...      diretório alternativo
+  EFETIVO_CACHE_TTL_HORAS=24 idade máxima antes de uma recarga completa
+
+Uso direto (atualizar e conferir matrículas):
+  python scripts/cache_efetivo.py
+  python scripts/cache_efetivo.py --completo --matricula 1999176 739820
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+from resolver_efetivo import ResolvedorMatriculas, TAMANHO_PAGINA
+from supabase_client import SUPABASE_URL, requisicao, supabase_query
+
+CACHE_DIR = os.getenv('EFETIVO_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'efetivo'
+)
+CACHE_ATIVO = os.getenv('EFETIVO_CACHE', '1') != '0'
+TTL_HORAS = float(os.getenv('EFETIVO_CACHE_TTL_HORAS', '24'))
+VERSAO_FORMATO = 2
+
+COLUNAS = 'id,matricula,ativo,created_at'
+
+# created_at_utc: created_at em UTC com microssegundos fixos, comparável como texto (MAX)
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS efetivo (
+  id TEXT PRIMARY KEY,
+  matricula TEXT,
+  ativo INTEGER,
+  created_at TEXT,
+  created_at_utc TEXT
+);
+CREATE INDEX IF NOT EXISTS efetivo_created_at_utc ON efetivo (created_at_utc);
+"""
+_ESQUEMA_META = 'CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT);'
+
+
+def caminho_snapshot(url=None):
+    """Arquivo SQLite do projeto (um por VITE_SUPABASE_URL)"""
+    chave = hashlib.sha256((url or SUPABASE_URL or '').encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f'dim_efetivo_{chave}.sqlite')
+
+
+def _data(texto):
+    return datetime.fromisoformat(texto) if texto else None
+
+
+def _utc(texto):
+    """created_at normalizado para UTC ('AAAA-MM-DDTHH:MM:SS.ffffff'); sem fuso, assume UTC"""
+    if not texto:
+        return None
+    data = datetime.fromisoformat(texto)
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc).replace(tzinfo=None)
+    return data.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def contar_dim_efetivo():
+    """Total de linhas de dim_efetivo (Content-Range de Prefer: count=exact); None se o servidor não informar"""
+    response = requisicao('dim_efetivo', params={'select': 'id', 'limit': '1'}, prefer='count=exact')
+    if response.status_code >= 400:
+        raise Exception(f"Erro na requisição: {response.status_code} - {response.text}")
+    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+
+class SnapshotEfetivo:
+    """Snapshot SQLite de dim_efetivo com atualização incremental.
+
+    consulta: função no formato supabase_query(table, method, filters, data);
+    contar: função sem argumentos com o total de dim_efetivo (None desativa a verificação).
+    """
+
+    def __init__(self, consulta=supabase_query, caminho=None, contar=contar_dim_efetivo,
+                 tamanho_pagina=TAMANHO_PAGINA, ttl_horas=TTL_HORAS):
+        self.consulta = consulta
+        self.contar = contar
+        self.caminho = caminho or caminho_snapshot()
+        self.tamanho_pagina = tamanho_pagina
+        self.ttl = timedelta(hours=ttl_horas)
+        self.requisicoes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        self.conn = sqlite3.connect(self.caminho)
+        self.conn.executescript(_ESQUEMA_META)
+        if self._meta('versao') not in (None, str(VERSAO_FORMATO)):
+            # Snapshot de outra versão: tabela recriada no formato atual (e recarregada em atualizar())
+            with self.conn:
+                self.conn.execute('DROP TABLE IF EXISTS efetivo')
+                self.conn.execute('DELETE FROM meta')
+        self.conn.executescript(_ESQUEMA)
+
+    def fechar(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _meta(self, chave):
+        linha = self.conn.execute('SELECT valor FROM meta WHERE chave = ?', (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def _gravar_meta(self, **valores):
+        self.conn.executemany('INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)',
+                              [(k, None if v is None else str(v)) for k, v in valores.items()])
+
+    def total(self):
+        return self.conn.execute('SELECT COUNT(*) FROM efetivo').fetchone()[0]
+
+    def _paginas(self, filtros):
+        """Páginas de dim_efetivo com limit/offset sobre os filtros (ordem estável)"""
+        offset = 0
+        while True:
+            self.requisicoes += 1
+            pagina = self.consulta('dim_efetivo', method='GET', filters={
+                **filtros, 'select': COLUNAS, 'limit': str(self.tamanho_pagina), 'offset': str(offset),
+            })
+            yield pagina
+            if len(pagina) < self.tamanho_pagina:
+                return
+            offset += self.tamanho_pagina
+
+    def _gravar_linhas(self, linhas):
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO efetivo (id, matricula, ativo, created_at, created_at_utc) VALUES (?, ?, ?, ?, ?)',
+            [(str(l['id']), l.get('matricula'), None if l.get('ativo') is None else int(bool(l['ativo'])),
+              l.get('created_at'), _utc(l.get('created_at'))) for l in linhas],
+        )
+        return len(linhas)
+
+    def _marca(self):
+        """Maior created_at do snapshot (datetime em UTC), pelo índice de created_at_utc"""
+        (maior,) = self.conn.execute('SELECT MAX(created_at_utc) FROM efetivo').fetchone()
+        return datetime.fromisoformat(maior).replace(tzinfo=timezone.utc) if maior else None
+
+    def _recarregar(self):
+        with self.conn:
+            self.conn.execute('DELETE FROM efetivo')
+            linhas = sum(self._gravar_linhas(p) for p in self._paginas({'order': 'id'}))
+            marca = self._marca()
+            self._gravar_meta(versao=VERSAO_FORMATO, completo_em=datetime.now().isoformat(),
+                              marca=marca.isoformat() if marca else None)
+        return linhas
+
+    def _delta(self, marca):
+        filtros = {'order': 'created_at,id'}
+        if marca is not None:
+            filtros['created_at'] = f'gt.{marca.isoformat()}'
+        with self.conn:
+            linhas = sum(self._gravar_linhas(p) for p in self._paginas(filtros))
+            nova = self._marca()
+            self._gravar_meta(marca=nova.isoformat() if nova else None)
+        return linhas
+
+    def atualizar(self, completo=False):
+        """Traz o delta (ou tudo, se preciso); devolve {'modo', 'linhas', 'total', 'requisicoes'}"""
+        inicio = self.requisicoes
+        completo_em = _data(self._meta('completo_em'))
+        if (completo or self._meta('versao') != str(VERSAO_FORMATO) or completo_em is None
+                or datetime.now() - completo_em > self.ttl):
+            modo, linhas = 'completo', self._recarregar()
+        else:
+            modo, linhas = 'delta', self._delta(_data(self._meta('marca')))
+            if self.contar is not None:
+                self.requisicoes += 1
+                esperado = self.contar()
+                if esperado is not None and esperado != self.total():
+                    # Linhas removidas no banco (ou delta perdido): recarrega tudo
+                    modo, linhas = 'completo', self._recarregar()
+        return {'modo': modo, 'linhas': linhas, 'total': self.total(), 'requisicoes': self.requisicoes - inicio}
+
+    def linhas(self):
+        """Linhas {id, matricula, ativo} do snapshot"""
+        return [{'id': i, 'matricula': m, 'ativo': None if a is None else bool(a)}
+                for i, m, a in self.conn.execute('SELECT id, matricula, ativo FROM efetivo ORDER BY id')]
+
+    def resolvedor(self, consulta=None):
+        """ResolvedorMatriculas com o snapshot inteiro indexado (sem consultar o banco para faltantes)"""
+        resolvedor = ResolvedorMatriculas(consulta or self.consulta, tamanho_pagina=self.tamanho_pagina)
+        resolvedor.indexar(self.linhas())
+        resolvedor.tabela_completa = True
+        return resolvedor
+
+
+def resolvedor_em_cache(consulta=supabase_query, caminho=None, completo=False):
+    """Atualiza o snapshot e devolve (ResolvedorMatriculas indexado, resumo da atualização)"""
+    inicio = time.perf_counter()
+    with SnapshotEfetivo(consulta, caminho) as snapshot:
+        resumo = snapshot.atualizar(completo)
+        resolvedor = snapshot.resolvedor(consulta)
+    resolvedor.requisicoes = resumo['requisicoes']
+    resumo['segundos'] = time.perf_counter() - inicio
+    return resolvedor, resumo
+
+
+def carregar_resolvedor(consulta=supabase_query):
+    """resolvedor_em_cache() para os importadores: None (com aviso) se o snapshot estiver desativado ou falhar"""
+    if not CACHE_ATIVO:
+        return None
+    try:
+        resolvedor, resumo = resolvedor_em_cache(consulta)
+    except Exception as e:
+        # Quem chamou cai na resolução direto no banco (e nos próprios avisos de erro)
+        print(f"AVISO: Snapshot de dim_efetivo indisponível: {e}", flush=True)
+        return None
+    print(descrever(resumo), flush=True)
+    return resolvedor
+
+
+def descrever(resumo):
+    return (f"Snapshot de dim_efetivo ({resumo['modo']}): {resumo['linhas']} linhas recebidas, "
+            f"{resumo['total']} no cache, {resumo['requisicoes']} requisições, {resumo['segundos']:.2f}s")
+
+
+if __name__ == '__main__':
+    from supabase_client import imprimir_metricas
+
+    parser = argparse.ArgumentParser(description='Atualiza o snapshot local de dim_efetivo')
+    parser.add_argument('--completo', action='store_true', help='Recarrega a tabela inteira em vez do delta')
+    parser.add_argument('--matricula', nargs='*', default=[], help='Matrículas para resolver pelo snapshot')
+    args = parser.parse_args()
+
+    resolvedor, resumo = resolvedor_em_cache(completo=args.completo)
+    print(descrever(resumo))
+    print(f"Arquivo: {caminho_snapshot()}")
+    for matricula in args.matricula:
+        t = time.perf_counter()
+        efetivo_id = resolvedor.buscar(matricula)
+        print(f"  {matricula}: {efetivo_id or 'não encontrada'} ({(time.perf_counter() - t) * 1e6:.0f} µs)")
+    imprimir_metricas()
@@ -0,0 +1,268 @@
+"""
+Cache colunar das planilhas Excel usadas pelos scripts (Resumos Estatísticas, AFASTAMENTOS, ...)
+
+Na primeira leitura, todas as abas do arquivo são decodificadas uma única vez (openpyxl)
+e gravadas como arrays NumPy (.npy) em data/cache/planilhas/<hash>/. As execuções seguintes
+carregam esses arrays e remontam o DataFrame em vez de descompactar e interpretar o XML de novo.
+
+O cache é identificado pelo SHA-256 do arquivo; o hash só é recalculado quando o
+mtime ou o tamanho do arquivo mudam.
+
+Variáveis de ambiente:
+  PLANILHAS_CACHE=0        desativa o cache (lê direto com pandas/openpyxl)
+  PLANILHAS_CACHE_DIR=...  diretório alternativo para o cache
+
+Uso direto (pré-aquecer o cache):
+  python scripts/cache_planilhas.py "Resumos Estatísticas 2025 a 2020.xlsx"
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.getenv('PLANILHAS_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'planilhas'
+)
+CACHE_ATIVO = os.getenv('PLANILHAS_CACHE', '1') != '0'
+VERSAO_FORMATO = 1
+
+# Tipos de célula armazenados no snapshot
+TIPO_NUMERO = 0
+TIPO_TEXTO = 1
+TIPO_DATA = 2
+TIPO_BOOL = 3
+TIPO_INTEIRO = 4
+
+ARRAYS = ('linha', 'coluna', 'tipo', 'numero', 'inteiro', 'texto_bytes', 'texto_offsets')
+
+
+def _hash_arquivo(caminho):
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _caminho_indice():
+    return os.path.join(CACHE_DIR, 'indice.json')
+
+
+def _ler_indice():
+    try:
+        with open(_caminho_indice(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_indice(indice):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Nome temporário por processo: vários workers podem gravar o índice ao mesmo tempo
+    # (o último vence; uma entrada perdida só faz o hash ser recalculado depois)
+    fd, tmp = tempfile.mkstemp(prefix='.indice_', suffix='.tmp', dir=CACHE_DIR)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, _caminho_indice())
+
+
+def _diretorio_snapshot(caminho):
+    """Diretório do snapshot do arquivo (chave = hash do conteúdo, revalidado por mtime+tamanho)"""
+    caminho = os.path.abspath(caminho)
+    stat = os.stat(caminho)
+    indice = _ler_indice()
+    entrada = indice.get(caminho)
+    if entrada and entrada.get('mtime_ns') == stat.st_mtime_ns and entrada.get('tamanho') == stat.st_size:
+        hash_arquivo = entrada['hash']
+    else:
+        hash_arquivo = _hash_arquivo(caminho)
+        indice[caminho] = {'mtime_ns': stat.st_mtime_ns, 'tamanho': stat.st_size, 'hash': hash_arquivo}
+        _gravar_indice(indice)
+    return os.path.join(CACHE_DIR, hash_arquivo[:32])
+
+
+def _codificar_aba(df):
+    """Converte um DataFrame (header=None) em arrays esparsos por célula"""
+    linhas, colunas, tipos, numeros, inteiros = [], [], [], [], []
+    textos = []
+    for c in range(df.shape[1]):
+        serie = df.iloc[:, c]
+        presentes = np.flatnonzero(serie.notna().to_numpy())
+        valores = serie.to_numpy(dtype=object)
+        for r in presentes:
+            v = valores[r]
+            if isinstance(v, (bool, np.bool_)):
+                tipo, num, inteiro = TIPO_BOOL, float(v), 0
+            elif isinstance(v, (int, np.integer)):
+                tipo, num, inteiro = TIPO_INTEIRO, 0.0, int(v)
+            elif isinstance(v, (float, np.floating)):
+                tipo, num, inteiro = TIPO_NUMERO, float(v), 0
+            elif isinstance(v, (datetime, date, np.datetime64)):
+                tipo, num, inteiro = TIPO_DATA, 0.0, pd.Timestamp(v).value
+            else:
+                # Texto (e qualquer outro tipo raro, como time, convertido para str)
+                tipo, num, inteiro = TIPO_TEXTO, 0.0, 0
+                textos.append(str(v))
+            linhas.append(r)
+            colunas.append(c)
+            tipos.append(tipo)
+            numeros.append(num)
+            inteiros.append(inteiro)
+
+    codificados = [t.encode('utf-8') for t in textos]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    if codificados:
+        offsets[1:] = np.cumsum([len(b) for b in codificados])
+    return {
+        'linha': np.asarray(linhas, dtype=np.int32),
+        'coluna': np.asarray(colunas, dtype=np.int32),
+        'tipo': np.asarray(tipos, dtype=np.int8),
+        'numero': np.asarray(numeros, dtype=np.float64),
+        'inteiro': np.asarray(inteiros, dtype=np.int64),
+        'texto_bytes': np.frombuffer(b''.join(codificados), dtype=np.uint8).copy(),
+        'texto_offsets': offsets,
+    }
+
+
+def _decodificar_aba(arrays, shape):
+    """Reconstrói o DataFrame equivalente ao pd.read_excel(header=None)"""
+    celulas = np.full(shape, np.nan, dtype=object)
+    linha = arrays['linha']
+    coluna = arrays['coluna']
+    tipo = arrays['tipo']
+
+    sel = tipo == TIPO_NUMERO
+    celulas[linha[sel], coluna[sel]] = arrays['numero'][sel]
+    sel = tipo == TIPO_BOOL
+    celulas[linha[sel], coluna[sel]] = arrays['numero'][sel].astype(bool)
+    sel = np.flatnonzero(tipo == TIPO_INTEIRO)
+    celulas[linha[sel], coluna[sel]] = arrays['inteiro'][sel].tolist()
+    sel = np.flatnonzero(tipo == TIPO_DATA)
+    celulas[linha[sel], coluna[sel]] = list(pd.to_datetime(arrays['inteiro'][sel]))
+
+    sel = np.flatnonzero(tipo == TIPO_TEXTO)
+    if len(sel):
+        # Offsets estão em bytes UTF-8, um par por célula de texto
+        brutos = arrays['texto_bytes'].tobytes()
+        offsets = arrays['texto_offsets'].tolist()
+        celulas[linha[sel], coluna[sel]] = [
+            brutos[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(sel))
+        ]
+
+    return pd.DataFrame(celulas).infer_objects()
+
+
+def _construir_snapshot(caminho, destino):
+    """Decodifica todas as abas uma única vez e grava o snapshot de forma atômica"""
+    abas = pd.read_excel(caminho, sheet_name=None, header=None, engine='openpyxl')
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.tmp_', dir=CACHE_DIR)
+    try:
+        manifesto = {'versao': VERSAO_FORMATO, 'arquivo': os.path.abspath(caminho), 'abas': []}
+        for i, (nome, df) in enumerate(abas.items()):
+            pasta = os.path.join(tmp, f'aba_{i:03d}')
+            os.makedirs(pasta)
+            for chave, arr in _codificar_aba(df).items():
+                np.save(os.path.join(pasta, f'{chave}.npy'), arr)
+            manifesto['abas'].append({'nome': str(nome), 'pasta': f'aba_{i:03d}', 'shape': list(df.shape)})
+        with open(os.path.join(tmp, 'manifesto.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        try:
+            os.replace(tmp, destino)
+        except OSError:
+            # Outro processo gravou o mesmo snapshot primeiro
+            shutil.rmtree(tmp, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return abas
+
+
+def _manifesto(caminho):
+    """Garante que o snapshot existe e devolve (diretório, manifesto)"""
+    destino = _diretorio_snapshot(caminho)
+    caminho_manifesto = os.path.join(destino, 'manifesto.json')
+    manifesto = None
+    if os.path.exists(caminho_manifesto):
+        with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+        if manifesto.get('versao') != VERSAO_FORMATO:
+            shutil.rmtree(destino, ignore_errors=True)
+            manifesto = None
+    if manifesto is None:
+        _construir_snapshot(caminho, destino)
+        with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+    return destino, manifesto
+
+
+def _localizar_aba(manifesto, sheet_name):
+    abas = manifesto['abas']
+    if isinstance(sheet_name, int):
+        return abas[sheet_name]
+    for aba in abas:
+        if aba['nome'] == str(sheet_name):
+            return aba
+    raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+
+def _aplicar_header(df, header, nrows):
+    """Aplica header/nrows como o pd.read_excel faria sobre a aba já carregada"""
+    if header is None and nrows is None:
+        return df
+    inicio = header if header is not None else 0
+    fim = inicio + (1 if header is not None else 0) + nrows if nrows is not None else None
+    recorte = df.iloc[inicio:fim]
+    if nrows is not None:
+        # O pandas só enxerga as colunas preenchidas nas linhas lidas
+        preenchidas = np.flatnonzero(recorte.notna().any(axis=0).to_numpy())
+        recorte = recorte.iloc[:, :preenchidas[-1] + 1 if len(preenchidas) else 0]
+    if header is None:
+        return recorte.reset_index(drop=True).astype(object).infer_objects()
+    nomes = [f'Unnamed: {i}' if pd.isna(v) else v for i, v in enumerate(recorte.iloc[0].tolist())] if len(recorte) else []
+    corpo = recorte.iloc[1:].reset_index(drop=True).astype(object).infer_objects()
+    corpo.columns = nomes if nomes else corpo.columns
+    return corpo
+
+
+def listar_abas(caminho):
+    """Nomes das abas do arquivo (constrói o snapshot se necessário)"""
+    if not CACHE_ATIVO:
+        return pd.ExcelFile(caminho).sheet_names
+    _, manifesto = _manifesto(caminho)
+    return [aba['nome'] for aba in manifesto['abas']]
+
+
+def ler_aba(caminho, sheet_name=0, header=None, nrows=None):
+    """Equivalente a pd.read_excel(caminho, sheet_name=..., header=..., nrows=...) usando o cache"""
+    if not CACHE_ATIVO:
+        return pd.read_excel(caminho, sheet_name=sheet_name, header=header, nrows=nrows, engine='openpyxl')
+    destino, manifesto = _manifesto(caminho)
+    aba = _localizar_aba(manifesto, sheet_name)
+    pasta = os.path.join(destino, aba['pasta'])
+    arrays = {chave: np.load(os.path.join(pasta, f'{chave}.npy')) for chave in ARRAYS}
+    df = _decodificar_aba(arrays, tuple(aba['shape']))
+    return _aplicar_header(df, header, nrows)
+
+
+def ler_abas(caminho, header=None):
+    """Todas as abas do arquivo, como pd.read_excel(sheet_name=None)"""
+    return {nome: ler_aba(caminho, nome, header=header) for nome in listar_abas(caminho)}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: python scripts/cache_planilhas.py caminho.xlsx [...]")
+        sys.exit(1)
+    for arquivo in sys.argv[1:]:
+        abas = listar_abas(arquivo)
+        print(f"{arquivo}: {len(abas)} abas em cache ({_diretorio_snapshot(arquivo)})")
+        for nome in abas:
+            print(f"  - {nome}")
@@ -0,0 +1,194 @@
+"""
+Carga direta das estatísticas BPMA (estrutura adaptada) via COPY, sem gerar arquivos .sql
+
+Lê os dados processados (data/processed, via dados_processados.py), envia as linhas para
+tabelas temporárias com COPY FROM STDIN numa conexão psycopg e faz um único upsert
+set-based em cada tabela fato:
+  - fact_indicador_mensal_bpma (tempo_id, indicador_id, valor)
+  - fact_resgate_fauna_especie_mensal (espécie resolvida por JOIN em dim_especies_fauna)
+
+O resultado é o mesmo da migration gerada por generate_sql_inserts_adapted.py, numa
+única transação (tudo ou nada), sem precisar dividir o arquivo para o SQL Editor.
+
+Conexão (string do Postgres, ex.: Supabase > Settings > Database > Connection string):
+  --db-url "postgresql://..."  ou variável SUPABASE_DB_URL / DATABASE_URL
+
+Uso:
+  python scripts/carregar_estatisticas_copy.py
+  python scripts/carregar_estatisticas_copy.py --dry-run   # carrega e desfaz (ROLLBACK)
+
+Requer psycopg 3 (pip install "psycopg[binary]").
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from dados_processados import ler_tabela
+from normalizacao import criar_id_slug
+
+load_dotenv()
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(base_dir, 'data', 'processed')
+
+
+def _texto(valor):
+    return '' if pd.isna(valor) else str(valor).strip()
+
+
+def linhas_indicadores(data_dir):
+    """(tempo_id, indicador_id, valor) de cada linha de atendimentos"""
+    df = ler_tabela('atendimentos', data_dir)
+    for ano, mes, natureza, quantidade in zip(df['ano'].tolist(), df['mes'].tolist(),
+                                              df['natureza'].tolist(), df['quantidade'].tolist()):
+        yield ano * 100 + mes, criar_id_slug(_texto(natureza)), quantidade
+
+
+def linhas_resgates(data_dir):
+    """(tempo_id, nome_cientifico, nome_popular, quantidade); ignora linhas sem os dois nomes"""
+    df = ler_tabela('resgates', data_dir)
+    for ano, mes, nome_popular, nome_cientifico, quantidade in zip(
+            df['ano'].tolist(), df['mes'].tolist(), df['nome_popular'].tolist(),
+            df['nome_cientifico'].tolist(), df['quantidade'].tolist()):
+        nome_popular = _texto(nome_popular)
+        nome_cientifico = _texto(nome_cientifico)
+        if not nome_popular or not nome_cientifico:
+            continue
+        yield ano * 100 + mes, nome_cientifico, nome_popular, quantidade
+
+
+SQL_STAGING = """
+CREATE TEMP TABLE stg_indicador (
+    n bigint GENERATED ALWAYS AS IDENTITY,
+    tempo_id integer NOT NULL,
+    indicador_id text NOT NULL,
+    valor integer NOT NULL
+) ON COMMIT DROP;
+
+CREATE TEMP TABLE stg_resgate (
+    n bigint GENERATED ALWAYS AS IDENTITY,
+    tempo_id integer NOT NULL,
+    nome_cientifico text NOT NULL,
+    nome_popular text NOT NULL,
+    quantidade integer NOT NULL
+) ON COMMIT DROP;
+"""
+
+# Chave repetida no CSV: vale a última linha (n = ordem do COPY), como nos INSERTs sequenciais
+SQL_MERGE_INDICADOR = """
+INSERT INTO public.fact_indicador_mensal_bpma (tempo_id, indicador_id, valor)
+SELECT DISTINCT ON (tempo_id, indicador_id) tempo_id, indicador_id, valor
+FROM stg_indicador
+ORDER BY tempo_id, indicador_id, n DESC
+ON CONFLICT (tempo_id, indicador_id) DO UPDATE SET valor=EXCLUDED.valor
+"""
+
+SQL_MERGE_RESGATE = """
+WITH especie_cientifico AS (
+  SELECT DISTINCT ON (LOWER(TRIM(nome_cientifico))) LOWER(TRIM(nome_cientifico)) AS chave, id
+  FROM public.dim_especies_fauna
+),
+especie_popular AS (
+  SELECT DISTINCT ON (LOWER(TRIM(nome_popular))) LOWER(TRIM(nome_popular)) AS chave, id
+  FROM public.dim_especies_fauna
+),
+linhas AS (
+  SELECT s.n, s.tempo_id, s.nome_cientifico, s.nome_popular, s.quantidade,
+         COALESCE(ec.id, ep.id) AS id_especie_fauna
+  FROM stg_resgate s
+  LEFT JOIN especie_cientifico ec ON ec.chave = LOWER(TRIM(s.nome_cientifico))
+  LEFT JOIN especie_popular ep ON ep.chave = LOWER(TRIM(s.nome_popular))
+)
+INSERT INTO public.fact_resgate_fauna_especie_mensal (
+    tempo_id, id_regiao_administrativa, id_especie_fauna,
+    nome_cientifico, nome_popular, quantidade
+)
+SELECT
+    tempo_id,
+    NULL,
+    (ARRAY_AGG(id_especie_fauna ORDER BY n DESC) FILTER (WHERE id_especie_fauna IS NOT NULL))[1],
+    nome_cientifico,
+    (ARRAY_AGG(nome_popular ORDER BY n DESC))[1],
+    (ARRAY_AGG(quantidade ORDER BY n DESC))[1]
+FROM linhas
+GROUP BY tempo_id, nome_cientifico
+ON CONFLICT (tempo_id, nome_cientifico)
+DO UPDATE SET
+    quantidade=EXCLUDED.quantidade,
+    nome_popular=EXCLUDED.nome_popular,
+    id_especie_fauna=COALESCE(EXCLUDED.id_especie_fauna, fact_resgate_fauna_especie_mensal.id_especie_fauna)
+"""
+
+
+def copiar(cur, tabela, colunas, linhas):
+    """COPY FROM STDIN das linhas geradas; devolve quantas foram enviadas"""
+    total = 0
+    with cur.copy(f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN") as copy:
+        for linha in linhas:
+            copy.write_row(linha)
+            total += 1
+    return total
+
+
+def carregar(db_url, data_dir=DATA_DIR, dry_run=False):
+    """Carrega os dois CSVs numa transação; devolve um dicionário com contagens e tempos"""
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit('ERRO: psycopg não instalado. Use: pip install "psycopg[binary]"')
+
+    resumo = {}
+    inicio = time.perf_counter()
+    with psycopg.connect(db_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(SQL_STAGING)
+
+            t = time.perf_counter()
+            resumo['indicadores_copiados'] = copiar(
+                cur, 'stg_indicador', ('tempo_id', 'indicador_id', 'valor'),
+                linhas_indicadores(data_dir))
+            resumo['resgates_copiados'] = copiar(
+                cur, 'stg_resgate', ('tempo_id', 'nome_cientifico', 'nome_popular', 'quantidade'),
+                linhas_resgates(data_dir))
+            resumo['tempo_copy'] = time.perf_counter() - t
+
+            t = time.perf_counter()
+            cur.execute(SQL_MERGE_INDICADOR)
+            resumo['indicadores_gravados'] = cur.rowcount
+            cur.execute(SQL_MERGE_RESGATE)
+            resumo['resgates_gravados'] = cur.rowcount
+            resumo['tempo_merge'] = time.perf_counter() - t
+
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    resumo['tempo_total'] = time.perf_counter() - inicio
+    return resumo
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Carrega atendimentos/resgates processados direto no Postgres via COPY')
+    parser.add_argument('--db-url', default=os.getenv('SUPABASE_DB_URL') or os.getenv('DATABASE_URL'),
+                        help='String de conexão do Postgres (padrão: SUPABASE_DB_URL ou DATABASE_URL)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Diretório dos dados processados (Parquet ou CSV)')
+    parser.add_argument('--dry-run', action='store_true', help='Executa tudo e desfaz no final (ROLLBACK)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not args.db_url:
+        print("ERRO: informe --db-url ou defina SUPABASE_DB_URL/DATABASE_URL no .env")
+        sys.exit(1)
+
+    resumo = carregar(args.db_url, args.data_dir, dry_run=args.dry_run)
+    print(f"Indicadores: {resumo['indicadores_copiados']} linhas copiadas, {resumo['indicadores_gravados']} gravadas")
+    print(f"Resgates: {resumo['resgates_copiados']} linhas copiadas, {resumo['resgates_gravados']} gravadas")
+    print(f"COPY: {resumo['tempo_copy']:.2f}s | upsert: {resumo['tempo_merge']:.2f}s | total: {resumo['tempo_total']:.2f}s")
+    if args.dry_run:
+        print("Dry-run: alterações desfeitas (ROLLBACK)")
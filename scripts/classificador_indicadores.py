@@ -0,0 +1,148 @@
+"""
+Categoria de cada indicador de dim_indicador_bpma (natureza -> categoria)
+
+Mesma regra da classificação original de generate_sql_adapted.py: vale a primeira
+categoria (na ordem de CATEGORIAS_INDICADOR) com algum tipo que contém a natureza ou
+está contido nela, sem diferenciar maiúsculas; sem match, 'outros'. Um nome idêntico
+a um tipo (exato) é resolvido antes, direto num dicionário.
+
+As estruturas são montadas uma vez e cada classificação percorre a natureza uma única
+vez, então o mesmo classificador serve para a ingestão dos RAPs, não só para as
+migrations:
+  - 'contem' (o tipo aparece na natureza): uma regex com todos os tipos em alternância
+    dentro de um lookahead, na ordem de prioridade, avaliada em cada posição do texto;
+  - 'contido' (a natureza aparece num tipo): str.find sobre os tipos concatenados na
+    ordem de prioridade; a primeira ocorrência é a do tipo de maior prioridade.
+
+Lista das naturezas dos dados processados com a categoria e a regra que a definiu:
+  python scripts/classificador_indicadores.py
+"""
+import bisect
+import re
+from collections import namedtuple
+
+CATEGORIAS_INDICADOR = {
+    'atendimentos': ['Atendimentos registrados', 'Atendimentos registrados (RAP)'],
+    'ocorrencias_ambientais': [
+        'Termos Circunstanciados de Ocorrência - PMDF',
+        'Termos Circunstanciados - OUTRAS',
+        'Em apuração',
+        'Flagrantes',
+        'P.A.A.I.',
+        'Apreensão de arma de fogo e/ou munição',
+        'Crime contra as Áreas de Proteção Permanente',
+        'Crimes contra as Unidades de Conservação',
+        'Crime contra o Licenciamento Ambiental',
+        'Crime contra os Recursos Hídricos',
+        'Crime contra os Recursos Pesqueiros',
+        'Crimes contra a Administração Ambiental',
+        'Crimes contra a Fauna',
+        'Crimes contra a Flora',
+        'Outros Crimes Ambientais',
+        'Parcelamento Irregular do Solo'
+    ],
+    'resgate_fauna_total': [
+        'QUANTIDADE DE RESGATE',
+        'QUANTIDADE DE SOLTURA',
+        'QUANTIDADE DE ÓBITOS',
+        'QUANTIDADE DE FERIDOS',
+        'QUANTIDADE DE FILHOTES',
+        'QUANTIDADE DE ATROPELAMENTO'
+    ],
+    'outros': [
+        'Captura de animais / Busca de Animais / Recolhimento e Remoção de Animais / Remoção de Animais',
+        'Corte de Árvores'
+    ]
+}
+
+CATEGORIA_PADRAO = 'outros'
+
+# regra: 'exato', 'contem' (o tipo está na natureza), 'contido' (a natureza está no tipo)
+# ou 'padrao'; tipo: o tipo de CATEGORIAS_INDICADOR que decidiu (None em 'padrao')
+Classificacao = namedtuple('Classificacao', ['categoria', 'regra', 'tipo'])
+
+# Separador dos tipos concatenados (não aparece em textos de planilha)
+_SEPARADOR = '\x00'
+
+
+class ClassificadorCategorias:
+    """Classificador pré-compilado a partir de {categoria: [tipos]} (a ordem define a prioridade)"""
+
+    def __init__(self, categorias, padrao=CATEGORIA_PADRAO):
+        self.padrao = padrao
+        # (categoria, tipo) na ordem de prioridade; o índice na lista é a prioridade
+        self._tipos = [(cat, tipo) for cat, tipos in categorias.items() for tipo in tipos]
+        normalizados = [tipo.lower() for _, tipo in self._tipos]
+
+        self._exatos = {}
+        for prioridade, chave in enumerate(normalizados):
+            self._exatos.setdefault(chave, prioridade)
+
+        # Um grupo por tipo; o lastindex do match identifica o tipo
+        self._contem = re.compile(
+            '(?=' + '|'.join(f'({re.escape(chave)})' for chave in normalizados) + ')'
+        ) if normalizados else None
+
+        self._concatenados = _SEPARADOR.join(normalizados)
+        self._inicios = []
+        posicao = 0
+        for chave in normalizados:
+            self._inicios.append(posicao)
+            posicao += len(chave) + len(_SEPARADOR)
+
+        self._cache = {}
+
+    def _resultado(self, prioridade, regra):
+        categoria, tipo = self._tipos[prioridade]
+        return Classificacao(categoria, regra, tipo)
+
+    def classificar(self, natureza):
+        """Classificacao(categoria, regra, tipo) da natureza"""
+        resultado = self._cache.get(natureza)
+        if resultado is not None:
+            return resultado
+        texto = natureza.lower()
+
+        prioridade = self._exatos.get(texto)
+        if prioridade is not None:
+            resultado = self._resultado(prioridade, 'exato')
+        else:
+            candidatos = []
+            if self._contem is not None:
+                # Em cada posição a alternância devolve o tipo de maior prioridade que começa ali
+                menor = min((m.lastindex - 1 for m in self._contem.finditer(texto)), default=None)
+                if menor is not None:
+                    candidatos.append((menor, 'contem'))
+            if _SEPARADOR not in texto:
+                posicao = self._concatenados.find(texto)
+                if posicao != -1:
+                    candidatos.append((bisect.bisect_right(self._inicios, posicao) - 1, 'contido'))
+            if candidatos:
+                prioridade, regra = min(candidatos)
+                resultado = self._resultado(prioridade, regra)
+            else:
+                resultado = Classificacao(self.padrao, 'padrao', None)
+
+        self._cache[natureza] = resultado
+        return resultado
+
+    def categoria(self, natureza):
+        return self.classificar(natureza).categoria
+
+
+CLASSIFICADOR_INDICADORES = ClassificadorCategorias(CATEGORIAS_INDICADOR)
+
+
+def categoria_indicador(natureza):
+    """Categoria de dim_indicador_bpma para a natureza (ex.: 'Crimes contra a Flora' -> 'ocorrencias_ambientais')"""
+    return CLASSIFICADOR_INDICADORES.categoria(natureza)
+
+
+if __name__ == '__main__':
+    from dados_processados import ler_tabela
+
+    df = ler_tabela('atendimentos')
+    naturezas = df['natureza'].map(str).str.strip().drop_duplicates()
+    for natureza in naturezas[naturezas.ne('')]:
+        c = CLASSIFICADOR_INDICADORES.classificar(natureza)
+        print(f"{c.categoria:<24} {c.regra:<8} {natureza}" + (f"  <- {c.tipo}" if c.regra not in ('exato', 'padrao') else ''))
@@ -0,0 +1,128 @@
+"""
+Formato dos dados processados do Excel de Estatísticas BPMA (data/processed)
+
+atendimentos e resgates são gravados em Parquet com schema explícito:
+  ano/mes int16, quantidade int32, natureza/tipo_fauna/ordem category,
+  nome_popular/nome_cientifico string
+Os leitores (geradores de SQL, carga via COPY, análises) recebem os tipos prontos, sem
+inferência a cada leitura; coluna vazia continua com o seu tipo (tipo_fauna não vira
+float só porque nenhuma linha foi preenchida).
+
+CSV (UTF-8 com BOM, como antes) é só exportação opcional. ler_tabela usa o Parquet
+quando existe e cai para o CSV, com o mesmo schema, nos diretórios que só têm CSV.
+
+Uso direto:
+  python scripts/dados_processados.py                 # CSV -> Parquet
+  python scripts/dados_processados.py --exportar-csv  # Parquet -> CSV
+"""
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(base_dir, 'data', 'processed')
+
+ESQUEMAS = {
+    'atendimentos': {
+        'ano': 'int16',
+        'mes': 'int16',
+        'natureza': 'category',
+        'quantidade': 'int32',
+    },
+    'resgates': {
+        'ano': 'int16',
+        'mes': 'int16',
+        'tipo_fauna': 'category',
+        'nome_popular': 'string',
+        'nome_cientifico': 'string',
+        'ordem': 'category',
+        'quantidade': 'int32',
+    },
+}
+
+COLUNAS_ATENDIMENTOS = list(ESQUEMAS['atendimentos'])
+COLUNAS_RESGATES = list(ESQUEMAS['resgates'])
+
+
+def tipar(df, tabela, colunas=None):
+    """DataFrame com as colunas da tabela (ou só colunas) na ordem e com os tipos do schema"""
+    esquema = ESQUEMAS[tabela]
+    colunas = list(esquema) if colunas is None else colunas
+    df = df.reindex(columns=colunas)
+    tipos = {}
+    for coluna in colunas:
+        tipo = esquema[coluna]
+        if tipo in ('category', 'string'):
+            # None/NaN/'' de origens diferentes viram um único "vazio"
+            texto = df[coluna].astype(object)
+            df[coluna] = texto.where(~(texto.isna() | (texto.astype(str) == '')), None)
+        tipos[coluna] = tipo
+    return df.astype(tipos)
+
+
+def caminho_tabela(tabela, data_dir=DATA_DIR):
+    """Arquivo lido por ler_tabela: <tabela>.parquet, ou <tabela>.csv se não houver Parquet"""
+    parquet = os.path.join(data_dir, f'{tabela}.parquet')
+    return parquet if os.path.exists(parquet) else os.path.join(data_dir, f'{tabela}.csv')
+
+
+def ler_tabela(tabela, data_dir=DATA_DIR, caminho=None):
+    caminho = caminho or caminho_tabela(tabela, data_dir)
+    if caminho.endswith('.parquet'):
+        df = pd.read_parquet(caminho)
+    else:
+        # Só célula vazia é ausente: nomes como "NA" continuam texto
+        df = pd.read_csv(caminho, encoding='utf-8-sig', keep_default_na=False, na_values=[''],
+                         dtype={c: 'string' for c, t in ESQUEMAS[tabela].items() if t in ('category', 'string')})
+    return tipar(df, tabela)
+
+
+def origem_linhas(df, caminho):
+    """'arquivo:<n>' de cada linha de ler_tabela: linha do CSV (cabeçalho na 1) ou posição no Parquet (a partir de 1)"""
+    deslocamento = 1 if caminho.endswith('.parquet') else 2
+    return os.path.basename(caminho) + ':' + pd.Series(df.index + deslocamento, index=df.index).astype(str)
+
+
+def _gravar_atomico(caminho, gravar):
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix=os.path.splitext(caminho)[1], dir=os.path.dirname(caminho))
+    os.close(fd)
+    try:
+        gravar(tmp)
+        os.replace(tmp, caminho)
+    except Exception:
+        os.remove(tmp)
+        raise
+
+
+def gravar_tabela(df, tabela, data_dir=DATA_DIR, csv=False):
+    """Grava <tabela>.parquet (e <tabela>.csv com csv=True); devolve os caminhos gravados"""
+    os.makedirs(data_dir, exist_ok=True)
+    df = tipar(df, tabela)
+    caminhos = [os.path.join(data_dir, f'{tabela}.parquet')]
+    _gravar_atomico(caminhos[0], lambda tmp: df.to_parquet(tmp, index=False))
+    if csv:
+        caminhos.append(exportar_csv(df, tabela, data_dir))
+    return caminhos
+
+
+def exportar_csv(df, tabela, data_dir=DATA_DIR):
+    caminho = os.path.join(data_dir, f'{tabela}.csv')
+    _gravar_atomico(caminho, lambda tmp: df.to_csv(tmp, index=False, encoding='utf-8-sig'))
+    return caminho
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Converte os dados processados entre CSV e Parquet')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Diretório dos dados processados')
+    parser.add_argument('--exportar-csv', action='store_true', help='Gera os CSVs a partir do Parquet')
+    args = parser.parse_args()
+
+    for tabela in ESQUEMAS:
+        if args.exportar_csv:
+            df = ler_tabela(tabela, caminho=os.path.join(args.data_dir, f'{tabela}.parquet'))
+            print(f"{tabela}: {len(df)} linhas -> {exportar_csv(df, tabela, args.data_dir)}")
+        else:
+            df = ler_tabela(tabela, caminho=os.path.join(args.data_dir, f'{tabela}.csv'))
+            print(f"{tabela}: {len(df)} linhas -> {gravar_tabela(df, tabela, args.data_dir)[0]}")
@@ -0,0 +1,236 @@
+"""
+Datas e meses das planilhas de férias, compartilhados pelos importadores
+
+Uma célula de data pode chegar como:
+  - datetime/date (célula formatada como data, openpyxl/pandas);
+  - número serial do Excel (dias desde 1899-12-30), entre SERIAL_MINIMO e SERIAL_MAXIMO;
+    números menores (dias, meses) não são datas;
+  - texto 'DD/MM', 'DD/MM/AA' ou 'DD/MM/AAAA' (sem ano: ano_base), ISO 'AAAA-MM-DD[ HH:MM:SS]';
+  - abreviação do mês ('JAN', 'FEV', ...): primeiro dia do mês no ano_base.
+Qualquer outra coisa, ou uma data inexistente (31/02), vira None/NaT.
+
+data_planilha / mes_planilha: caminho escalar, memoizado (as planilhas repetem ~365
+datas e 12 meses em milhares de células).
+datas_coluna / meses_coluna: a coluna inteira em poucas operações de array (factorize e
+take), com o ano_base escalar ou um por linha; cada valor distinto passa uma vez pelo
+caminho escalar, então os dois seguem exatamente as mesmas regras.
+
+Micro-benchmark (compara com o parse_date anterior de importar_ferias_2026.py):
+  python scripts/datas_planilha.py
+"""
+import math
+import numbers
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+MESES_ABREV = {
+    'JAN': 1, 'FEV': 2, 'MAR': 3, 'ABR': 4, 'MAI': 5, 'JUN': 6,
+    'JUL': 7, 'AGO': 8, 'SET': 9, 'OUT': 10, 'NOV': 11, 'DEZ': 12
+}
+
+# Origem dos seriais do Excel (já descontado o 29/02/1900 inexistente)
+ORIGEM_EXCEL = datetime(1899, 12, 30)
+# Faixa aceita como serial (1950-01-01 a 2100-12-31); números menores são dias/meses, não datas
+SERIAL_MINIMO = (datetime(1950, 1, 1) - ORIGEM_EXCEL).days
+SERIAL_MAXIMO = (datetime(2100, 12, 31) - ORIGEM_EXCEL).days
+
+_ORDINAL_1970 = date(1970, 1, 1).toordinal()
+_NAT = np.iinfo(np.int64).min
+# Tipos que pd.factorize pode juntar entre si (1 == 1.0 == True)
+_NUMEROS = (int, float, np.number)
+
+_DIA_MES = re.compile(r'^(?P<dia>\d{1,2})/(?P<mes>\d{1,2})(?:/(?P<ano>\d{2}|\d{4}))?$')
+_ISO = re.compile(r'^(?P<ano>\d{4})-(?P<mes>\d{1,2})-(?P<dia>\d{1,2})(?:[ T][\d:.]+)?$')
+
+
+def _vazio(valor):
+    return (valor is None or valor is pd.NaT or valor is pd.NA or (isinstance(valor, str) and not valor)
+            or (isinstance(valor, float) and math.isnan(valor)))
+
+
+def _numero(valor):
+    return isinstance(valor, numbers.Real) and not isinstance(valor, bool)
+
+
+@lru_cache(maxsize=65536)
+def _componentes(valor):
+    """(ano, mês, dia) de uma célula não vazia; ano None = usar o ano_base; None se não for data"""
+    if isinstance(valor, (datetime, date)):
+        return valor.year, valor.month, valor.day
+    if _numero(valor):
+        if not SERIAL_MINIMO <= valor <= SERIAL_MAXIMO:
+            return None
+        data = ORIGEM_EXCEL + timedelta(days=math.floor(valor))
+        return data.year, data.month, data.day
+    texto = str(valor).strip().upper()
+    m = _DIA_MES.match(texto)
+    if m:
+        ano = m['ano']
+        return (int(ano) + 2000 if len(ano) == 2 else int(ano)) if ano else None, int(m['mes']), int(m['dia'])
+    m = _ISO.match(texto)
+    if m:
+        return int(m['ano']), int(m['mes']), int(m['dia'])
+    if texto in MESES_ABREV:
+        return None, MESES_ABREV[texto], 1
+    return None
+
+
+@lru_cache(maxsize=65536)
+def _data_cacheada(valor, ano_base):
+    componentes = _componentes(valor)
+    if componentes is None:
+        return None
+    ano, mes, dia = componentes
+    try:
+        return date(ano if ano is not None else int(ano_base), mes, dia)
+    except (TypeError, ValueError):
+        # Data inexistente (31/02) ou sem ano
+        return None
+
+
+def data_planilha(valor, ano_base=None):
+    """date de uma célula de data (None se vazia ou inválida); ano_base completa 'DD/MM' e 'JAN'"""
+    if _vazio(valor):
+        return None
+    return _data_cacheada(valor, ano_base)
+
+
+@lru_cache(maxsize=4096)
+def _mes_cacheado(valor):
+    if isinstance(valor, float):
+        if not valor.is_integer():
+            return None
+        valor = int(valor)
+    texto = str(valor).strip().upper()
+    if texto in MESES_ABREV:
+        return MESES_ABREV[texto]
+    if texto.isdigit() and 1 <= int(texto) <= 12:
+        return int(texto)
+    return None
+
+
+def mes_planilha(valor):
+    """Número do mês de uma célula com a abreviação ('JAN') ou o número (1-12); None caso contrário"""
+    if _vazio(valor) or isinstance(valor, (bool, date, pd.Timestamp)):
+        return None
+    return _mes_cacheado(valor)
+
+
+def fatorar_celulas(valores):
+    """(códigos, valores distintos) de uma coluna de células; -1 para vazias.
+
+    pd.factorize junta números iguais de tipos diferentes (1, 1.0 e True), que aqui
+    podem dar resultados diferentes (str(1.0) = '1.0'); nas células numéricas o tipo
+    entra na chave.
+    """
+    valores = np.asarray(valores, dtype=object)
+    codigos, unicos = pd.factorize(valores, use_na_sentinel=True)
+    numericos = np.fromiter((isinstance(u, _NUMEROS) for u in unicos), dtype=bool, count=len(unicos))
+    if not numericos.any():
+        return codigos, unicos
+    linhas = np.flatnonzero((codigos >= 0) & numericos[codigos])
+    tipos = np.fromiter(map(type, valores[linhas]), dtype=object, count=len(linhas))
+    if (tipos == tipos[0]).all():
+        return codigos, unicos
+    # Cada par (valor, tipo) das células numéricas ganha um código novo depois dos existentes
+    codigos_tipo, distintos = pd.factorize(tipos)
+    novos, _ = pd.factorize(codigos[linhas].astype(np.int64) * len(distintos) + codigos_tipo)
+    _, primeiros = np.unique(novos, return_index=True)
+    codigos = codigos.copy()
+    codigos[linhas] = len(unicos) + novos
+    return codigos, np.concatenate([unicos, valores[linhas][primeiros]])
+
+
+def datas_coluna(valores, ano_base=None):
+    """Series datetime64 (NaT para vazias/inválidas) com as mesmas regras de data_planilha.
+
+    valores: Series ou lista de células; ano_base: escalar ou um valor por célula.
+    Coluna só com datetime/date vai direto para pd.to_datetime; nas demais, cada par
+    distinto (célula, ano_base) passa uma vez pelo caminho escalar e o resto é
+    factorize/take sobre a coluna inteira.
+    """
+    serie = pd.Series(valores, dtype=object)
+    if infer_dtype(serie, skipna=True) in ('datetime', 'date'):
+        # Só células formatadas como data (o caso comum): conversão direta, o ano_base não se aplica
+        dias = pd.to_datetime(serie, cache=False).to_numpy(dtype='datetime64[D]')
+        return pd.Series(dias.astype('datetime64[s]'), index=serie.index, name=serie.name)
+    # 1, 1.0 e True dão a mesma data (ou nenhuma): não precisa separar por tipo
+    codigos, unicos = pd.factorize(serie.to_numpy(), use_na_sentinel=True)
+    if np.ndim(ano_base):
+        try:
+            base = np.asarray(ano_base, dtype=float)
+        except (TypeError, ValueError):
+            base = pd.to_numeric(pd.Series(list(ano_base), dtype=object), errors='coerce').to_numpy(dtype=float)
+        codigos_ano, anos = pd.factorize(base, use_na_sentinel=True)
+        # Par (célula, ano) num inteiro; 0 = vazia / sem ano_base
+        largura = len(anos) + 1
+        pares, chaves = pd.factorize((codigos.astype(np.int64) + 1) * largura + codigos_ano + 1)
+        celulas, anos = unicos.tolist(), anos.tolist()
+        datas = [_data_cacheada(celulas[valor - 1], anos[ano - 1] if ano else None) if valor else None
+                 for valor, ano in (divmod(chave, largura) for chave in chaves.tolist())]
+    else:
+        # Código -1 (vazia) cai no último elemento
+        pares = codigos
+        datas = [_data_cacheada(valor, ano_base) for valor in unicos.tolist()] + [None]
+    # Dias desde 1970-01-01 (converter date -> datetime64 elemento a elemento é lento)
+    dias = [data.toordinal() - _ORDINAL_1970 if data else _NAT for data in datas]
+    tabela = np.array(dias, dtype=np.int64).view('datetime64[D]').astype('datetime64[s]')
+    return pd.Series(tabela[pares], index=serie.index, name=serie.name)
+
+
+def meses_coluna(valores):
+    """Series Int64 com o mês de cada célula (mesmas regras de mes_planilha)"""
+    serie = pd.Series(valores, dtype=object)
+    codigos, unicos = fatorar_celulas(serie.to_numpy())
+    # Código -1 (vazia) cai no último elemento, NaN
+    tabela = np.array([mes_planilha(v) for v in unicos] + [None], dtype=float)
+    return pd.Series(tabela[codigos], index=serie.index, name=serie.name).astype('Int64')
+
+
+def _benchmark():
+    import random
+    import timeit
+
+    def parse_date_anterior(date_str, ano_base=2026):
+        if pd.isna(date_str) or date_str == '':
+            return None
+        date_str = str(date_str).strip()
+        if '/' in date_str:
+            parts = date_str.split('/')
+            if len(parts) == 2:
+                return datetime(ano_base, int(parts[1]), int(parts[0])).date()
+            elif len(parts) == 3:
+                return datetime(int(parts[2]), int(parts[1]), int(parts[0])).date()
+        if date_str.upper() in MESES_ABREV:
+            return datetime(ano_base, MESES_ABREV[date_str.upper()], 1).date()
+        return None
+
+    r = random.Random(0)
+    # Mesmo padrão da aba de férias: poucas datas distintas em muitas células
+    distintos = [f'{r.randint(1, 28):02d}/{r.randint(1, 12):02d}' for _ in range(300)]
+    distintos += [f'{d}/2026' for d in distintos[:100]] + list(MESES_ABREV) + [None, '']
+    celulas = [r.choice(distintos) for _ in range(30000)]
+
+    for valor in distintos:
+        assert parse_date_anterior(valor) == data_planilha(valor, 2026), valor
+    vetor = datas_coluna(celulas, 2026)
+    assert [None if pd.isna(v) else v.date() for v in vetor] == [data_planilha(v, 2026) for v in celulas]
+
+    casos = [
+        ('anterior', lambda: [parse_date_anterior(v) for v in celulas]),
+        ('com cache', lambda: [data_planilha(v, 2026) for v in celulas]),
+        ('datas_coluna', lambda: datas_coluna(celulas, 2026)),
+    ]
+    print(f"{len(celulas)} células, {len(distintos)} valores distintos (µs por célula)")
+    for nome, funcao in casos:
+        melhor = min(timeit.repeat(funcao, number=1, repeat=5))
+        print(f"  {nome:<14} {melhor / len(celulas) * 1e6:8.3f}")
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,245 @@
+"""
+Script para dividir uma migration grande em partes que cabem no SQL Editor do Supabase
+
+Lê o arquivo em streaming (linha a linha), separa os comandos no ';' de nível superior
+respeitando strings ('...', E'...'), identificadores entre aspas, dollar-quoting ($$...$$,
+$tag$...$tag$) e comentários, e agrupa comandos inteiros em partes de até --max-kb
+(e, opcionalmente, --max-comandos). Uma única passada, memória limitada a um comando.
+
+Substitui dividir_migration2.py (500 comandos por parte) e dividir_migration2_otimizado.py
+(20 lotes por parte): os geradores já emitem INSERTs em lote, então basta empacotar os
+comandos pelo tamanho real.
+
+Uso:
+  python scripts/dividir_migration.py
+  python scripts/dividir_migration.py supabase/migrations/arquivo.sql --max-kb 64
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATION_PADRAO = os.path.join(base_dir, 'supabase', 'migrations', '20260105225747_popular_tabelas_estatisticas_bpma_adaptado.sql')
+SAIDA_PADRAO = os.path.join(base_dir, 'supabase', 'migrations', 'migration2_partes')
+
+# Tamanho das partes já executadas com sucesso no SQL Editor (~64 KB)
+MAX_KB_PADRAO = 64
+
+# Início de qualquer trecho que muda o estado do tokenizador
+_ESPECIAL = re.compile(r"--|/\*|(?<![\w$])[eE]'|'|\"|(?<![\w$])\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$|;")
+_FIM_ESCAPE = re.compile(r"\\.|'")
+_COMENTARIO_BLOCO = re.compile(r"/\*|\*/")
+_CODIGO = re.compile(r"\S")
+
+
+class Tokenizador:
+    """Separa comandos SQL de forma incremental; alimentar() recebe linhas e devolve comandos completos"""
+
+    def __init__(self):
+        self.partes = []        # pedaços do comando atual
+        self.tem_codigo = False  # o comando atual tem algo além de comentários/espaços
+        self.estado = None      # None, "'", 'E', '"', '/*' ou a tag '$...$'
+        self.profundidade = 0   # comentários /* */ aninhados (permitido no Postgres)
+
+    def alimentar(self, linha):
+        comandos = []
+        pos = 0
+        n = len(linha)
+        while pos < n:
+            if self.estado is None:
+                m = _ESPECIAL.search(linha, pos)
+                if not m:
+                    self._codigo(linha, pos, n)
+                    break
+                self._codigo(linha, pos, m.start())
+                token = m.group()
+                if token == ';':
+                    self.partes.append(token)
+                    comando = ''.join(self.partes).strip()
+                    if self.tem_codigo:
+                        comandos.append(comando)
+                        self.partes = []
+                        self.tem_codigo = False
+                    else:
+                        # ';' solto depois de comentários: mantém junto do próximo comando
+                        self.partes = [comando + '\n']
+                    pos = m.end()
+                    continue
+                self.partes.append(token)
+                pos = m.end()
+                if token == '--':
+                    self.partes.append(linha[pos:])
+                    break
+                if token == '/*':
+                    self.estado, self.profundidade = '/*', 1
+                    continue
+                self.tem_codigo = True
+                if token == "'":
+                    self.estado = "'"
+                elif token == '"':
+                    self.estado = '"'
+                elif token in ("e'", "E'"):
+                    self.estado = 'E'
+                else:
+                    self.estado = token  # tag do dollar-quoting
+            elif self.estado in ("'", '"'):
+                fim = linha.find(self.estado, pos)
+                # '' e "" dentro da string são aspas escapadas: o próximo caractere reabre a string
+                if fim == -1:
+                    self.partes.append(linha[pos:])
+                    break
+                self.partes.append(linha[pos:fim + 1])
+                pos = fim + 1
+                if linha.startswith(self.estado, pos):
+                    self.partes.append(self.estado)
+                    pos += 1
+                else:
+                    self.estado = None
+            elif self.estado == 'E':
+                m = _FIM_ESCAPE.search(linha, pos)
+                while m and m.group() != "'":
+                    m = _FIM_ESCAPE.search(linha, m.end())
+                if not m:
+                    self.partes.append(linha[pos:])
+                    break
+                self.partes.append(linha[pos:m.end()])
+                pos = m.end()
+                if linha.startswith("'", pos):
+                    self.partes.append("'")
+                    pos += 1
+                else:
+                    self.estado = None
+            elif self.estado == '/*':
+                m = _COMENTARIO_BLOCO.search(linha, pos)
+                if not m:
+                    self.partes.append(linha[pos:])
+                    break
+                self.partes.append(linha[pos:m.end()])
+                pos = m.end()
+                self.profundidade += 1 if m.group() == '/*' else -1
+                if self.profundidade == 0:
+                    self.estado = None
+            else:
+                fim = linha.find(self.estado, pos)
+                if fim == -1:
+                    self.partes.append(linha[pos:])
+                    break
+                self.partes.append(linha[pos:fim + len(self.estado)])
+                pos = fim + len(self.estado)
+                self.estado = None
+        return comandos
+
+    def _codigo(self, linha, inicio, fim):
+        trecho = linha[inicio:fim]
+        if trecho:
+            self.partes.append(trecho)
+            if not self.tem_codigo and _CODIGO.search(trecho):
+                self.tem_codigo = True
+
+    def finalizar(self):
+        """Comando final sem ';' (se tiver código); comentários soltos no fim são descartados"""
+        if self.estado not in (None, '/*'):
+            raise ValueError(f"Arquivo termina dentro de string/dollar-quote ({self.estado})")
+        if self.tem_codigo:
+            return [''.join(self.partes).strip()]
+        return []
+
+
+def comandos_do_arquivo(caminho):
+    """Gera os comandos do arquivo um a um, sem carregá-lo inteiro"""
+    tokenizador = Tokenizador()
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            yield from tokenizador.alimentar(linha)
+    yield from tokenizador.finalizar()
+
+
+def empacotar(comandos, max_bytes, max_comandos=None):
+    """Agrupa comandos consecutivos em partes de até max_bytes (UTF-8) e max_comandos.
+
+    Gera listas de (comando, tamanho). Um comando maior que o limite vai sozinho numa parte.
+    """
+    # Espaço reservado para o cabeçalho de cada parte
+    reservado = len(cabecalho(0, 0, 0).encode('utf-8')) + 32
+    parte = []
+    tamanho = reservado
+    for comando in comandos:
+        # +2: separador '\n\n' entre comandos
+        bytes_comando = len(comando.encode('utf-8')) + 2
+        if parte and (tamanho + bytes_comando > max_bytes or (max_comandos and len(parte) >= max_comandos)):
+            yield parte
+            parte = []
+            tamanho = reservado
+        parte.append((comando, bytes_comando))
+        tamanho += bytes_comando
+    if parte:
+        yield parte
+
+
+def cabecalho(num, inicio, fim):
+    return f"""-- ============================================
+-- POPULAR TABELAS FACT - PARTE {num}
+-- ============================================
+-- Comandos {inicio} a {fim}
+-- Execute esta parte após a Migration 1
+-- Execute as partes na ordem (Parte 1, Parte 2, ...)
+-- ============================================
+
+"""
+
+
+def dividir(caminho, saida, max_bytes, max_comandos=None):
+    """Escreve as partes em saida/<nome>_PARTE_<i>_DE_<n>.sql; devolve [(arquivo, comandos, bytes)]"""
+    os.makedirs(saida, exist_ok=True)
+    prefixo = os.path.splitext(os.path.basename(caminho))[0]
+    # Partes de uma divisão anterior (o total pode mudar)
+    for antigo in glob.glob(os.path.join(saida, f"{prefixo}_PARTE_*.sql")):
+        os.remove(antigo)
+
+    escritas = []
+    total = 0
+    for num, parte in enumerate(empacotar(comandos_do_arquivo(caminho), max_bytes, max_comandos), start=1):
+        temporario = os.path.join(saida, f"{prefixo}_PARTE_{num}.sql.tmp")
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(cabecalho(num, total + 1, total + len(parte)))
+            f.write('\n\n'.join(comando for comando, _ in parte))
+            f.write('\n')
+        total += len(parte)
+        escritas.append((temporario, len(parte), os.path.getsize(temporario)))
+
+    # O total de partes só é conhecido no fim: renomear para o padrão PARTE_i_DE_n
+    resultado = []
+    for num, (temporario, qtd, tamanho) in enumerate(escritas, start=1):
+        final = os.path.join(saida, f"{prefixo}_PARTE_{num}_DE_{len(escritas)}.sql")
+        os.replace(temporario, final)
+        resultado.append((final, qtd, tamanho))
+    return resultado
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Divide uma migration SQL em partes para o SQL Editor')
+    parser.add_argument('migration', nargs='?', default=MIGRATION_PADRAO, help='Arquivo .sql a dividir')
+    parser.add_argument('--saida', default=SAIDA_PADRAO, help='Diretório das partes')
+    parser.add_argument('--max-kb', type=float, default=MAX_KB_PADRAO,
+                        help=f'Tamanho máximo de cada parte em KB (padrão: {MAX_KB_PADRAO})')
+    parser.add_argument('--max-comandos', type=int, default=None, help='Máximo de comandos por parte (opcional)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not os.path.exists(args.migration):
+        print(f"ERRO: arquivo não encontrado: {args.migration}")
+        sys.exit(1)
+
+    max_bytes = int(args.max_kb * 1024)
+    partes = dividir(args.migration, args.saida, max_bytes, args.max_comandos)
+    for num, (arquivo, qtd, tamanho) in enumerate(partes, start=1):
+        aviso = ' (comando maior que o limite)' if qtd == 1 and tamanho > max_bytes else ''
+        print(f"Parte {num}/{len(partes)}: {qtd} comandos ({tamanho / 1024:.1f} KB){aviso} - {os.path.basename(arquivo)}")
+
+    print(f"\nTotal de comandos: {sum(qtd for _, qtd, _ in partes)}")
+    print(f"Arquivos criados em: {args.saida}")
+    print(f"\nExecute as partes na ordem (Parte 1, Parte 2, ...) no SQL Editor")
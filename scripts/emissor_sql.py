@@ -0,0 +1,99 @@
+"""
+Emissão vetorizada de SQL a partir de DataFrames (geradores generate_sql_*.py)
+
+tempo_id, literais (aspas escapadas, NULL) e as tuplas do VALUES são montados como
+colunas de texto inteiras com as operações de string do pandas, sem iterrows nem
+f-string por linha. A migration é escrita em blocos num TextIOWrapper com buffer grande,
+sem acumular o arquivo inteiro numa string.
+"""
+import io
+import string
+
+import pandas as pd
+
+# Buffer do arquivo de saída
+BUFFER_BYTES = 1024 * 1024
+# Linhas formatadas por vez (limita as colunas de texto intermediárias)
+LINHAS_POR_BLOCO = 5000
+
+
+def abrir_saida(caminho):
+    """Arquivo texto UTF-8 para escrita, com buffer de BUFFER_BYTES"""
+    return io.TextIOWrapper(io.BufferedWriter(io.FileIO(caminho, 'w'), BUFFER_BYTES), encoding='utf-8')
+
+
+def tempo_id(df):
+    """ID de dim_tempo (AAAAMM) de todas as linhas"""
+    return df['ano'].astype('int64') * 100 + df['mes'].astype('int64')
+
+
+def texto_limpo(serie):
+    """str(valor).strip() nas células preenchidas; vazias viram None"""
+    valores = serie.astype(object)
+    preenchido = valores.notna()
+    return valores.where(~preenchido, valores.astype(str).str.strip()).where(preenchido, None)
+
+
+def inteiro_sql(serie):
+    return serie.astype('int64').astype(str)
+
+
+def escapar(serie):
+    """Texto com aspas simples duplicadas (sem as aspas externas)"""
+    return serie.astype(str).str.replace("'", "''", regex=False)
+
+
+def texto_sql(serie, vazio_nulo=False):
+    """Literal SQL de texto ('...' com aspas escapadas) ou NULL; vazio_nulo: '' também vira NULL"""
+    serie = serie.astype(object)
+    nulo = serie.isna()
+    if vazio_nulo:
+        nulo |= serie.astype(str) == ''
+    literal = "'" + escapar(serie.where(~nulo, '')) + "'"
+    return literal.astype(object).where(~nulo, 'NULL')
+
+
+def concatenar(*partes):
+    """Concatena, elemento a elemento, textos fixos e colunas de texto (pelo menos uma Series)"""
+    partes = [p.astype(str) if isinstance(p, pd.Series) else p for p in partes]
+    resultado = partes[0]
+    for parte in partes[1:]:
+        resultado = resultado + parte
+    return resultado
+
+
+def preencher(modelo, **colunas):
+    """modelo.format(...) para todas as linhas de uma vez: cada {campo} vem de uma coluna de texto"""
+    partes = []
+    for texto, campo, _, _ in string.Formatter().parse(modelo):
+        if texto:
+            partes.append(texto)
+        if campo is not None:
+            partes.append(colunas[campo])
+    return concatenar(*partes)
+
+
+def tuplas(colunas, prefixo='(', sufixo=')'):
+    """'(a, b, c)' por linha a partir de colunas já formatadas como literais SQL"""
+    primeira, *demais = [c.astype(str) for c in colunas]
+    return prefixo + primeira.str.cat(demais, sep=', ') + sufixo
+
+
+def blocos(df, tamanho=LINHAS_POR_BLOCO):
+    """Fatias consecutivas do DataFrame com até tamanho linhas"""
+    for inicio in range(0, len(df), tamanho):
+        yield df.iloc[inicio:inicio + tamanho]
+
+
+def escrever_linhas(f, df, formatar, tamanho=LINHAS_POR_BLOCO):
+    """Escreve formatar(bloco) (uma Series de texto por linha) para cada bloco do DataFrame"""
+    for bloco in blocos(df, tamanho):
+        f.writelines(formatar(bloco))
+
+
+def escrever_em_lote(f, df, tamanho_lote, formatar, antes, depois, sep=",\n"):
+    """Um comando por lote de linhas: antes + formatar(lote) unidos por sep + depois"""
+    for lote in blocos(df, tamanho_lote):
+        f.write(antes)
+        f.write(sep.join(formatar(lote)))
+        f.write(depois)
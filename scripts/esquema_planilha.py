@@ -0,0 +1,178 @@
+"""
+Mapeamento declarativo das colunas das abas de AFASTAMENTOS (férias)
+
+Cada importador descreve a aba como um MapaColunas: os campos simples (matrícula, ano,
+processo SEI) e os blocos de cada parcela, campo -> (índice da coluna, tipo). O mapa é
+montado uma vez, quando o cabeçalho é encontrado (posições fixas em
+importar_ferias_2026.py, rótulos em importar_ferias_janeiro_2026.py); depois as linhas
+de dados são convertidas em blocos, coluna a coluna, em listas Python:
+
+  cru       valor da célula como veio
+  texto     str(valor).strip() (None se vazia)
+  numero    float (NaN se vazia ou não numérica)
+  data      date (None se vazia ou inválida; datas_planilha, com o ano_base da linha)
+  mes       int (None se não for mês; datas_planilha.mes_planilha)
+  booleano  bool(valor), vazia = False
+
+Blocos com LINHAS_COLUNAR linhas ou mais passam pelas operações de coluna (factorize +
+take: as conversões escalares rodam só sobre os valores distintos). Nos menores, que são
+o caso das abas reais (centenas de linhas) e dos blocos do modo streaming, o custo fixo
+dessas operações é maior que o ganho, e cada célula passa direto pelas funções escalares
+(memoizadas em datas_planilha). As duas formas seguem as mesmas regras.
+"""
+import math
+from collections import namedtuple
+from datetime import date
+from itertools import islice, zip_longest
+
+import numpy as np
+import pandas as pd
+
+from datas_planilha import data_planilha, datas_coluna, fatorar_celulas, mes_planilha, meses_coluna
+
+# Linhas convertidas por vez a partir do DataFrame da aba
+TAMANHO_BLOCO = 10000
+# No modo streaming: só um bloco em memória, e cada bloco chega ao gravador (lotes de 500)
+# antes de a leitura da aba continuar
+TAMANHO_BLOCO_STREAM = 500
+# Blocos a partir deste tamanho usam a conversão por colunas (pandas). Abaixo dele o custo
+# fixo por coluna domina: em abas de 300 linhas a conversão por colunas era 3x mais lenta
+# que a por célula, e as duas só empatam perto de 5-10 mil linhas
+LINHAS_COLUNAR = TAMANHO_BLOCO
+
+_ORDINAL_1970 = date(1970, 1, 1).toordinal()
+
+# campos: {nome: (coluna, tipo)}; parcelas: [(número da parcela, {nome: (coluna, tipo)})]
+# Coluna None = não existe na aba (o campo vem todo vazio)
+MapaColunas = namedtuple('MapaColunas', ['campos', 'parcelas'])
+# Campos convertidos de um bloco: {campo: lista} dos campos simples e [(número, {campo: lista} da parcela)]
+Bloco = namedtuple('Bloco', ['campos', 'parcelas'])
+
+
+def _vazia(valor):
+    return valor is None or (isinstance(valor, float) and math.isnan(valor)) or valor is pd.NaT or valor is pd.NA
+
+
+def mapear_coluna(valores, funcao, dtype=object, por_tipo=True):
+    """funcao aplicada a cada valor distinto da coluna (vazias incluídas, como None).
+
+    por_tipo=False: funcao dá o mesmo resultado para 1, 1.0 e True (pd.factorize direto).
+    """
+    serie = pd.Series(valores, dtype=object)
+    if por_tipo:
+        codigos, unicos = fatorar_celulas(serie.to_numpy())
+    else:
+        codigos, unicos = pd.factorize(serie.to_numpy(), use_na_sentinel=True)
+    # Último elemento: resultado para as vazias (código -1)
+    tabela = np.array([funcao(v) for v in unicos] + [funcao(None)], dtype=dtype)
+    return pd.Series(tabela[codigos], index=serie.index, name=serie.name, dtype=dtype)
+
+
+def mapear_lista(valores, funcao, por_tipo=True):
+    """Lista com funcao aplicada a cada célula (vazias como None); blocos grandes via mapear_coluna"""
+    if len(valores) < LINHAS_COLUNAR:
+        return [funcao(None if _vazia(v) else v) for v in valores]
+    return mapear_coluna(valores, funcao, por_tipo=por_tipo).tolist()
+
+
+def _texto(valor):
+    return None if _vazia(valor) else str(valor).strip()
+
+
+def _booleano(valor):
+    return False if _vazia(valor) else bool(valor)
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def converter(valores, tipo, ano_base=None):
+    """Coluna convertida para o tipo do mapa com operações de coluna (Series; datas em datetime64)"""
+    if tipo == 'cru':
+        return pd.Series(valores, dtype=object)
+    if tipo == 'texto':
+        return mapear_coluna(valores, _texto)
+    if tipo == 'numero':
+        return mapear_coluna(valores, _numero, dtype=float, por_tipo=False)
+    if tipo == 'data':
+        return datas_coluna(valores, ano_base)
+    if tipo == 'mes':
+        return meses_coluna(valores)
+    if tipo == 'booleano':
+        return mapear_coluna(valores, _booleano, dtype=bool, por_tipo=False)
+    raise ValueError(f"Tipo de coluna desconhecido: {tipo}")
+
+
+# Conversão de uma célula, pelas mesmas regras de converter ('cru' e 'data' à parte em converter_lista)
+_CONVERSOES_CELULA = {
+    'texto': _texto,
+    'numero': _numero,
+    'mes': mes_planilha,
+    'booleano': _booleano,
+}
+
+
+def _datas(serie):
+    """Lista de date (None para NaT) de uma Series datetime64"""
+    dias = serie.to_numpy(dtype='datetime64[D]')
+    nat = np.isnat(dias).tolist()
+    ordinais = (dias.view(np.int64) + _ORDINAL_1970).tolist()
+    return [None if vazia else date.fromordinal(o) for vazia, o in zip(nat, ordinais)]
+
+
+def converter_lista(valores, tipo, ano_base=None):
+    """Lista Python da coluna convertida; ano_base: escalar ou um por célula"""
+    if len(valores) < LINHAS_COLUNAR:
+        if tipo == 'cru':
+            return list(valores)
+        if tipo == 'data':
+            if np.ndim(ano_base):
+                return [data_planilha(v, ano) for v, ano in zip(valores, ano_base)]
+            return [data_planilha(v, ano_base) for v in valores]
+        if tipo not in _CONVERSOES_CELULA:
+            raise ValueError(f"Tipo de coluna desconhecido: {tipo}")
+        return list(map(_CONVERSOES_CELULA[tipo], valores))
+    coluna = converter(valores, tipo, ano_base)
+    if tipo == 'data':
+        return _datas(coluna)
+    if tipo == 'mes':
+        return coluna.astype(object).where(coluna.notna(), None).tolist()
+    return coluna.tolist()
+
+
+def _colunas(linhas):
+    """Função índice -> células da coluna, com o bloco transposto uma única vez (linhas curtas: None)"""
+    transposta = list(zip_longest(*linhas))
+    vazia = (None,) * len(linhas)
+    return lambda indice: transposta[indice] if indice is not None and indice < len(transposta) else vazia
+
+
+def extrair_bloco(linhas, mapa, ano_base=None):
+    """Bloco com os campos e as parcelas de um lote de linhas, já tipados ({campo: lista}).
+
+    ano_base: ano das datas sem ano ('DD/MM', 'JAN'); escalar ou função que recebe os
+    campos simples convertidos e devolve um ano por linha.
+    """
+    coluna = _colunas(linhas)
+    campos = {nome: converter_lista(coluna(indice), tipo) for nome, (indice, tipo) in mapa.campos.items()}
+    anos = ano_base(campos) if callable(ano_base) else ano_base
+    parcelas = [
+        (num, {nome: converter_lista(coluna(indice), tipo, anos) for nome, (indice, tipo) in colunas.items()})
+        for num, colunas in mapa.parcelas
+    ]
+    return Bloco(campos, parcelas)
+
+
+def em_blocos(linhas, tamanho=TAMANHO_BLOCO):
+    """(índices, linhas) em blocos de até tamanho; linhas: iterável de (índice, linha)"""
+    linhas = iter(linhas)
+    while True:
+        bloco = list(islice(linhas, tamanho))
+        if not bloco:
+            return
+        indices, conteudo = zip(*bloco)
+        yield list(indices), list(conteudo)
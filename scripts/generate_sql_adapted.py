@@ -1,11 +1,20 @@
 """
 Script para gerar SQL adaptado da estrutura melhor do arquivo fornecido
 Usa dim_tempo (ID composto AAAAMM), dim_indicador_bpma e fact_* ao invés de fat_*
+
+Naturezas diferentes com o mesmo slug viram um só indicador (ConflitosDataFrame); as
+colisões vão para data/processed/colisoes_dim_indicador_bpma.json.
 """
 import pandas as pd
 import os
 from datetime import datetime
 
+from classificador_indicadores import categoria_indicador
+from dados_processados import caminho_tabela, ler_tabela, origem_linhas
+from emissor_sql import abrir_saida, escapar, preencher
+from indice_conflitos import ConflitosDataFrame, salvar_relatorio
+from normalizacao import criar_id_slug
+
 # Caminhos
 base_dir = os.path.dirname(os.path.dirname(__file__))
 data_dir = os.path.join(base_dir, 'data', 'processed')
@@ -14,8 +23,10 @@ output_dir = os.path.join(base_dir, 'supabase', 'migrations')
 os.makedirs(output_dir, exist_ok=True)
 
 # Ler dados processados
-df_atendimentos = pd.read_csv(os.path.join(data_dir, 'atendimentos.csv'))
-df_resgates = pd.read_csv(os.path.join(data_dir, 'resgates.csv'))
+caminho_atendimentos = caminho_tabela('atendimentos', data_dir)
+caminho_resgates = caminho_tabela('resgates', data_dir)
+df_atendimentos = ler_tabela('atendimentos', caminho=caminho_atendimentos)
+df_resgates = ler_tabela('resgates', caminho=caminho_resgates)
 
 # Gerar timestamp
 timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
@@ -100,77 +111,24 @@ sql_content += "\nON CONFLICT (id) DO NOTHING;\n\n"
 sql_content += "-- Popular dim_indicador_bpma\n"
 sql_content += "INSERT INTO public.dim_indicador_bpma (id, nome, categoria) VALUES\n"
 
-# Função para criar ID slug
-def criar_id_slug(nome):
-    """Cria ID slug a partir do nome"""
-    import re
-    # Remove acentos e caracteres especiais
-    slug = nome.lower()
-    slug = re.sub(r'[àáâãäå]', 'a', slug)
-    slug = re.sub(r'[èéêë]', 'e', slug)
-    slug = re.sub(r'[ìíîï]', 'i', slug)
-    slug = re.sub(r'[òóôõö]', 'o', slug)
-    slug = re.sub(r'[ùúûü]', 'u', slug)
-    slug = re.sub(r'[ç]', 'c', slug)
-    slug = re.sub(r'[ñ]', 'n', slug)
-    slug = re.sub(r'[^a-z0-9\s]', '', slug)
-    slug = re.sub(r'\s+', '_', slug)
-    slug = slug.strip('_')
-    return slug
-
-# Categorizar indicadores
-categorias = {
-    'atendimentos': ['Atendimentos registrados', 'Atendimentos registrados (RAP)'],
-    'ocorrencias_ambientais': [
-        'Termos Circunstanciados de Ocorrência - PMDF',
-        'Termos Circunstanciados - OUTRAS',
-        'Em apuração',
-        'Flagrantes',
-        'P.A.A.I.',
-        'Apreensão de arma de fogo e/ou munição',
-        'Crime contra as Áreas de Proteção Permanente',
-        'Crimes contra as Unidades de Conservação',
-        'Crime contra o Licenciamento Ambiental',
-        'Crime contra os Recursos Hídricos',
-        'Crime contra os Recursos Pesqueiros',
-        'Crimes contra a Administração Ambiental',
-        'Crimes contra a Fauna',
-        'Crimes contra a Flora',
-        'Outros Crimes Ambientais',
-        'Parcelamento Irregular do Solo'
-    ],
-    'resgate_fauna_total': [
-        'QUANTIDADE DE RESGATE',
-        'QUANTIDADE DE SOLTURA',
-        'QUANTIDADE DE ÓBITOS',
-        'QUANTIDADE DE FERIDOS',
-        'QUANTIDADE DE FILHOTES',
-        'QUANTIDADE DE ATROPELAMENTO'
-    ],
-    'outros': [
-        'Captura de animais / Busca de Animais / Recolhimento e Remoção de Animais / Remoção de Animais',
-        'Corte de Árvores'
-    ]
-}
-
-indicadores_values = []
-tipos_processados = set()
-
-for _, row in df_atendimentos.iterrows():
-    natureza = str(row['natureza']).strip()
-    if natureza and natureza not in tipos_processados:
-        tipos_processados.add(natureza)
-        
-        # Determinar categoria
-        categoria = 'outros'
-        for cat, tipos in categorias.items():
-            if any(tipo.lower() in natureza.lower() or natureza.lower() in tipo.lower() for tipo in tipos):
-                categoria = cat
-                break
-        
-        id_slug = criar_id_slug(natureza)
-        nome_clean = natureza.replace("'", "''")
-        indicadores_values.append(f"('{id_slug}','{nome_clean}','{categoria}')")
+# Primeira ocorrência de cada natureza (categoria: classificador_indicadores.py)
+naturezas = df_atendimentos['natureza'].map(str).str.strip()
+tipos_processados = naturezas[naturezas.ne('') & ~naturezas.duplicated()]
+
+# Slug repetido: nome/categoria da última natureza, como no DO UPDATE sequencial
+indice_indicadores = ConflitosDataFrame(
+    pd.DataFrame({
+        'id': tipos_processados.map(criar_id_slug),
+        'nome': tipos_processados,
+        'categoria': tipos_processados.map(categoria_indicador),
+    }),
+    'dim_indicador_bpma', ('id',), ('nome', 'categoria'),
+    origem=origem_linhas(df_atendimentos, caminho_atendimentos)[tipos_processados.index],
+)
+
+indicadores = indice_indicadores.df
+indicadores_values = preencher("('{id}','{nome}','{categoria}')", id=indicadores['id'],
+                               nome=escapar(indicadores['nome']), categoria=indicadores['categoria'])
 
 sql_content += ",\n".join(indicadores_values)
 sql_content += "\nON CONFLICT (id) DO UPDATE SET nome=EXCLUDED.nome, categoria=EXCLUDED.categoria;\n\n"
@@ -212,10 +170,13 @@ CREATE INDEX IF NOT EXISTS idx_fact_resgate_especie
 
 # Salvar migration
 migration_path = os.path.join(output_dir, migration_name)
-with open(migration_path, 'w', encoding='utf-8') as f:
+with abrir_saida(migration_path) as f:
     f.write(sql_content)
 
 print(f"Migration criada: {migration_path}")
-print(f"Tamanho: {len(sql_content)} caracteres")
+print(f"Tamanho: {os.path.getsize(migration_path)} bytes")
 print(f"Indicadores únicos: {len(tipos_processados)}")
 
+relatorio_path = salvar_relatorio(os.path.join(data_dir, 'colisoes_dim_indicador_bpma.json'), [indice_indicadores])
+print(f"Slugs repetidos: {len(indice_indicadores.colisoes())} (relatório: {relatorio_path})")
+
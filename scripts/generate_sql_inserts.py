@@ -1,48 +1,86 @@
 """
 Script para gerar INSERTs SQL para popular as tabelas fat com dados processados
 Usa as tabelas de referência dim_especies_fauna e dim_regiao_administrativa
+
+Por padrão gera um INSERT ... SELECT FROM (VALUES ...) por lote de linhas, com JOIN
+nas dimensões (dim_ano, dim_mes, dim_tipo_atendimento, ...), em vez de um INSERT com
+subconsultas por linha do CSV. Use --por-linha para o formato antigo.
+
+Linhas repetidas do CSV (mesmos valores que formam a chave do ON CONFLICT) são
+unificadas na geração (ConflitosDataFrame) e listadas num relatório JSON (--relatorio).
+Os literais e as tuplas são formatados por coluna e escritos em blocos (emissor_sql.py).
 """
+import argparse
 import pandas as pd
 import os
 from datetime import datetime
 
-# Caminhos
-base_dir = os.path.dirname(os.path.dirname(__file__))
-data_dir = os.path.join(base_dir, 'data', 'processed')
-output_dir = os.path.join(base_dir, 'supabase', 'migrations')
+from dados_processados import caminho_tabela, ler_tabela, origem_linhas
+from emissor_sql import (abrir_saida, escapar, escrever_em_lote, escrever_linhas, inteiro_sql,
+                         preencher, texto_limpo, texto_sql, tuplas)
+from indice_conflitos import ConflitosDataFrame, salvar_relatorio
 
-os.makedirs(output_dir, exist_ok=True)
+# Linhas do CSV por INSERT no modo em lote
+TAMANHO_LOTE = 1000
 
-# Ler dados processados
-df_atendimentos = pd.read_csv(os.path.join(data_dir, 'atendimentos.csv'))
-df_resgates = pd.read_csv(os.path.join(data_dir, 'resgates.csv'))
 
-# Gerar timestamp
-timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-migration_name = f"{timestamp}_popular_tabelas_estatisticas_bpma.sql"
+def parse_args():
+    parser = argparse.ArgumentParser(description='Gera a migration que popula fat_atendimentos/fat_resgates_estatisticas')
+    parser.add_argument('--por-linha', action='store_true',
+                        help='Um INSERT com subconsultas por linha (formato antigo)')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE,
+                        help=f'Linhas por INSERT no modo em lote (padrão: {TAMANHO_LOTE})')
+    parser.add_argument('--relatorio', default=None,
+                        help='Relatório JSON das chaves repetidas (padrão: data/processed/colisoes_estatisticas_bpma.json)')
+    return parser.parse_args()
 
-sql_content = f"""-- ============================================
--- POPULAR TABELAS FAT COM DADOS DE ESTATÍSTICAS BPMA
--- ============================================
--- Dados extraídos de: Resumos Estatísticas 2025 a 2020.xlsx
--- Gerado em: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
--- ============================================
 
--- 1. POPULAR fat_atendimentos_estatisticas
--- ============================================
+def _preenchido(serie):
+    return serie.notna() & serie.ne('')
 
-"""
 
-# Processar atendimentos
-print("Processando atendimentos...")
-atendimentos_sql = []
-for _, row in df_atendimentos.iterrows():
-    ano = int(row['ano'])
-    mes = int(row['mes'])
-    natureza = str(row['natureza']).strip().replace("'", "''")
-    quantidade = int(row['quantidade'])
-    
-    sql = f"""INSERT INTO public.fat_atendimentos_estatisticas (ano_id, mes_id, tipo_atendimento_id, quantidade)
+def _numerar(df):
+    """Coluna n (1, 2, ...) na ordem do CSV, usada no VALUES do modo em lote"""
+    return df.assign(n=range(1, len(df) + 1))
+
+
+def indice_atendimentos(df, caminho):
+    """Linhas do CSV de atendimentos por (ano, mes, natureza), a chave de dim_ano/dim_mes/dim_tipo_atendimento"""
+    linhas = pd.DataFrame({
+        'ano': df['ano'].astype('int64'),
+        'mes': df['mes'].astype('int64'),
+        'natureza': df['natureza'].map(str).str.strip(),
+        'quantidade': df['quantidade'].astype('int64'),
+    })
+    return ConflitosDataFrame(linhas, 'fat_atendimentos_estatisticas', ('ano', 'mes', 'natureza'), ('quantidade',),
+                              origem=origem_linhas(df, caminho))
+
+
+def indice_resgates(df, caminho):
+    """Linhas do CSV de resgates; ignora linhas sem nome_popular.
+
+    A chave real (especie_id) só é resolvida no banco: aqui colidem as linhas com os mesmos
+    ano/mês/tipo e nomes, que sempre resolvem para a mesma espécie. O DO UPDATE só altera
+    a quantidade, então nomes/ordem ficam os da primeira linha.
+    """
+    nome_popular = texto_limpo(df['nome_popular'])
+    validas = _preenchido(nome_popular)
+    df = df[validas]
+    linhas = pd.DataFrame({
+        'ano': df['ano'].astype('int64'),
+        'mes': df['mes'].astype('int64'),
+        'tipo_fauna': texto_limpo(df['tipo_fauna']),
+        'nome_popular': nome_popular[validas],
+        'nome_cientifico': texto_limpo(df['nome_cientifico']),
+        'ordem': texto_limpo(df['ordem']),
+        'quantidade': df['quantidade'].astype('int64'),
+    })
+    return ConflitosDataFrame(linhas, 'fat_resgates_estatisticas',
+                              ('ano', 'mes', 'tipo_fauna', 'nome_popular', 'nome_cientifico'), ('quantidade',),
+                              origem=origem_linhas(df, caminho))
+
+
+SQL_ATENDIMENTO_POR_LINHA = """INSERT INTO public.fat_atendimentos_estatisticas (ano_id, mes_id, tipo_atendimento_id, quantidade)
 SELECT 
     (SELECT id FROM public.dim_ano WHERE ano = {ano}),
     (SELECT id FROM public.dim_mes WHERE mes = {mes}),
@@ -52,91 +90,237 @@ ON CONFLICT (ano_id, mes_id, tipo_atendimento_id)
 DO UPDATE SET quantidade = EXCLUDED.quantidade;
 
 """
-    atendimentos_sql.append(sql)
 
-sql_content += "".join(atendimentos_sql)
 
-sql_content += """
--- 2. POPULAR fat_resgates_estatisticas
--- ============================================
--- Nota: Faz match com dim_especies_fauna usando nome_cientifico ou nome_popular
--- Se não encontrar match, insere com especie_id NULL mas mantém nome_popular e nome_cientifico
+def escrever_atendimentos_por_linha(f, linhas):
+    escrever_linhas(f, linhas, lambda bloco: preencher(
+        SQL_ATENDIMENTO_POR_LINHA, ano=inteiro_sql(bloco['ano']), mes=inteiro_sql(bloco['mes']),
+        natureza=escapar(bloco['natureza']), quantidade=inteiro_sql(bloco['quantidade'])))
 
+
+# LEFT JOIN mantém o comportamento das subconsultas (id NULL quando a dimensão não existe).
+# As linhas já chegam sem repetição de (ano, mes, natureza); a janela cobre ids repetidos
+# vindos de valores diferentes (ex.: dimensão com nomes duplicados): fica a última linha,
+# como nos INSERTs sequenciais (ON CONFLICT DO UPDATE não pode atualizar a mesma linha
+# duas vezes no mesmo comando).
+SQL_ATENDIMENTOS_LOTE_INICIO = """WITH v (n, ano, mes, natureza, quantidade) AS (
+  VALUES
 """
+SQL_ATENDIMENTOS_LOTE_FIM = """
+),
+linhas AS (
+  SELECT a.id AS ano_id, m.id AS mes_id, t.id AS tipo_atendimento_id, v.quantidade,
+         ROW_NUMBER() OVER (
+           PARTITION BY a.id, m.id, t.id,
+                        CASE WHEN a.id IS NULL OR m.id IS NULL OR t.id IS NULL THEN v.n END
+           ORDER BY v.n DESC
+         ) AS rn
+  FROM v
+  LEFT JOIN public.dim_ano a ON a.ano = v.ano
+  LEFT JOIN public.dim_mes m ON m.mes = v.mes
+  LEFT JOIN public.dim_tipo_atendimento t ON t.nome = v.natureza
+)
+INSERT INTO public.fat_atendimentos_estatisticas (ano_id, mes_id, tipo_atendimento_id, quantidade)
+SELECT ano_id, mes_id, tipo_atendimento_id, quantidade
+FROM linhas
+WHERE rn = 1
+ON CONFLICT (ano_id, mes_id, tipo_atendimento_id)
+DO UPDATE SET quantidade = EXCLUDED.quantidade;
 
-# Processar resgates
-print("Processando resgates...")
-resgates_sql = []
-resgates_processed = 0
-
-for _, row in df_resgates.iterrows():
-    ano = int(row['ano'])
-    mes = int(row['mes'])
-    tipo_fauna = str(row['tipo_fauna']).strip() if pd.notna(row['tipo_fauna']) else None
-    nome_popular = str(row['nome_popular']).strip().replace("'", "''") if pd.notna(row['nome_popular']) else None
-    nome_cientifico = str(row['nome_cientifico']).strip().replace("'", "''") if pd.notna(row['nome_cientifico']) else None
-    ordem = str(row['ordem']).strip().replace("'", "''") if pd.notna(row['ordem']) else None
-    quantidade = int(row['quantidade'])
-    
-    if not nome_popular or nome_popular == '':
-        continue
+"""
+
+
+def escrever_atendimentos_em_lote(f, linhas, tamanho_lote):
+    escrever_em_lote(f, _numerar(linhas), tamanho_lote, lambda lote: tuplas(
+        [lote['n'], lote['ano'], lote['mes'], texto_sql(lote['natureza']), lote['quantidade']], prefixo='    ('),
+        SQL_ATENDIMENTOS_LOTE_INICIO, SQL_ATENDIMENTOS_LOTE_FIM)
+
+
+SQL_RESGATE_POR_LINHA = """INSERT INTO public.fat_resgates_estatisticas (
+    ano_id, mes_id, tipo_fauna_id, especie_id, 
+    nome_popular, nome_cientifico, ordem_taxonomica, quantidade
+)
+SELECT 
+    (SELECT id FROM public.dim_ano WHERE ano = {ano}),
+    (SELECT id FROM public.dim_mes WHERE mes = {mes}),
+    {tipo_fauna},
     
-    # Construir match com dim_especies_fauna
-    # Tentar primeiro por nome_cientifico, depois por nome_popular
-    match_especie = f"""
     COALESCE(
         (SELECT id FROM public.dim_especies_fauna 
-         WHERE LOWER(TRIM(nome_cientifico)) = LOWER(TRIM('{nome_cientifico if nome_cientifico else ''}'))
+         WHERE LOWER(TRIM(nome_cientifico)) = LOWER(TRIM('{busca_cientifico}'))
          LIMIT 1),
         (SELECT id FROM public.dim_especies_fauna 
-         WHERE LOWER(TRIM(nome_popular)) = LOWER(TRIM('{nome_popular}'))
+         WHERE LOWER(TRIM(nome_popular)) = LOWER(TRIM('{busca_popular}'))
          LIMIT 1),
         NULL
-    )"""
-    
-    nome_popular_sql = f"'{nome_popular}'" if nome_popular else "NULL"
-    nome_cientifico_sql = f"'{nome_cientifico}'" if nome_cientifico else "NULL"
-    ordem_sql = f"'{ordem}'" if ordem else "NULL"
-    tipo_fauna_sql = f"(SELECT id FROM public.dim_tipo_fauna_estatistica WHERE nome = '{tipo_fauna}')" if tipo_fauna else "NULL"
-    
-    sql = f"""INSERT INTO public.fat_resgates_estatisticas (
-    ano_id, mes_id, tipo_fauna_id, especie_id, 
-    nome_popular, nome_cientifico, ordem_taxonomica, quantidade
-)
-SELECT 
-    (SELECT id FROM public.dim_ano WHERE ano = {ano}),
-    (SELECT id FROM public.dim_mes WHERE mes = {mes}),
-    {tipo_fauna_sql},
-    {match_especie},
-    {nome_popular_sql},
-    {nome_cientifico_sql},
-    {ordem_sql},
+    ),
+    {nome_popular},
+    {nome_cientifico},
+    {ordem},
     {quantidade}
 ON CONFLICT (ano_id, mes_id, especie_id, tipo_fauna_id) 
 DO UPDATE SET quantidade = EXCLUDED.quantidade;
 
 """
-    resgates_sql.append(sql)
-    resgates_processed += 1
 
-sql_content += "".join(resgates_sql)
 
-sql_content += f"""
+def _sql_resgates_por_linha(bloco):
+    # Espécie: primeiro por nome_cientifico, depois por nome_popular
+    tipo_fauna = bloco['tipo_fauna']
+    tipo_fauna_sql = "(SELECT id FROM public.dim_tipo_fauna_estatistica WHERE nome = '" + escapar(tipo_fauna) + "')"
+    return preencher(
+        SQL_RESGATE_POR_LINHA,
+        ano=inteiro_sql(bloco['ano']),
+        mes=inteiro_sql(bloco['mes']),
+        tipo_fauna=tipo_fauna_sql.where(_preenchido(tipo_fauna), 'NULL'),
+        busca_cientifico=escapar(bloco['nome_cientifico'].fillna('')),
+        busca_popular=escapar(bloco['nome_popular']),
+        nome_popular=texto_sql(bloco['nome_popular']),
+        nome_cientifico=texto_sql(bloco['nome_cientifico'], vazio_nulo=True),
+        ordem=texto_sql(bloco['ordem'], vazio_nulo=True),
+        quantidade=inteiro_sql(bloco['quantidade']),
+    )
+
+
+def escrever_resgates_por_linha(f, linhas):
+    escrever_linhas(f, linhas, _sql_resgates_por_linha)
+
+
+# Espécie: primeiro por nome_cientifico, depois por nome_popular (LOWER/TRIM), uma por chave
+# como o LIMIT 1 das subconsultas. Sem nome_cientifico, compara com '' como antes.
+# Nomes diferentes que resolvem para a mesma espécie repetem a chave no lote: nomes/ordem
+# da primeira linha (o DO UPDATE só altera a quantidade) e quantidade da última.
+SQL_RESGATES_LOTE_INICIO = """WITH v (n, ano, mes, tipo_fauna, nome_popular, nome_cientifico, ordem, quantidade) AS (
+  VALUES
+"""
+SQL_RESGATES_LOTE_FIM = """
+),
+especie_cientifico AS (
+  SELECT DISTINCT ON (LOWER(TRIM(nome_cientifico))) LOWER(TRIM(nome_cientifico)) AS chave, id
+  FROM public.dim_especies_fauna
+),
+especie_popular AS (
+  SELECT DISTINCT ON (LOWER(TRIM(nome_popular))) LOWER(TRIM(nome_popular)) AS chave, id
+  FROM public.dim_especies_fauna
+),
+linhas AS (
+  SELECT a.id AS ano_id, m.id AS mes_id, tf.id AS tipo_fauna_id, COALESCE(ec.id, ep.id) AS especie_id,
+         v.nome_popular, v.nome_cientifico, v.ordem AS ordem_taxonomica, v.quantidade, v.n
+  FROM v
+  LEFT JOIN public.dim_ano a ON a.ano = v.ano
+  LEFT JOIN public.dim_mes m ON m.mes = v.mes
+  LEFT JOIN public.dim_tipo_fauna_estatistica tf ON tf.nome = v.tipo_fauna
+  LEFT JOIN especie_cientifico ec ON ec.chave = LOWER(TRIM(COALESCE(v.nome_cientifico, '')))
+  LEFT JOIN especie_popular ep ON ep.chave = LOWER(TRIM(v.nome_popular))
+),
+numeradas AS (
+  SELECT ano_id, mes_id, tipo_fauna_id, especie_id, quantidade,
+         FIRST_VALUE(nome_popular) OVER chave AS nome_popular,
+         FIRST_VALUE(nome_cientifico) OVER chave AS nome_cientifico,
+         FIRST_VALUE(ordem_taxonomica) OVER chave AS ordem_taxonomica,
+         ROW_NUMBER() OVER (chave_grupo ORDER BY n DESC) AS rn
+  FROM linhas
+  -- Chave com NULL nunca conflita: cada linha forma o próprio grupo
+  WINDOW chave_grupo AS (PARTITION BY ano_id, mes_id, especie_id, tipo_fauna_id,
+                         CASE WHEN ano_id IS NULL OR mes_id IS NULL OR especie_id IS NULL OR tipo_fauna_id IS NULL THEN n END),
+         chave AS (chave_grupo ORDER BY n)
+)
+INSERT INTO public.fat_resgates_estatisticas (
+    ano_id, mes_id, tipo_fauna_id, especie_id,
+    nome_popular, nome_cientifico, ordem_taxonomica, quantidade
+)
+SELECT ano_id, mes_id, tipo_fauna_id, especie_id, nome_popular, nome_cientifico, ordem_taxonomica, quantidade
+FROM numeradas
+WHERE rn = 1
+ON CONFLICT (ano_id, mes_id, especie_id, tipo_fauna_id)
+DO UPDATE SET quantidade = EXCLUDED.quantidade;
+
+"""
+
+
+def escrever_resgates_em_lote(f, linhas, tamanho_lote):
+    escrever_em_lote(f, _numerar(linhas), tamanho_lote, lambda lote: tuplas(
+        [lote['n'], lote['ano'], lote['mes']] +
+        [texto_sql(lote[c]) for c in ('tipo_fauna', 'nome_popular', 'nome_cientifico', 'ordem')] +
+        [lote['quantidade']], prefixo='    ('),
+        SQL_RESGATES_LOTE_INICIO, SQL_RESGATES_LOTE_FIM)
+
+
+args = parse_args()
+
+# Caminhos
+base_dir = os.path.dirname(os.path.dirname(__file__))
+data_dir = os.path.join(base_dir, 'data', 'processed')
+output_dir = os.path.join(base_dir, 'supabase', 'migrations')
+
+os.makedirs(output_dir, exist_ok=True)
+
+# Ler dados processados
+caminho_atendimentos = caminho_tabela('atendimentos', data_dir)
+caminho_resgates = caminho_tabela('resgates', data_dir)
+df_atendimentos = ler_tabela('atendimentos', caminho=caminho_atendimentos)
+df_resgates = ler_tabela('resgates', caminho=caminho_resgates)
+
+# Gerar timestamp
+timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+migration_name = f"{timestamp}_popular_tabelas_estatisticas_bpma.sql"
+
+# Processar atendimentos
+print("Processando atendimentos...")
+indice_atend = indice_atendimentos(df_atendimentos, caminho_atendimentos)
+
+# Processar resgates
+print("Processando resgates...")
+indice_resg = indice_resgates(df_resgates, caminho_resgates)
+resgates_processed = indice_resg.entradas
+
+# Salvar migration
+migration_path = os.path.join(output_dir, migration_name)
+with abrir_saida(migration_path) as f:
+    f.write(f"""-- ============================================
+-- POPULAR TABELAS FAT COM DADOS DE ESTATÍSTICAS BPMA
+-- ============================================
+-- Dados extraídos de: Resumos Estatísticas 2025 a 2020.xlsx
+-- Gerado em: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+-- ============================================
+
+-- 1. POPULAR fat_atendimentos_estatisticas
+-- ============================================
+
+""")
+    if args.por_linha:
+        escrever_atendimentos_por_linha(f, indice_atend.df)
+    else:
+        escrever_atendimentos_em_lote(f, indice_atend.df, args.lote)
+
+    f.write("""
+-- 2. POPULAR fat_resgates_estatisticas
+-- ============================================
+-- Nota: Faz match com dim_especies_fauna usando nome_cientifico ou nome_popular
+-- Se não encontrar match, insere com especie_id NULL mas mantém nome_popular e nome_cientifico
+
+""")
+    if args.por_linha:
+        escrever_resgates_por_linha(f, indice_resg.df)
+    else:
+        escrever_resgates_em_lote(f, indice_resg.df, args.lote)
+
+    f.write(f"""
 -- ============================================
 -- RESUMO
 -- ============================================
 -- Atendimentos processados: {len(df_atendimentos)}
 -- Resgates processados: {resgates_processed}
 -- ============================================
-"""
-
-# Salvar migration
-migration_path = os.path.join(output_dir, migration_name)
-with open(migration_path, 'w', encoding='utf-8') as f:
-    f.write(sql_content)
+""")
 
 print(f"\nMigration criada: {migration_path}")
-print(f"Tamanho: {len(sql_content)} caracteres")
+print(f"Tamanho: {os.path.getsize(migration_path)} bytes")
 print(f"Atendimentos: {len(df_atendimentos)}")
 print(f"Resgates: {resgates_processed}")
 
+relatorio_path = args.relatorio or os.path.join(data_dir, 'colisoes_estatisticas_bpma.json')
+salvar_relatorio(relatorio_path, [indice_atend, indice_resg])
+print(f"\nChaves repetidas: {len(indice_atend.colisoes())} em fat_atendimentos_estatisticas, "
+      f"{len(indice_resg.colisoes())} em fat_resgates_estatisticas")
+print(f"Relatório de colisões: {relatorio_path}")
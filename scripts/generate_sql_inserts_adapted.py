@@ -1,101 +1,71 @@
 """
 Script para gerar INSERTs SQL usando a estrutura adaptada (dim_tempo, fact_*)
+
+Resgates: por padrão, cada lote de linhas vira um INSERT ... SELECT a partir de um
+VALUES, e o id_especie_fauna é resolvido com um único JOIN contra dim_especies_fauna
+normalizada (LOWER/TRIM) em vez de duas subconsultas por linha. Use --por-linha para
+o formato antigo.
+
+Linhas com a mesma chave de ON CONFLICT são unificadas na geração (ConflitosDataFrame) e
+as colisões vão para um relatório JSON (--relatorio). O SQL é formatado por coluna e
+escrito em blocos (emissor_sql.py).
 """
+import argparse
 import pandas as pd
 import os
 from datetime import datetime
 
+from dados_processados import caminho_tabela, ler_tabela, origem_linhas
+from emissor_sql import (abrir_saida, escapar, escrever_em_lote, escrever_linhas, inteiro_sql,
+                         preencher, tempo_id, texto_limpo)
+from indice_conflitos import ConflitosDataFrame, salvar_relatorio
+from normalizacao import criar_id_slug
+
+# Linhas de resgates por INSERT no modo em lote
+TAMANHO_LOTE = 1000
+
+parser = argparse.ArgumentParser(description='Gera a migration que popula as tabelas fact_* (estrutura adaptada)')
+parser.add_argument('--por-linha', action='store_true',
+                    help='Resgates com um INSERT e subconsultas de espécie por linha (formato antigo)')
+parser.add_argument('--lote', type=int, default=TAMANHO_LOTE,
+                    help=f'Linhas de resgates por INSERT no modo em lote (padrão: {TAMANHO_LOTE})')
+parser.add_argument('--relatorio', default=None,
+                    help='Relatório JSON das chaves repetidas (padrão: data/processed/colisoes_estatisticas_bpma_adaptado.json)')
+args = parser.parse_args()
+
 # Caminhos
 base_dir = os.path.dirname(os.path.dirname(__file__))
 data_dir = os.path.join(base_dir, 'data', 'processed')
+relatorio_path = args.relatorio or os.path.join(data_dir, 'colisoes_estatisticas_bpma_adaptado.json')
 output_dir = os.path.join(base_dir, 'supabase', 'migrations')
 
 os.makedirs(output_dir, exist_ok=True)
 
 # Ler dados processados
-df_atendimentos = pd.read_csv(os.path.join(data_dir, 'atendimentos.csv'))
-df_resgates = pd.read_csv(os.path.join(data_dir, 'resgates.csv'))
-
-# Função para criar ID slug
-def criar_id_slug(nome):
-    """Cria ID slug a partir do nome"""
-    import re
-    slug = nome.lower()
-    slug = re.sub(r'[àáâãäå]', 'a', slug)
-    slug = re.sub(r'[èéêë]', 'e', slug)
-    slug = re.sub(r'[ìíîï]', 'i', slug)
-    slug = re.sub(r'[òóôõö]', 'o', slug)
-    slug = re.sub(r'[ùúûü]', 'u', slug)
-    slug = re.sub(r'[ç]', 'c', slug)
-    slug = re.sub(r'[ñ]', 'n', slug)
-    slug = re.sub(r'[^a-z0-9\s]', '', slug)
-    slug = re.sub(r'\s+', '_', slug)
-    slug = slug.strip('_')
-    return slug
+caminho_atendimentos = caminho_tabela('atendimentos', data_dir)
+caminho_resgates = caminho_tabela('resgates', data_dir)
+df_atendimentos = ler_tabela('atendimentos', caminho=caminho_atendimentos)
+df_resgates = ler_tabela('resgates', caminho=caminho_resgates)
 
 # Gerar timestamp
 timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
 migration_name = f"{timestamp}_popular_tabelas_estatisticas_bpma_adaptado.sql"
 
-sql_content = f"""-- ============================================
--- POPULAR TABELAS FACT COM DADOS DE ESTATÍSTICAS BPMA
--- ============================================
--- Estrutura adaptada: dim_tempo (ID AAAAMM), fact_*
--- Dados extraídos de: Resumos Estatísticas 2025 a 2020.xlsx
--- Gerado em: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
--- ============================================
-
--- 1. POPULAR fact_indicador_mensal_bpma
--- ============================================
+SQL_INDICADOR = """INSERT INTO public.fact_indicador_mensal_bpma (tempo_id, indicador_id, valor) VALUES
+({tempo_id},'{indicador_id}',{valor})
+ON CONFLICT (tempo_id, indicador_id) DO UPDATE SET valor=EXCLUDED.valor;
 
 """
 
-# Processar atendimentos
-print("Processando atendimentos...")
-atendimentos_sql = []
-for _, row in df_atendimentos.iterrows():
-    ano = int(row['ano'])
-    mes = int(row['mes'])
-    tempo_id = ano * 100 + mes
-    natureza = str(row['natureza']).strip().replace("'", "''")
-    quantidade = int(row['quantidade'])
-    
-    indicador_id = criar_id_slug(natureza)
-    
-    sql = f"INSERT INTO public.fact_indicador_mensal_bpma (tempo_id, indicador_id, valor) VALUES\n"
-    sql += f"({tempo_id},'{indicador_id}',{quantidade})\n"
-    sql += "ON CONFLICT (tempo_id, indicador_id) DO UPDATE SET valor=EXCLUDED.valor;\n\n"
-    
-    atendimentos_sql.append(sql)
-
-sql_content += "".join(atendimentos_sql)
-
-sql_content += """
--- 2. POPULAR fact_resgate_fauna_especie_mensal
--- ============================================
--- Nota: Faz match com dim_especies_fauna usando nome_cientifico ou nome_popular
--- Se não encontrar match, insere com id_especie_fauna NULL mas mantém nome_popular e nome_cientifico
-
-"""
-
-# Processar resgates
-print("Processando resgates...")
-resgates_sql = []
-resgates_processed = 0
-
-for _, row in df_resgates.iterrows():
-    ano = int(row['ano'])
-    mes = int(row['mes'])
-    tempo_id = ano * 100 + mes
-    nome_popular = str(row['nome_popular']).strip().replace("'", "''") if pd.notna(row['nome_popular']) else None
-    nome_cientifico = str(row['nome_cientifico']).strip().replace("'", "''") if pd.notna(row['nome_cientifico']) else None
-    quantidade = int(row['quantidade'])
-    
-    if not nome_popular or nome_popular == '' or not nome_cientifico or nome_cientifico == '':
-        continue
+# Formato antigo (--por-linha): subconsultas de espécie em cada INSERT
+SQL_RESGATE_POR_LINHA = """INSERT INTO public.fact_resgate_fauna_especie_mensal (
+    tempo_id, id_regiao_administrativa, id_especie_fauna, 
+    nome_cientifico, nome_popular, quantidade
+)
+SELECT 
+    {tempo_id},
+    NULL,
     
-    # Construir match com dim_especies_fauna
-    match_especie = f"""
     COALESCE(
         (SELECT id FROM public.dim_especies_fauna 
          WHERE LOWER(TRIM(nome_cientifico)) = LOWER(TRIM('{nome_cientifico}'))
@@ -104,21 +74,9 @@ for _, row in df_resgates.iterrows():
          WHERE LOWER(TRIM(nome_popular)) = LOWER(TRIM('{nome_popular}'))
          LIMIT 1),
         NULL
-    )"""
-    
-    nome_popular_sql = f"'{nome_popular}'" if nome_popular else "NULL"
-    nome_cientifico_sql = f"'{nome_cientifico}'" if nome_cientifico else "NULL"
-    
-    sql = f"""INSERT INTO public.fact_resgate_fauna_especie_mensal (
-    tempo_id, id_regiao_administrativa, id_especie_fauna, 
-    nome_cientifico, nome_popular, quantidade
-)
-SELECT 
-    {tempo_id},
-    NULL,
-    {match_especie},
-    {nome_cientifico_sql},
-    {nome_popular_sql},
+    ),
+    '{nome_cientifico}',
+    '{nome_popular}',
     {quantidade}
 ON CONFLICT (tempo_id, nome_cientifico) 
 DO UPDATE SET 
@@ -127,27 +85,139 @@ DO UPDATE SET
     id_especie_fauna=COALESCE(EXCLUDED.id_especie_fauna, fact_resgate_fauna_especie_mensal.id_especie_fauna);
 
 """
-    resgates_sql.append(sql)
-    resgates_processed += 1
 
-sql_content += "".join(resgates_sql)
+# dim_especies_fauna é normalizada uma vez por INSERT (uma linha por chave, como o LIMIT 1)
+# e o Postgres resolve todas as linhas do lote com hash join. As chaves já são únicas
+# (ConflitosDataFrame), então o ON CONFLICT nunca atinge a mesma linha duas vezes no comando.
+SQL_RESGATE_LOTE_INICIO = """WITH v (tempo_id, nome_cientifico, nome_popular, quantidade) AS (
+  VALUES
+"""
+SQL_RESGATE_LOTE_VALOR = "    ({tempo_id}, '{nome_cientifico}', '{nome_popular}', {quantidade})"
+SQL_RESGATE_LOTE_FIM = """
+),
+especie_cientifico AS (
+  SELECT DISTINCT ON (LOWER(TRIM(nome_cientifico))) LOWER(TRIM(nome_cientifico)) AS chave, id
+  FROM public.dim_especies_fauna
+),
+especie_popular AS (
+  SELECT DISTINCT ON (LOWER(TRIM(nome_popular))) LOWER(TRIM(nome_popular)) AS chave, id
+  FROM public.dim_especies_fauna
+)
+INSERT INTO public.fact_resgate_fauna_especie_mensal (
+    tempo_id, id_regiao_administrativa, id_especie_fauna,
+    nome_cientifico, nome_popular, quantidade
+)
+SELECT
+    v.tempo_id,
+    NULL,
+    COALESCE(ec.id, ep.id),
+    v.nome_cientifico,
+    v.nome_popular,
+    v.quantidade
+FROM v
+LEFT JOIN especie_cientifico ec ON ec.chave = LOWER(TRIM(v.nome_cientifico))
+LEFT JOIN especie_popular ep ON ep.chave = LOWER(TRIM(v.nome_popular))
+ON CONFLICT (tempo_id, nome_cientifico)
+DO UPDATE SET
+    quantidade=EXCLUDED.quantidade,
+    nome_popular=EXCLUDED.nome_popular,
+    id_especie_fauna=COALESCE(EXCLUDED.id_especie_fauna, fact_resgate_fauna_especie_mensal.id_especie_fauna);
+
+"""
+
+
+def sql_indicadores(bloco):
+    return preencher(SQL_INDICADOR, tempo_id=inteiro_sql(bloco['tempo_id']),
+                     indicador_id=bloco['indicador_id'], valor=inteiro_sql(bloco['valor']))
+
+
+def campos_resgate(bloco):
+    return {
+        'tempo_id': inteiro_sql(bloco['tempo_id']),
+        'nome_cientifico': escapar(bloco['nome_cientifico']),
+        'nome_popular': escapar(bloco['nome_popular']),
+        'quantidade': inteiro_sql(bloco['quantidade']),
+    }
+
+
+# Processar atendimentos
+print("Processando atendimentos...")
+# Mesmo (tempo_id, indicador_id) em várias linhas do CSV: fica o último valor
+indice_indicadores = ConflitosDataFrame(
+    pd.DataFrame({
+        'tempo_id': tempo_id(df_atendimentos),
+        'indicador_id': df_atendimentos['natureza'].map(str).str.strip().map(criar_id_slug),
+        'valor': df_atendimentos['quantidade'].astype('int64'),
+    }),
+    'fact_indicador_mensal_bpma', ('tempo_id', 'indicador_id'), ('valor',),
+    origem=origem_linhas(df_atendimentos, caminho_atendimentos),
+)
+
+# Processar resgates
+print("Processando resgates...")
+nome_popular = texto_limpo(df_resgates['nome_popular'])
+nome_cientifico = texto_limpo(df_resgates['nome_cientifico'])
+validas = nome_popular.notna() & nome_popular.ne('') & nome_cientifico.notna() & nome_cientifico.ne('')
+df_validas = df_resgates[validas]
+# Mesmo (tempo_id, nome_cientifico): nome_popular e quantidade da última linha, como no DO UPDATE
+indice_resgates = ConflitosDataFrame(
+    pd.DataFrame({
+        'tempo_id': tempo_id(df_validas),
+        'nome_cientifico': nome_cientifico[validas],
+        'nome_popular': nome_popular[validas],
+        'quantidade': df_validas['quantidade'].astype('int64'),
+    }),
+    'fact_resgate_fauna_especie_mensal', ('tempo_id', 'nome_cientifico'), ('nome_popular', 'quantidade'),
+    origem=origem_linhas(df_validas, caminho_resgates),
+)
+resgates_processed = indice_resgates.entradas
+
+# Salvar migration
+migration_path = os.path.join(output_dir, migration_name)
+with abrir_saida(migration_path) as f:
+    f.write(f"""-- ============================================
+-- POPULAR TABELAS FACT COM DADOS DE ESTATÍSTICAS BPMA
+-- ============================================
+-- Estrutura adaptada: dim_tempo (ID AAAAMM), fact_*
+-- Dados extraídos de: Resumos Estatísticas 2025 a 2020.xlsx
+-- Gerado em: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+-- ============================================
+
+-- 1. POPULAR fact_indicador_mensal_bpma
+-- ============================================
 
-sql_content += f"""
+""")
+    escrever_linhas(f, indice_indicadores.df, sql_indicadores)
+
+    f.write("""
+-- 2. POPULAR fact_resgate_fauna_especie_mensal
+-- ============================================
+-- Nota: Faz match com dim_especies_fauna usando nome_cientifico ou nome_popular
+-- Se não encontrar match, insere com id_especie_fauna NULL mas mantém nome_popular e nome_cientifico
+
+""")
+    if args.por_linha:
+        escrever_linhas(f, indice_resgates.df, lambda bloco: preencher(SQL_RESGATE_POR_LINHA, **campos_resgate(bloco)))
+    else:
+        escrever_em_lote(f, indice_resgates.df, args.lote,
+                         lambda lote: preencher(SQL_RESGATE_LOTE_VALOR, **campos_resgate(lote)),
+                         SQL_RESGATE_LOTE_INICIO, SQL_RESGATE_LOTE_FIM)
+
+    f.write(f"""
 -- ============================================
 -- RESUMO
 -- ============================================
 -- Atendimentos processados: {len(df_atendimentos)}
 -- Resgates processados: {resgates_processed}
 -- ============================================
-"""
-
-# Salvar migration
-migration_path = os.path.join(output_dir, migration_name)
-with open(migration_path, 'w', encoding='utf-8') as f:
-    f.write(sql_content)
+""")
 
 print(f"\nMigration criada: {migration_path}")
-print(f"Tamanho: {len(sql_content)} caracteres")
+print(f"Tamanho: {os.path.getsize(migration_path)} bytes")
 print(f"Atendimentos: {len(df_atendimentos)}")
 print(f"Resgates: {resgates_processed}")
 
+salvar_relatorio(relatorio_path, [indice_indicadores, indice_resgates])
+print(f"\nChaves repetidas: {len(indice_indicadores.colisoes())} em fact_indicador_mensal_bpma, "
+      f"{len(indice_resgates.colisoes())} em fact_resgate_fauna_especie_mensal")
+print(f"Relatório de colisões: {relatorio_path}")
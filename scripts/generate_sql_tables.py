@@ -5,6 +5,8 @@ import pandas as pd
 import os
 from datetime import datetime
 
+from dados_processados import ler_tabela
+
 # Caminhos
 base_dir = os.path.dirname(os.path.dirname(__file__))  # Voltar para raiz do projeto
 data_dir = os.path.join(base_dir, 'data', 'processed')
@@ -13,8 +15,8 @@ output_dir = os.path.join(base_dir, 'supabase', 'migrations')
 os.makedirs(output_dir, exist_ok=True)
 
 # Ler dados processados
-df_atendimentos = pd.read_csv(os.path.join(data_dir, 'atendimentos.csv'))
-df_resgates = pd.read_csv(os.path.join(data_dir, 'resgates.csv'))
+df_atendimentos = ler_tabela('atendimentos', data_dir)
+df_resgates = ler_tabela('resgates', data_dir)
 
 # Gerar timestamp para nome da migration
 timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
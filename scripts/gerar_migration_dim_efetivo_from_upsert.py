@@ -1,47 +1,75 @@
 #!/usr/bin/env python3
 """Gera migration SQL que corrige dim_efetivo a partir do arquivo dim_efetivo_upsert.sql.
 Lê o arquivo em Downloads e gera a migration em supabase/migrations/.
+
+As tuplas do INSERT ... VALUES são lidas em streaming (valores_sql.py), com tokenizador
+de literais SQL: valores em várias linhas e parênteses/vírgulas dentro de strings não
+quebram a extração, e a memória não cresce com o tamanho do efetivo. As colunas são
+casadas pelo nome da lista do INSERT (extras são ignoradas, ausentes viram NULL).
+
+Reconciliação set-based: a matrícula normalizada (8 dígitos) é calculada uma vez, em
+tabelas temporárias com chave/índice (_dim_efetivo_nova, _dim_efetivo_atual), e
+duplicatas, saídas, atualizações e inserções saem de JOINs e anti-joins sobre elas e
+sobre o índice único de dim_efetivo.matricula, sem subconsulta correlacionada por
+linha nem NOT IN sobre expressão. Só as linhas com alguma diferença são atualizadas.
+
+Carga da staging (_staging_dim_efetivo_nova):
+  --formato values  INSERT ... VALUES na migration (padrão; roda no SQL Editor)
+  --formato copy    bloco COPY ... FROM stdin (para psql -f)
+  --carregar        sem gerar arquivo: COPY direto numa conexão psycopg (--db-url ou
+                    SUPABASE_DB_URL/DATABASE_URL) e reconciliação na mesma transação
+                    (--dry-run desfaz no final); mostra as mesmas contagens do --diff
+  --diff            não altera nada: lê dim_efetivo pela conexão e mostra quantas linhas
+                    seriam inseridas, atualizadas e removidas (calculado no cliente)
+
+Uso:
+  python scripts/gerar_migration_dim_efetivo_from_upsert.py
+  python scripts/gerar_migration_dim_efetivo_from_upsert.py dim_efetivo_upsert.sql --formato copy
+  python scripts/gerar_migration_dim_efetivo_from_upsert.py dim_efetivo_upsert.sql --carregar --dry-run
+  python scripts/gerar_migration_dim_efetivo_from_upsert.py dim_efetivo_upsert.sql --diff
 """
+import argparse
+import os
 import re
 import sys
+import time
+from datetime import date
 from pathlib import Path
 
+from dotenv import load_dotenv
+
+from valores_sql import Valor, ler_values, linha_copy
+
+load_dotenv()
+
 # Caminho do arquivo de entrada (Downloads)
 INPUT = Path(r"c:\Users\joao.maciel\Downloads\dim_efetivo_upsert.sql")
 # Caminho da migration de saída
 OUTPUT = Path(__file__).resolve().parent.parent / "supabase" / "migrations" / "20260203170000_dim_efetivo_corrigir_conforme_tabela_nova.sql"
 
-def main():
-    if not INPUT.exists():
-        print(f"Arquivo não encontrado: {INPUT}")
-        sys.exit(1)
-
-    text = INPUT.read_text(encoding="utf-8", errors="replace")
-
-    # Extrair blocos VALUES (linhas que começam com   ('... )
-    values_lines = []
-    in_values = False
-    for line in text.splitlines():
-        if ") VALUES" in line or (in_values and line.strip().startswith("(")):
-            in_values = True
-        if in_values and line.strip().startswith("("):
-            values_lines.append(line.strip().rstrip(","))
-        if in_values and "ON CONFLICT" in line:
-            break
-
-    if not values_lines:
-        print("Nenhum VALUES encontrado.")
-        sys.exit(1)
-
-    values_block = ",\n  ".join(values_lines)
+STAGING = "_staging_dim_efetivo_nova"
+COLUNAS = [
+    "antiguidade", "posto_graduacao", "quadro", "quadro_sigla", "nome_guerra", "nome", "matricula",
+    "sexo", "lotacao", "ativo", "cpf", "data_nascimento", "data_inclusao", "idade", "contato",
+    "email", "telefone", "telefone_2", "email_2", "porte_arma", "logradouro",
+]
+_NULO = Valor("NULL", None)
+# Colunas convertidas na reconciliação (::integer, ::bigint, date)
+COLUNAS_INTEIRAS = ("antiguidade", "cpf", "idade")
+COLUNAS_DATA = ("data_nascimento", "data_inclusao")
+_NAO_DIGITO = re.compile(r"[^0-9]")
+# Buffer do arquivo de saída
+BUFFER_BYTES = 1024 * 1024
 
-    migration = f"""-- =============================================================
+CABECALHO = """-- =============================================================
 -- Corrigir dim_efetivo conforme tabela nova (fonte da verdade).
 -- Uma linha por matrícula; quem não está na tabela nova não faz mais parte do batalhão.
 -- Fonte: dim_efetivo_upsert.sql (atualizar dim_efetivo.xlsx)
 -- =============================================================
 
--- 1) Tabela temporária com os dados da tabela nova
+"""
+
+SQL_STAGING = """-- 1) Tabela temporária com os dados da tabela nova
 CREATE TEMP TABLE _staging_dim_efetivo_nova (
   antiguidade text,
   posto_graduacao text,
@@ -65,50 +93,177 @@ CREATE TEMP TABLE _staging_dim_efetivo_nova (
   porte_arma text,
   logradouro text
 );
+"""
 
-INSERT INTO _staging_dim_efetivo_nova (
+INSERT_STAGING = f"""INSERT INTO {STAGING} (
   antiguidade, posto_graduacao, quadro, quadro_sigla, nome_guerra, nome, matricula,
   sexo, lotacao, ativo, cpf, data_nascimento, data_inclusao, idade, contato,
   email, telefone, telefone_2, email_2, porte_arma, logradouro
 ) VALUES
-  {values_block};
+"""
 
--- 2) Normalizar matrícula na staging para 8 dígitos (para comparação)
-UPDATE _staging_dim_efetivo_nova
-SET matricula = lpad(regexp_replace(trim(COALESCE(matricula, '')), '[^0-9]', '', 'g'), 8, '0')
-WHERE trim(COALESCE(matricula, '')) <> '';
+COPY_STAGING = f"COPY {STAGING} ({', '.join(COLUNAS)}) FROM stdin;\n"
 
--- 3) Normalizar matrícula em dim_efetivo para 8 dígitos
-UPDATE public.dim_efetivo
-SET matricula = lpad(regexp_replace(trim(COALESCE(matricula, '')), '[^0-9]', '', 'g'), 8, '0')
-WHERE trim(COALESCE(matricula, '')) <> '';
+SQL_RECONCILIAR = """-- 2) Tabela nova normalizada: matrícula com 8 dígitos calculada uma vez, tipos de destino
+--    e uma linha por matrícula (chave primária; após normalização podem colidir)
+CREATE TEMP TABLE _dim_efetivo_nova AS
+SELECT DISTINCT ON (matricula) *
+FROM (
+  SELECT
+    lpad(regexp_replace(trim(s.matricula), '[^0-9]', '', 'g'), 8, '0') AS matricula,
+    s.antiguidade::integer AS antiguidade, s.posto_graduacao, s.quadro, s.quadro_sigla, s.nome_guerra, s.nome,
+    s.sexo, s.lotacao, s.ativo, s.cpf::bigint AS cpf, s.data_nascimento, s.data_inclusao, s.idade::integer AS idade,
+    s.contato, s.email, s.telefone, s.telefone_2, s.email_2, s.porte_arma, s.logradouro
+  FROM _staging_dim_efetivo_nova s
+  WHERE trim(COALESCE(s.matricula, '')) <> ''
+) n
+ORDER BY matricula, antiguidade;
+ALTER TABLE _dim_efetivo_nova ADD PRIMARY KEY (matricula);
+ANALYZE _dim_efetivo_nova;
+
+-- 3) dim_efetivo atual com a matrícula normalizada (NULL se vazia) e quem tem user_roles,
+--    num único JOIN (sem subconsulta por linha)
+CREATE TEMP TABLE _dim_efetivo_atual AS
+SELECT
+  de.id,
+  CASE WHEN trim(COALESCE(de.matricula, '')) <> ''
+       THEN lpad(regexp_replace(trim(de.matricula), '[^0-9]', '', 'g'), 8, '0') END AS matricula_norm,
+  de.matricula,
+  ur.efetivo_id IS NOT NULL AS tem_role
+FROM public.dim_efetivo de
+LEFT JOIN (SELECT DISTINCT efetivo_id FROM public.user_roles) ur ON ur.efetivo_id = de.id;
+ALTER TABLE _dim_efetivo_atual ADD PRIMARY KEY (id);
+CREATE INDEX ON _dim_efetivo_atual (matricula_norm);
+ANALYZE _dim_efetivo_atual;
+
+-- 4) Remover duplicatas em dim_efetivo ANTES de normalizar (por matrícula normalizada; senão duas linhas
+--    0731549 e 731549 viram 00731549 e violam UNIQUE): fica a que tem user_roles, depois o menor id
+CREATE TEMP TABLE _dim_efetivo_duplicados (id uuid PRIMARY KEY);
+INSERT INTO _dim_efetivo_duplicados (id)
+SELECT t.id FROM (
+  SELECT a.id, ROW_NUMBER() OVER (PARTITION BY a.matricula_norm ORDER BY a.tem_role DESC, a.id) AS rn
+  FROM _dim_efetivo_atual a
+  WHERE a.matricula_norm IS NOT NULL
+) t
+WHERE t.rn > 1;
 
--- 4) Remover duplicatas em dim_efetivo (manter uma linha por matrícula; preferir a que tem user_roles)
 DELETE FROM public.dim_efetivo de
-WHERE de.id IN (
-  SELECT id FROM (
-    SELECT id,
-      ROW_NUMBER() OVER (
-        PARTITION BY matricula
-        ORDER BY (SELECT 1 FROM public.user_roles ur WHERE ur.efetivo_id = dim_efetivo.id LIMIT 1) DESC NULLS LAST,
-                 id
-      ) AS rn
-    FROM public.dim_efetivo
-  ) t
-  WHERE t.rn > 1
-);
+USING _dim_efetivo_duplicados d
+WHERE de.id = d.id;
+
+DELETE FROM _dim_efetivo_atual a
+USING _dim_efetivo_duplicados d
+WHERE a.id = d.id;
 
--- 5) Índice único em matrícula (para upsert)
+-- 5) Só então normalizar matrícula em dim_efetivo para 8 dígitos (apenas as linhas que mudam)
+UPDATE public.dim_efetivo de
+SET matricula = a.matricula_norm
+FROM _dim_efetivo_atual a
+WHERE de.id = a.id
+  AND de.matricula IS DISTINCT FROM a.matricula_norm
+  AND a.matricula_norm IS NOT NULL;
+
+-- 6) Índice único em matrícula (para os JOINs por matrícula)
 CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_efetivo_matricula_unique
   ON public.dim_efetivo (matricula)
   WHERE trim(COALESCE(matricula, '')) <> '';
 
--- 6) Remover quem não está na tabela nova (não faz mais parte do batalhão)
-DELETE FROM public.dim_efetivo
-WHERE lpad(regexp_replace(trim(COALESCE(matricula, '')), '[^0-9]', '', 'g'), 8, '0')
-      NOT IN (SELECT matricula FROM _staging_dim_efetivo_nova WHERE trim(COALESCE(matricula, '')) <> '');
+-- 7) id de dim_efetivo que saem: sem matrícula na tabela nova (anti-join pela chave primária)
+CREATE TEMP TABLE _dim_efetivo_ids_sair (id_remover uuid PRIMARY KEY);
+INSERT INTO _dim_efetivo_ids_sair (id_remover)
+SELECT a.id
+FROM _dim_efetivo_atual a
+LEFT JOIN _dim_efetivo_nova s ON s.matricula = a.matricula_norm
+WHERE s.matricula IS NULL;
+
+-- 7b) Limpar referências antes de excluir (quem não está na lista nova não faz mais parte do batalhão)
+UPDATE public.usuarios_por_login upl
+SET efetivo_id = NULL
+FROM _dim_efetivo_ids_sair ir
+WHERE upl.efetivo_id = ir.id_remover;
+
+DELETE FROM public.fat_equipe_membros fem
+USING _dim_efetivo_ids_sair ir
+WHERE fem.efetivo_id = ir.id_remover;
+
+DELETE FROM public.fat_campanha_membros fcm
+USING _dim_efetivo_ids_sair ir
+WHERE fcm.efetivo_id = ir.id_remover;
+
+-- fat_equipe_atividades_prevencao tem ON DELETE CASCADE; será apagado ao deletar dim_efetivo
+
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'dim_os') THEN
+    UPDATE public.dim_os d SET comandante_id = NULL FROM _dim_efetivo_ids_sair ir WHERE d.comandante_id = ir.id_remover;
+    UPDATE public.dim_os d SET chefe_operacoes_id = NULL FROM _dim_efetivo_ids_sair ir WHERE d.chefe_operacoes_id = ir.id_remover;
+  END IF;
+END $$;
 
--- 7) Upsert: inserir ou atualizar a partir da tabela nova
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'fat_os_efetivo') THEN
+    DELETE FROM public.fat_os_efetivo foe USING _dim_efetivo_ids_sair ir WHERE foe.efetivo_id = ir.id_remover;
+  END IF;
+  IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'fat_equipe_crime_comum') THEN
+    DELETE FROM public.fat_equipe_crime_comum fecc USING _dim_efetivo_ids_sair ir WHERE fecc.efetivo_id = ir.id_remover;
+  END IF;
+  IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'fat_equipe_resgate') THEN
+    DELETE FROM public.fat_equipe_resgate fer USING _dim_efetivo_ids_sair ir WHERE fer.efetivo_id = ir.id_remover;
+  END IF;
+  IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'fat_equipe_crime') THEN
+    DELETE FROM public.fat_equipe_crime fec USING _dim_efetivo_ids_sair ir WHERE fec.efetivo_id = ir.id_remover;
+  END IF;
+  IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'fat_abono') THEN
+    DELETE FROM public.fat_abono fa USING _dim_efetivo_ids_sair ir WHERE fa.efetivo_id = ir.id_remover;
+  END IF;
+END $$;
+
+-- user_roles: ON DELETE CASCADE na FK → serão apagados ao deletar dim_efetivo; opcionalmente desativar antes
+UPDATE public.user_roles ur
+SET ativo = false
+FROM _dim_efetivo_ids_sair ir
+WHERE ur.efetivo_id = ir.id_remover;
+
+-- 8) Remover quem não está na tabela nova
+DELETE FROM public.dim_efetivo de
+USING _dim_efetivo_ids_sair ir
+WHERE de.id = ir.id_remover;
+
+-- 9) Atualizar existentes (JOIN pelo índice de matrícula; só as linhas com alguma diferença)
+UPDATE public.dim_efetivo de
+SET
+  antiguidade = s.antiguidade,
+  posto_graduacao = s.posto_graduacao,
+  quadro = s.quadro,
+  quadro_sigla = s.quadro_sigla,
+  nome_guerra = s.nome_guerra,
+  nome = s.nome,
+  sexo = s.sexo,
+  lotacao = s.lotacao,
+  ativo = s.ativo,
+  cpf = s.cpf,
+  data_nascimento = s.data_nascimento,
+  data_inclusao = s.data_inclusao,
+  idade = s.idade,
+  contato = s.contato,
+  email = s.email,
+  telefone = s.telefone,
+  telefone_2 = s.telefone_2,
+  email_2 = s.email_2,
+  porte_arma = s.porte_arma,
+  logradouro = s.logradouro
+FROM _dim_efetivo_nova s
+WHERE de.matricula = s.matricula
+  AND (de.antiguidade, de.posto_graduacao, de.quadro, de.quadro_sigla, de.nome_guerra, de.nome,
+       de.sexo, de.lotacao, de.ativo, de.cpf, de.data_nascimento, de.data_inclusao, de.idade,
+       de.contato, de.email, de.telefone, de.telefone_2, de.email_2, de.porte_arma, de.logradouro)
+      IS DISTINCT FROM
+      (s.antiguidade, s.posto_graduacao, s.quadro, s.quadro_sigla, s.nome_guerra, s.nome,
+       s.sexo, s.lotacao, s.ativo, s.cpf, s.data_nascimento, s.data_inclusao, s.idade,
+       s.contato, s.email, s.telefone, s.telefone_2, s.email_2, s.porte_arma, s.logradouro);
+
+-- 10) Inserir apenas matrículas que ainda não existem em dim_efetivo (anti-join)
 INSERT INTO public.dim_efetivo (
   antiguidade, posto_graduacao, quadro, quadro_sigla, nome_guerra, nome, matricula,
   sexo, lotacao, ativo, cpf, data_nascimento, data_inclusao, idade, contato,
@@ -116,36 +271,258 @@ INSERT INTO public.dim_efetivo (
 )
 SELECT
   s.antiguidade, s.posto_graduacao, s.quadro, s.quadro_sigla, s.nome_guerra, s.nome, s.matricula,
-  s.sexo, s.lotacao, s.ativo, s.cpf::bigint, s.data_nascimento, s.data_inclusao::date, s.idade, s.contato,
+  s.sexo, s.lotacao, s.ativo, s.cpf, s.data_nascimento, s.data_inclusao, s.idade, s.contato,
   s.email, s.telefone, s.telefone_2, s.email_2, s.porte_arma, s.logradouro
-FROM _staging_dim_efetivo_nova s
-WHERE trim(COALESCE(s.matricula, '')) <> ''
-ON CONFLICT (matricula) DO UPDATE SET
-  antiguidade = EXCLUDED.antiguidade,
-  posto_graduacao = EXCLUDED.posto_graduacao,
-  quadro = EXCLUDED.quadro,
-  quadro_sigla = EXCLUDED.quadro_sigla,
-  nome_guerra = EXCLUDED.nome_guerra,
-  nome = EXCLUDED.nome,
-  sexo = EXCLUDED.sexo,
-  lotacao = EXCLUDED.lotacao,
-  ativo = EXCLUDED.ativo,
-  cpf = EXCLUDED.cpf,
-  data_nascimento = EXCLUDED.data_nascimento,
-  data_inclusao = EXCLUDED.data_inclusao,
-  idade = EXCLUDED.idade,
-  contato = EXCLUDED.contato,
-  email = EXCLUDED.email,
-  telefone = EXCLUDED.telefone,
-  telefone_2 = EXCLUDED.telefone_2,
-  email_2 = EXCLUDED.email_2,
-  porte_arma = EXCLUDED.porte_arma,
-  logradouro = EXCLUDED.logradouro;
+FROM _dim_efetivo_nova s
+LEFT JOIN public.dim_efetivo de ON de.matricula = s.matricula
+WHERE de.id IS NULL;
 """
 
-    OUTPUT.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT.write_text(migration, encoding="utf-8")
-    print(f"Migration gerada: {OUTPUT} ({len(values_lines)} linhas)")
+# Contagens da reconciliação, na mesma transação (antes do COMMIT/ROLLBACK): as linhas
+# inseridas ou atualizadas nesta transação têm xmin igual ao id dela
+SQL_CONTAGENS = """SELECT
+  count(*) FILTER (WHERE a.id IS NULL) AS inserir,
+  count(*) FILTER (WHERE a.id IS NOT NULL AND de.xmin = pg_current_xact_id()::xid) AS atualizar,
+  count(*) FILTER (WHERE a.id IS NOT NULL AND de.xmin <> pg_current_xact_id()::xid) AS inalteradas,
+  (SELECT count(*) FROM _dim_efetivo_ids_sair) AS remover,
+  (SELECT count(*) FROM _dim_efetivo_duplicados) AS duplicatas
+FROM public.dim_efetivo de
+LEFT JOIN _dim_efetivo_atual a ON a.id = de.id"""
+
+SQL_ATUAL = f"""SELECT de.id, ur.efetivo_id IS NOT NULL AS tem_role, {', '.join('de.' + c for c in COLUNAS)}
+FROM public.dim_efetivo de
+LEFT JOIN (SELECT DISTINCT efetivo_id FROM public.user_roles) ur ON ur.efetivo_id = de.id"""
+
+
+def linhas_staging(arquivo):
+    """Valores de cada tupla do arquivo na ordem de COLUNAS"""
+    ordens = {}
+    for tupla in ler_values(arquivo):
+        chave = tuple(tupla.colunas) if tupla.colunas is not None else None
+        ordem = ordens.get(chave)
+        if ordem is None:
+            if chave is None:
+                ordem = list(range(len(COLUNAS)))
+            else:
+                ordem = [chave.index(c) if c in chave else None for c in COLUNAS]
+                ignoradas = [c for c in chave if c not in COLUNAS]
+                ausentes = [c for c, i in zip(COLUNAS, ordem) if i is None]
+                if ignoradas or ausentes:
+                    print(f"Aviso: {tupla.tabela}: colunas ignoradas {ignoradas}, ausentes (NULL) {ausentes}")
+            ordens[chave] = ordem
+        valores = tupla.valores
+        if tupla.colunas is None and len(valores) != len(COLUNAS):
+            raise ValueError(f"Tupla sem lista de colunas com {len(valores)} valores (esperado {len(COLUNAS)})")
+        yield [_NULO if i is None else valores[i] for i in ordem]
+
+
+def matricula_normalizada(matricula):
+    """Mesma regra do SQL: lpad(só dígitos, 8, '0') (lpad corta o que passar de 8); None se vazia"""
+    texto = "" if matricula is None else str(matricula).strip(" ")
+    if not texto:
+        return None
+    return _NAO_DIGITO.sub("", texto).rjust(8, "0")[:8]
+
+
+def _tipado(coluna, valor):
+    """Valor da staging no tipo de dim_efetivo, para comparar com o banco"""
+    if not isinstance(valor, str):
+        return valor
+    try:
+        if coluna in COLUNAS_INTEIRAS:
+            return int(valor)
+        if coluna in COLUNAS_DATA:
+            return date.fromisoformat(valor.strip())
+    except ValueError:
+        pass
+    if coluna == "ativo":
+        return valor.strip().lower() in ("t", "true", "y", "yes", "on", "1")
+    return valor
+
+
+def diff_efetivo(linhas, atuais):
+    """Contagens da reconciliação calculadas no cliente, sem alterar nada.
+
+    linhas: valores na ordem de COLUNAS (linhas_staging); atuais: dicts de SQL_ATUAL.
+    Mesmas regras do SQL: uma linha da tabela nova por matrícula normalizada (menor
+    antiguidade) e, em dim_efetivo, fica a linha com user_roles e depois o menor id;
+    linhas sem matrícula saem, e normalizar a matrícula gravada conta como atualização.
+    """
+    novas = {}
+    for valores in linhas:
+        linha = {c: _tipado(c, v.valor) for c, v in zip(COLUNAS, valores)}
+        chave = matricula_normalizada(linha.pop("matricula"))
+        if chave is None:
+            continue
+        outra = novas.get(chave)
+        antiguidade = linha["antiguidade"]
+        if outra is None or (antiguidade is not None and (outra["antiguidade"] is None or antiguidade < outra["antiguidade"])):
+            novas[chave] = linha
+
+    resumo = {"inserir": 0, "atualizar": 0, "inalteradas": 0, "remover": 0, "duplicatas": 0}
+    mantidas = {}
+    for atual in atuais:
+        chave = matricula_normalizada(atual["matricula"])
+        if chave is None:
+            resumo["remover"] += 1
+            continue
+        outra = mantidas.get(chave)
+        if outra is not None:
+            resumo["duplicatas"] += 1
+            if (not atual["tem_role"], atual["id"]) > (not outra["tem_role"], outra["id"]):
+                continue
+        mantidas[chave] = atual
+
+    for chave, atual in mantidas.items():
+        nova = novas.get(chave)
+        if nova is None:
+            resumo["remover"] += 1
+        elif atual["matricula"] != chave or any(nova[c] != atual[c] for c in nova):
+            resumo["atualizar"] += 1
+        else:
+            resumo["inalteradas"] += 1
+    resumo["inserir"] = sum(1 for chave in novas if chave not in mantidas)
+    return resumo
+
+
+def abrir_entrada(caminho):
+    return open(caminho, encoding="utf-8", errors="replace", newline="")
+
+
+def abrir_saida(caminho):
+    return open(caminho, "w", encoding="utf-8", newline="\n", buffering=BUFFER_BYTES)
+
+
+def escrever_migration(entrada, saida, formato="values"):
+    """Grava a migration em streaming (arquivo temporário + rename); devolve o número de linhas"""
+    saida = Path(saida)
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    tmp = saida.with_name(saida.name + ".tmp")
+    total = 0
+    try:
+        with abrir_entrada(entrada) as arquivo, abrir_saida(tmp) as f:
+            f.write(CABECALHO)
+            f.write(SQL_STAGING)
+            f.write("\n")
+            if formato == "copy":
+                f.write(COPY_STAGING)
+                for valores in linhas_staging(arquivo):
+                    f.write(linha_copy([v.valor for v in valores]))
+                    total += 1
+                f.write("\\.\n")
+            else:
+                f.write(INSERT_STAGING)
+                for valores in linhas_staging(arquivo):
+                    f.write(("  (" if total == 0 else ",\n  (") + ", ".join(v.sql for v in valores) + ")")
+                    total += 1
+                f.write(";\n")
+            f.write("\n")
+            f.write(SQL_RECONCILIAR)
+        if total == 0:
+            raise ValueError("Nenhum VALUES encontrado.")
+        os.replace(tmp, saida)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return total
+
+
+def _psycopg():
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit('ERRO: psycopg não instalado. Use: pip install "psycopg[binary]"')
+    return psycopg
+
+
+def diff(db_url, entrada):
+    """diff_efetivo do arquivo contra dim_efetivo lida pela conexão (só SELECT)"""
+    psycopg = _psycopg()
+    from psycopg.rows import dict_row
+
+    with psycopg.connect(db_url, row_factory=dict_row) as conn:
+        atuais = conn.execute(SQL_ATUAL).fetchall()
+    with abrir_entrada(entrada) as arquivo:
+        return diff_efetivo(linhas_staging(arquivo), atuais)
+
+
+def carregar(db_url, entrada, dry_run=False):
+    """Staging via COPY FROM STDIN e reconciliação numa transação; devolve contagens (as de diff_efetivo) e tempos"""
+    psycopg = _psycopg()
+
+    resumo = {}
+    inicio = time.perf_counter()
+    with psycopg.connect(db_url) as conn:
+        with conn.cursor() as cur, abrir_entrada(entrada) as arquivo:
+            cur.execute(SQL_STAGING)
+            total = 0
+            with cur.copy(f"COPY {STAGING} ({', '.join(COLUNAS)}) FROM STDIN") as copy:
+                for valores in linhas_staging(arquivo):
+                    copy.write(linha_copy([v.valor for v in valores]))
+                    total += 1
+            if total == 0:
+                raise ValueError("Nenhum VALUES encontrado.")
+            resumo["linhas"] = total
+            resumo["tempo_copy"] = time.perf_counter() - inicio
+            cur.execute(SQL_RECONCILIAR)
+            cur.execute(SQL_CONTAGENS)
+            resumo.update(zip((coluna.name for coluna in cur.description), cur.fetchone()))
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    resumo["tempo_total"] = time.perf_counter() - inicio
+    return resumo
+
+
+def imprimir_contagens(resumo):
+    print(f"dim_efetivo: {resumo['inserir']} a inserir, {resumo['atualizar']} a atualizar, "
+          f"{resumo['remover']} a remover, {resumo['duplicatas']} duplicatas, {resumo['inalteradas']} inalteradas")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gera a migration que corrige dim_efetivo a partir de dim_efetivo_upsert.sql")
+    parser.add_argument("entrada", nargs="?", default=INPUT, type=Path, help=f"Arquivo com o upsert (padrão: {INPUT})")
+    parser.add_argument("--saida", default=OUTPUT, type=Path, help="Migration gerada")
+    parser.add_argument("--formato", choices=("values", "copy"), default="values",
+                        help="Carga da staging na migration: INSERT ... VALUES ou COPY FROM stdin (psql)")
+    parser.add_argument("--carregar", action="store_true",
+                        help="Em vez de gerar a migration, carrega e reconcilia direto no Postgres (COPY)")
+    parser.add_argument("--db-url", default=os.getenv("SUPABASE_DB_URL") or os.getenv("DATABASE_URL"),
+                        help="String de conexão do Postgres (padrão: SUPABASE_DB_URL ou DATABASE_URL)")
+    parser.add_argument("--dry-run", action="store_true", help="Com --carregar: executa tudo e desfaz no final (ROLLBACK)")
+    parser.add_argument("--diff", action="store_true",
+                        help="Só mostra quantas linhas seriam inseridas/atualizadas/removidas (calculado no cliente)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.entrada.exists():
+        print(f"Arquivo não encontrado: {args.entrada}")
+        sys.exit(1)
+
+    try:
+        if args.diff or args.carregar:
+            if not args.db_url:
+                print("ERRO: informe --db-url ou defina SUPABASE_DB_URL/DATABASE_URL no .env")
+                sys.exit(1)
+        if args.diff:
+            imprimir_contagens(diff(args.db_url, args.entrada))
+        elif args.carregar:
+            resumo = carregar(args.db_url, args.entrada, dry_run=args.dry_run)
+            print(f"dim_efetivo reconciliada: {resumo['linhas']} linhas na staging "
+                  f"(COPY {resumo['tempo_copy']:.2f}s, total {resumo['tempo_total']:.2f}s)")
+            imprimir_contagens(resumo)
+            if args.dry_run:
+                print("Dry-run: alterações desfeitas (ROLLBACK)")
+        else:
+            total = escrever_migration(args.entrada, args.saida, args.formato)
+            print(f"Migration gerada: {args.saida} ({total} linhas)")
+    except ValueError as e:
+        print(f"ERRO: {e}")
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,213 @@
+"""
+Gravação em lote de fat_ferias e fat_ferias_parcelas via PostgREST (upsert)
+
+Em vez de GET + PATCH/POST por pessoa e por parcela (até 8 requisições por linha
+da planilha), os registros são acumulados e enviados em POSTs com arrays usando
+Prefer: resolution=merge-duplicates e on_conflict nas chaves únicas
+(efetivo_id, ano) e (fat_ferias_id, parcela_num). Os ids devolvidos por
+fat_ferias são associados às parcelas em memória antes do segundo POST.
+
+Se um lote falhar, os registros dele são reenviados um a um para isolar o erro.
+No modo assíncrono (GravadorFeriasAsync) os lotes têm o mesmo tamanho, vários são
+gravados ao mesmo tempo e cada POST do lote é dividido em partes enviadas em paralelo.
+"""
+import asyncio
+
+# Registros (pessoas) por lote
+TAMANHO_LOTE = 500
+# Linhas por POST no modo assíncrono (as partes de um mesmo lote vão ao mesmo tempo).
+# Partes menores multiplicam as requisições: com 50ms de latência, 125 já fica mais lento que 250.
+TAMANHO_ENVIO_ASYNC = 250
+
+CONFLITO_FERIAS = 'efetivo_id,ano'
+CONFLITO_PARCELAS = 'fat_ferias_id,parcela_num'
+PREFER_FERIAS = 'resolution=merge-duplicates,return=representation'
+PREFER_PARCELAS = 'resolution=merge-duplicates,return=minimal'
+
+
+def _chave_ferias(linha):
+    return (str(linha['efetivo_id']), int(linha['ano']))
+
+
+def _agrupar_por_colunas(linhas):
+    """Separa as linhas pelo conjunto de colunas: num POST em array todas devem ter as mesmas chaves"""
+    grupos = {}
+    for linha in linhas:
+        grupos.setdefault(tuple(sorted(linha)), []).append(linha)
+    return list(grupos.values())
+
+
+class GravadorFerias:
+    """Acumula registros de férias e grava em lote.
+
+    consulta: função no formato supabase_query(table, method, filters, data, prefer).
+    """
+
+    def __init__(self, consulta, tamanho_lote=TAMANHO_LOTE):
+        self.consulta = consulta
+        self.tamanho_lote = tamanho_lote
+        # chave (efetivo_id, ano) -> {'rotulos', 'ferias', 'parcelas'}
+        self.pendentes = {}
+        self.gravados = 0
+        self.erros = []
+        self.requisicoes = 0
+
+    def adicionar(self, rotulo, ferias, parcelas):
+        """Enfileira um registro; ferias sem fat_ferias_id nas parcelas (preenchido na gravação)"""
+        self._enfileirar(rotulo, ferias, parcelas)
+        if len(self.pendentes) >= self.tamanho_lote:
+            self.descarregar()
+
+    def _enfileirar(self, rotulo, ferias, parcelas):
+        chave = _chave_ferias(ferias)
+        pendente = self.pendentes.get(chave)
+        if pendente is None:
+            self.pendentes[chave] = {
+                'rotulos': [rotulo],
+                'ferias': dict(ferias),
+                'parcelas': {p['parcela_num']: dict(p) for p in parcelas},
+            }
+        else:
+            # Mesma pessoa/ano repetida: o último registro prevalece, como na gravação linha a linha
+            pendente['rotulos'].append(rotulo)
+            pendente['ferias'].update(ferias)
+            pendente['parcelas'].update({p['parcela_num']: dict(p) for p in parcelas})
+
+    def descarregar(self):
+        """Grava todos os registros pendentes"""
+        if not self.pendentes:
+            return
+        pendentes = list(self.pendentes.values())
+        self.pendentes = {}
+        try:
+            self._gravar(pendentes)
+        except Exception:
+            # Lote rejeitado: reenviar registro a registro para saber qual falhou
+            for pendente in pendentes:
+                try:
+                    self._gravar([pendente])
+                except Exception as e:
+                    for rotulo in pendente['rotulos']:
+                        self.erros.append(f"Erro ao processar matrícula {rotulo}: {e}")
+
+    def _post(self, tabela, linhas, conflito, prefer):
+        resultado = []
+        for grupo in _agrupar_por_colunas(linhas):
+            self.requisicoes += 1
+            resultado.extend(self.consulta(tabela, method='POST', filters={'on_conflict': conflito},
+                                           data=grupo, prefer=prefer) or [])
+        return resultado
+
+    def _parcelas_com_ids(self, pendentes, retornados):
+        """Associa os ids devolvidos por fat_ferias às parcelas; devolve (parcelas, gravados, erros)"""
+        ids = {_chave_ferias(linha): linha['id'] for linha in retornados}
+        parcelas = []
+        gravados = []
+        erros = []
+        for pendente in pendentes:
+            ferias_id = ids.get(_chave_ferias(pendente['ferias']))
+            if not ferias_id:
+                erros.extend(f"Erro ao inserir/atualizar férias para matrícula {rotulo}"
+                             for rotulo in pendente['rotulos'])
+                continue
+            gravados.append(pendente)
+            parcelas.extend(dict(p, fat_ferias_id=ferias_id) for p in pendente['parcelas'].values())
+        return parcelas, gravados, erros
+
+    def _gravar(self, pendentes):
+        retornados = self._post('fat_ferias', [p['ferias'] for p in pendentes], CONFLITO_FERIAS, PREFER_FERIAS)
+        parcelas, gravados, erros = self._parcelas_com_ids(pendentes, retornados)
+        if parcelas:
+            self._post('fat_ferias_parcelas', parcelas, CONFLITO_PARCELAS, PREFER_PARCELAS)
+        self.gravados += sum(len(p['rotulos']) for p in gravados)
+        self.erros.extend(erros)
+
+
+class GravadorFeriasAsync(GravadorFerias):
+    """Versão assíncrona: cada lote cheio vira uma tarefa e vários lotes ficam em voo ao mesmo tempo.
+
+    Cada POST é enviado em partes de até tamanho_envio linhas, todas ao mesmo tempo.
+
+    consulta: ClienteAsync.consulta (o limite de requisições simultâneas fica no cliente).
+    Uso: await gravador.adicionar(...) para cada registro e await gravador.concluir() no final.
+    """
+
+    def __init__(self, consulta, tamanho_lote=TAMANHO_LOTE, lotes_em_voo=8, tamanho_envio=TAMANHO_ENVIO_ASYNC):
+        super().__init__(consulta, tamanho_lote)
+        self.tamanho_envio = tamanho_envio
+        self._tarefas = set()
+        # chave (efetivo_id, ano) -> tarefa do lote em voo que a contém
+        self._em_voo = {}
+        # Limita os lotes acumulados em memória enquanto a planilha ainda está sendo lida
+        self._vagas = asyncio.Semaphore(lotes_em_voo)
+
+    async def adicionar(self, rotulo, ferias, parcelas):
+        # Pessoa/ano repetida num lote ainda em voo: esperar, para manter a ordem da planilha
+        tarefa = self._em_voo.get(_chave_ferias(ferias))
+        if tarefa is not None:
+            await tarefa
+        self._enfileirar(rotulo, ferias, parcelas)
+        if len(self.pendentes) >= self.tamanho_lote:
+            await self.descarregar()
+
+    async def descarregar(self):
+        """Dispara a gravação dos pendentes em segundo plano"""
+        if not self.pendentes:
+            return
+        chaves = list(self.pendentes)
+        pendentes = list(self.pendentes.values())
+        self.pendentes = {}
+        await self._vagas.acquire()
+        tarefa = asyncio.create_task(self._gravar_lote(pendentes))
+        self._tarefas.add(tarefa)
+        for chave in chaves:
+            self._em_voo[chave] = tarefa
+
+        def _finalizar(t):
+            self._tarefas.discard(t)
+            for chave in chaves:
+                if self._em_voo.get(chave) is t:
+                    del self._em_voo[chave]
+        tarefa.add_done_callback(_finalizar)
+        # Deixa o lote começar a enviar antes de voltar à leitura da planilha
+        await asyncio.sleep(0)
+
+    async def concluir(self):
+        """Envia o último lote e espera todas as gravações terminarem"""
+        await self.descarregar()
+        while self._tarefas:
+            await asyncio.gather(*self._tarefas)
+
+    async def _gravar_lote(self, pendentes):
+        try:
+            try:
+                await self._gravar(pendentes)
+            except Exception:
+                # Lote rejeitado: reenviar registro a registro para saber qual falhou
+                for pendente in pendentes:
+                    try:
+                        await self._gravar([pendente])
+                    except Exception as e:
+                        for rotulo in pendente['rotulos']:
+                            self.erros.append(f"Erro ao processar matrícula {rotulo}: {e}")
+        finally:
+            self._vagas.release()
+
+    async def _post(self, tabela, linhas, conflito, prefer):
+        grupos = [grupo[i:i + self.tamanho_envio]
+                  for grupo in _agrupar_por_colunas(linhas)
+                  for i in range(0, len(grupo), self.tamanho_envio)]
+        self.requisicoes += len(grupos)
+        respostas = await asyncio.gather(*(
+            self.consulta(tabela, method='POST', filters={'on_conflict': conflito}, data=grupo, prefer=prefer)
+            for grupo in grupos
+        ))
+        return [linha for resposta in respostas for linha in (resposta or [])]
+
+    async def _gravar(self, pendentes):
+        retornados = await self._post('fat_ferias', [p['ferias'] for p in pendentes], CONFLITO_FERIAS, PREFER_FERIAS)
+        parcelas, gravados, erros = self._parcelas_com_ids(pendentes, retornados)
+        if parcelas:
+            await self._post('fat_ferias_parcelas', parcelas, CONFLITO_PARCELAS, PREFER_PARCELAS)
+        self.gravados += sum(len(p['rotulos']) for p in gravados)
+        self.erros.extend(erros)
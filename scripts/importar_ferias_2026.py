@@ -2,27 +2,25 @@
 Script para importar dados de férias 2026 do arquivo Excel
 Extrai dados da aba "02 | FÉRIAS 2026 PRAÇAS" e atualiza fat_ferias e fat_ferias_parcelas
 """
+import argparse
+import asyncio
+import math
 import pandas as pd
 import sys
 import os
 from datetime import datetime
 import re
-from dotenv import load_dotenv
-import requests
 import json
+from itertools import chain
 
-# Carregar variáveis de ambiente
-load_dotenv()
-
-# Configuração do Supabase
-SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
-# Tentar service_role primeiro (tem acesso completo), senão usar anon_key
-# Verificar múltiplos formatos de variável
-SUPABASE_KEY = (
-    os.getenv('SUPABASE_SERVICE_ROLE_KEY') or 
-    os.getenv('VITE_SUPABASE_SERVICE_ROLE_KEY') or 
-    os.getenv('VITE_SUPABASE_ANON_KEY')
-)
+import cache_efetivo
+from cache_planilhas import ler_aba
+from esquema_planilha import TAMANHO_BLOCO, TAMANHO_BLOCO_STREAM, MapaColunas, em_blocos, extrair_bloco, mapear_lista
+from leitor_xlsx import iterar_linhas, linhas_dataframe
+from resolver_efetivo import ResolvedorMatriculas
+from gravador_ferias import GravadorFerias, GravadorFeriasAsync
+from supabase_async import CONCORRENCIA, ClienteAsync
+from supabase_client import SUPABASE_KEY, SUPABASE_URL, USANDO_SERVICE_ROLE, imprimir_metricas, supabase_query
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("ERRO: Variáveis de ambiente SUPABASE_URL e SUPABASE_KEY não encontradas!")
@@ -32,7 +30,7 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     print("  - Ou VITE_SUPABASE_ANON_KEY (pode ter limitações de RLS)")
     sys.exit(1)
 
-if os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('VITE_SUPABASE_SERVICE_ROLE_KEY'):
+if USANDO_SERVICE_ROLE:
     print("Usando SUPABASE_SERVICE_ROLE_KEY (acesso completo)", flush=True)
     # Verificar se a chave parece completa (JWT geralmente tem 3 partes separadas por ponto)
     if SUPABASE_KEY.count('.') < 2:
@@ -41,54 +39,6 @@ if os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('VITE_SUPABASE_SERVICE_RO
 else:
     print("AVISO: Usando VITE_SUPABASE_ANON_KEY - pode ter limitacoes de RLS", flush=True)
 
-# URL base do PostgREST do Supabase
-POSTGREST_URL = f"{SUPABASE_URL}/rest/v1"
-
-# Headers para todas as requisições
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
-
-def supabase_query(table, method='GET', filters=None, data=None):
-    """Função helper para fazer queries no Supabase via PostgREST"""
-    url = f"{POSTGREST_URL}/{table}"
-    
-    # Timeout de 30 segundos para evitar travamentos
-    timeout = 30
-    
-    try:
-        if method == 'GET':
-            # Construir query string para filtros do PostgREST
-            # PostgREST usa formato: ?select=id&campo=eq.valor&limit=1
-            params = {}
-            if filters:
-                for key, value in filters.items():
-                    params[key] = value
-            response = requests.get(url, headers=HEADERS, params=params, timeout=timeout)
-        elif method == 'POST':
-            response = requests.post(url, headers=HEADERS, json=data, timeout=timeout)
-        elif method == 'PATCH':
-            # Para PATCH, os filtros vão na query string
-            params = {}
-            if filters:
-                for key, value in filters.items():
-                    params[key] = value
-            response = requests.patch(url, headers=HEADERS, params=params, json=data, timeout=timeout)
-        else:
-            raise ValueError(f"Método HTTP não suportado: {method}")
-        
-        if response.status_code >= 400:
-            raise Exception(f"Erro na requisição: {response.status_code} - {response.text}")
-        
-        return response.json() if response.text else []
-    except requests.exceptions.Timeout:
-        raise Exception(f"Timeout ao acessar {url} - requisição demorou mais de {timeout} segundos")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Erro de conexão ao acessar {url}: {str(e)}")
-
 # Caminho do arquivo Excel
 EXCEL_PATH = r'G:\Meu Drive\JP\app BPMA\AFASTAMENTOS BPMA [2026] (1).xlsx'
 ABA_NOME = '02 | FÉRIAS 2026 PRAÇAS'
@@ -97,61 +47,57 @@ print(f"Iniciando importacao de ferias 2026...", flush=True)
 print(f"Arquivo Excel: {EXCEL_PATH}", flush=True)
 print(f"Aba: {ABA_NOME}", flush=True)
 
-# Mapeamento de meses
-MESES_ABREV = {
-    'JAN': 1, 'FEV': 2, 'MAR': 3, 'ABR': 4, 'MAI': 5, 'JUN': 6,
-    'JUL': 7, 'AGO': 8, 'SET': 9, 'OUT': 10, 'NOV': 11, 'DEZ': 12
-}
+# Cache de matrículas já buscadas
+_matricula_cache = {}
+# Índice de dim_efetivo carregado em lote (ver preparar_resolvedor)
+_resolvedor = None
 
-def parse_date(date_str, ano_base=2026):
-    """Converte string de data para objeto date"""
-    if pd.isna(date_str) or date_str == '':
-        return None
-    
-    date_str = str(date_str).strip()
-    
-    # Formato DD/MM ou DD/MM/YYYY
-    if '/' in date_str:
-        parts = date_str.split('/')
-        if len(parts) == 2:
-            dia, mes = int(parts[0]), int(parts[1])
-            return datetime(ano_base, mes, dia).date()
-        elif len(parts) == 3:
-            dia, mes, ano = int(parts[0]), int(parts[1]), int(parts[2])
-            return datetime(ano, mes, dia).date()
-    
-    # Formato apenas mês (ex: "JAN", "FEV")
-    if date_str.upper() in MESES_ABREV:
-        # Retorna primeiro dia do mês
-        return datetime(ano_base, MESES_ABREV[date_str.upper()], 1).date()
-    
-    return None
+def _verificar_erro_autenticacao(error_msg):
+    """Interrompe a importação se a chave de API for inválida"""
+    if '401' in error_msg or 'Invalid API key' in error_msg:
+        print(f"\nERRO CRÍTICO: Chave de API inválida ou expirada!")
+        print(f"Verifique se a chave SUPABASE_SERVICE_ROLE_KEY ou VITE_SUPABASE_SERVICE_ROLE_KEY está correta no arquivo .env")
+        print(f"Obtenha a chave correta em: https://supabase.com/dashboard/project/oiwwptnqaunsyhpkwbrz/settings/api")
+        raise Exception("Chave de API inválida. Verifique o arquivo .env")
 
-def parse_mes(mes_str):
-    """Converte string de mês para número"""
-    if pd.isna(mes_str) or mes_str == '':
-        return None
-    
-    mes_str = str(mes_str).strip().upper()
-    
-    if mes_str in MESES_ABREV:
-        return MESES_ABREV[mes_str]
-    
-    # Tentar parsear como número
+def preparar_resolvedor(matriculas=None):
+    """Carrega dim_efetivo em lote: do snapshot local (cache_efetivo.py) ou, sem ele, as matrículas informadas (in.(...)) ou a tabela inteira"""
+    global _resolvedor
+    _resolvedor = cache_efetivo.carregar_resolvedor(supabase_query)
+    if _resolvedor is not None:
+        return
+    _resolvedor = ResolvedorMatriculas(supabase_query)
     try:
-        mes_num = int(mes_str)
-        if 1 <= mes_num <= 12:
-            return mes_num
-    except:
-        pass
-    
-    return None
+        if matriculas is None:
+            _resolvedor.carregar_todos()
+        else:
+            _resolvedor.carregar(matriculas)
+    except Exception as e:
+        _verificar_erro_autenticacao(str(e))
+        print(f"AVISO: Falha ao carregar matrículas em lote: {e}")
+    print(f"Matrículas carregadas em {_resolvedor.requisicoes} requisições", flush=True)
 
-# Cache de matrículas já buscadas
-_matricula_cache = {}
+async def preparar_resolvedor_async(cliente, matriculas=None):
+    """preparar_resolvedor() com as requisições em paralelo pelo ClienteAsync"""
+    global _resolvedor
+    # O snapshot usa o cliente síncrono: fora do loop de eventos
+    _resolvedor = await asyncio.to_thread(cache_efetivo.carregar_resolvedor, supabase_query)
+    if _resolvedor is not None:
+        return
+    _resolvedor = ResolvedorMatriculas(supabase_query)
+    try:
+        if matriculas is None:
+            await _resolvedor.carregar_todos_async(cliente.consulta, cliente.concorrencia)
+        else:
+            await _resolvedor.carregar_async(cliente.consulta, matriculas)
+    except Exception as e:
+        _verificar_erro_autenticacao(str(e))
+        print(f"AVISO: Falha ao carregar matrículas em lote: {e}")
+    print(f"Matrículas carregadas em {_resolvedor.requisicoes} requisições", flush=True)
 
 def get_efetivo_id_by_matricula(matricula, debug=False):
     """Busca efetivo_id pela matrícula com cache"""
+    global _resolvedor
     if pd.isna(matricula) or matricula == '':
         return None
     
@@ -161,373 +107,350 @@ def get_efetivo_id_by_matricula(matricula, debug=False):
     if matricula in _matricula_cache:
         return _matricula_cache[matricula]
     
-    # Tentar diferentes formatos de busca
-    formatos_tentar = [
-        matricula,  # Formato original
-        matricula.lstrip('0'),  # Sem zeros à esquerda
+    if _resolvedor is None:
+        _resolvedor = ResolvedorMatriculas(supabase_query)
+    
+    # O resolvedor tenta o formato original, sem zeros à esquerda e com 8 dígitos
+    try:
+        efetivo_id = _resolvedor.resolver(matricula)
+    except Exception as e:
+        error_msg = str(e)
+        if debug:
+            print(f"  [ERRO] Erro ao buscar {matricula}: {error_msg}")
+        # Se for erro de autenticação, não continuar tentando
+        _verificar_erro_autenticacao(error_msg)
+        efetivo_id = None
+    
+    if efetivo_id and debug:
+        print(f"  [OK] Matrícula {matricula} encontrada")
+    
+    # Armazenar no cache (inclusive None, para não tentar novamente)
+    _matricula_cache[matricula] = efetivo_id
+    return efetivo_id
+
+# Mapear colunas conforme legenda fornecida
+# Coluna Q = Matrícula (índice 16, 0-based)
+# Coluna R = Graduação/Posto (índice 17)
+# Coluna T = Nome Completo (índice 19)
+# Coluna V = UPM (índice 21)
+# Coluna W = Ano de referência (índice 22)
+# Coluna X = Ano a ser gozada (índice 23)
+# Coluna Y = Número do processo SEI (índice 24)
+
+# Parcelas:
+# 1ª parcela: Z (dias), AA (início), AB (término), AC (livro), AD (SGPOL), AE (Campanha)
+# 2ª parcela: AF (dias), AG (início), AH (término), AI (livro), AJ (SGPOL), AK (Campanha)
+# 3ª parcela: AL (dias), AM (início), AN (término), AO (livro), AP (SGPOL), AQ (Campanha)
+
+COL_MATRICULA = 16  # Q
+COL_POSTO = 17      # R
+COL_NOME = 19       # T
+COL_UPM = 21        # V
+COL_ANO_REF = 22    # W
+COL_ANO_GOZADA = 23 # X
+COL_PROCESSO_SEI = 24 # Y
+
+# Primeira coluna (dias) de cada parcela: Z, AF, AL
+COLUNAS_PARCELAS = (25, 31, 37)
+ANO_PADRAO = 2026
+
+# Linhas analisadas para encontrar o cabeçalho (pela coluna Q e, em último caso, pela primeira matrícula)
+LINHAS_BUSCA_CABECALHO = 30
+LINHAS_BUSCA_MATRICULA = 50
+
+# Campo da parcela -> (posição dentro do bloco de 6 colunas, tipo); o mês vem da coluna de início
+CAMPOS_PARCELA = {
+    'dias': (0, 'numero'),
+    'inicio': (1, 'data'),
+    'termino': (2, 'data'),
+    'mes': (1, 'mes'),
+    'livro': (3, 'booleano'),
+    'sgpol': (4, 'booleano'),
+    'campanha': (5, 'booleano'),
+}
+
+MAPA_COLUNAS = MapaColunas(
+    campos={
+        'matricula': (COL_MATRICULA, 'cru'),
+        'ano_gozada': (COL_ANO_GOZADA, 'numero'),
+        'processo_sei': (COL_PROCESSO_SEI, 'texto'),
+    },
+    parcelas=[
+        (num, {campo: (inicio + posicao, tipo) for campo, (posicao, tipo) in CAMPOS_PARCELA.items()})
+        for num, inicio in enumerate(COLUNAS_PARCELAS, start=1)
+    ],
+)
+
+def _celula(row, col):
+    """Valor da célula ou None se a linha for mais curta (o modo streaming não completa as linhas)"""
+    return row[col] if col < len(row) else None
+
+def _eh_cabecalho_matricula(row):
+    """Verifica se a célula da coluna Q é o título "MAT"/"MATRÍCULA" """
+    valor = _celula(row, COL_MATRICULA)
+    cell_value = str(valor).strip().upper() if not pd.isna(valor) else ''
+    # Procurar por "MAT" seguido de espaço ou fim de string (para pegar "MAT" ou "MATRÍCULA")
+    return cell_value == 'MAT' or cell_value.startswith('MATR')
+
+def inferir_linha_cabecalho(linhas):
+    """Procura a primeira linha com matrícula numérica e infere o cabeçalho nas linhas anteriores"""
+    for i in range(5, min(LINHAS_BUSCA_MATRICULA, len(linhas))):
+        cell_value = _celula(linhas[i], COL_MATRICULA)
+        if pd.notna(cell_value):
+            matricula_test = str(cell_value).strip()
+            # Verificar se parece uma matrícula (número ou número com X)
+            matricula_clean = matricula_test.replace('X', '').replace('x', '').replace('-', '').replace('.', '')
+            if matricula_clean.isdigit() and len(matricula_clean) >= 4:
+                # Verificar linhas anteriores para encontrar cabeçalho
+                for j in range(max(0, i-5), i):
+                    prev = _celula(linhas[j], COL_MATRICULA)
+                    prev_cell = str(prev).strip().upper() if pd.notna(prev) else ''
+                    if prev_cell == 'MAT' or prev_cell.startswith('MATR') or prev_cell == '':
+                        header_row = j if prev_cell else j + 1
+                        print(f"Linha de cabeçalho inferida na linha {header_row + 1} (primeira matrícula encontrada na linha {i + 1}: {matricula_test})")
+                        return header_row
+    return None
+
+# Textos da coluna Q que não são matrículas (títulos e separadores de mês)
+PALAVRAS_IGNORAR = {'MATRÍCULA', 'MATRICULA', 'MAT', 'JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 'JULHO',
+                    'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO', 'NAN', ''}
+
+def _matricula_valida(valor):
+    """Matrícula da célula (texto) ou None: válidas são números ou números com 'X' no final"""
+    if pd.isna(valor):
+        return None
+    matricula = str(valor).strip()
+    if matricula.upper() in PALAVRAS_IGNORAR:
+        return None
+    matricula_clean = matricula.replace('X', '').replace('x', '').replace('-', '').replace('.', '').replace(' ', '')
+    if not matricula_clean.isdigit() or len(matricula_clean) < 4:
+        return None
+    return matricula
+
+def _anos_gozada(campos):
+    return [ANO_PADRAO if math.isnan(ano) else ano for ano in campos['ano_gozada']]
+
+def _parcelas_do_bloco(num, parcela):
+    """Dicionário da parcela em cada linha do bloco (None se a linha não tem dias na parcela)"""
+    # int() trunca como antes (15.5 -> 15); NaN e não positivos ficam de fora
+    return [
+        {
+            'parcela_num': num,
+            'dias': int(dias),
+            'data_inicio': inicio.isoformat() if inicio else None,
+            'data_fim': termino.isoformat() if termino else None,
+            'mes': mes,
+            'lancado_livro': livro,
+            'lancado_sgpol': sgpol,
+            'lancado_campanha': campanha,
+        } if dias > 0 else None
+        for dias, inicio, termino, mes, livro, sgpol, campanha in zip(
+            parcela['dias'], parcela['inicio'], parcela['termino'], parcela['mes'],
+            parcela['livro'], parcela['sgpol'], parcela['campanha'],
+        )
     ]
+
+def extrair_registros(indices, linhas):
+    """(número da linha, registro) das linhas válidas de um bloco, com as colunas convertidas de uma vez"""
+    bloco = extrair_bloco(linhas, MAPA_COLUNAS, ano_base=_anos_gozada)
+    matriculas = mapear_lista(bloco.campos['matricula'], _matricula_valida)
+    anos = [int(ano) for ano in _anos_gozada(bloco.campos)]
+    processos = bloco.campos['processo_sei']
+    parcelas = zip(*(_parcelas_do_bloco(num, parcela) for num, parcela in bloco.parcelas))
+    for indice, matricula, ano, processo_sei, parcelas_linha in zip(indices, matriculas, anos, processos, parcelas):
+        if matricula is None:
+            continue
+        yield indice, {
+            'matricula': matricula,
+            'ano_gozada': ano,
+            'processo_sei': processo_sei,
+            'parcelas': [parcela for parcela in parcelas_linha if parcela is not None],
+        }
+
+def iterar_registros(linhas, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera (número da linha, registro) à medida que as linhas chegam.
+
+    Só as primeiras linhas ficam em buffer, enquanto o cabeçalho é procurado; depois disso
+    as linhas são convertidas em blocos de tamanho_bloco (esquema_planilha.py). No modo
+    streaming use TAMANHO_BLOCO_STREAM, para os registros saírem durante a leitura.
+    """
+    linhas = enumerate(linhas)
+    buffer = []
+    header_row = None
     
-    # Remover duplicatas mantendo ordem
-    formatos_tentar = list(dict.fromkeys(formatos_tentar))
+    for idx, row in linhas:
+        buffer.append(row)
+        if idx < LINHAS_BUSCA_CABECALHO and _eh_cabecalho_matricula(row):
+            header_row = idx
+            print(f"Linha de cabeçalho encontrada na linha {idx + 1}: '{_celula(row, COL_MATRICULA)}'")
+            break
+        if len(buffer) == LINHAS_BUSCA_MATRICULA:
+            # Se não encontrou, procurar pela primeira linha que tenha um número válido na coluna Q
+            # e verificar se a linha anterior tem cabeçalho
+            print("Procurando cabeçalho pela primeira linha com dados numéricos...")
+            header_row = inferir_linha_cabecalho(buffer)
+            break
+    else:
+        # Planilha com menos linhas do que a janela de busca
+        print("Procurando cabeçalho pela primeira linha com dados numéricos...")
+        header_row = inferir_linha_cabecalho(buffer)
     
-    for formato in formatos_tentar:
+    if header_row is None:
+        print("ERRO: Não foi possível encontrar a linha de cabeçalho!")
+        print("\nPrimeiras 20 linhas da coluna Q (matrícula):")
+        for i, row in enumerate(buffer[:20]):
+            cell_val = _celula(row, COL_MATRICULA)
+            print(f"  Linha {i + 1}: {cell_val} (tipo: {type(cell_val).__name__})")
+        return
+    
+    print(f"Linha de cabeçalho confirmada: {header_row + 1}")
+    dados = chain(enumerate(buffer[header_row + 1:], start=header_row + 1), linhas)
+    for indices, bloco in em_blocos(dados, tamanho_bloco):
+        yield from extrair_registros(indices, bloco)
+
+def montar_linhas_ferias(efetivo_id, registro):
+    """Linhas de fat_ferias e fat_ferias_parcelas (sem fat_ferias_id) de um registro"""
+    parcelas = registro['parcelas']
+    processo_sei = registro['processo_sei']
+    
+    # Calcular totais
+    total_dias = sum(p['dias'] for p in parcelas)
+    tipo = 'INTEGRAL' if len(parcelas) == 1 and total_dias == 30 else 'PARCELADA'
+    
+    # Determinar mes_inicio (primeira parcela)
+    mes_inicio = parcelas[0]['mes'] if parcelas[0]['mes'] else None
+    if not mes_inicio and parcelas[0]['data_inicio']:
+        mes_inicio = datetime.fromisoformat(parcelas[0]['data_inicio']).month
+    
+    ferias = {
+        'efetivo_id': efetivo_id,
+        'ano': registro['ano_gozada'],
+        'mes_inicio': mes_inicio,
+        'dias': total_dias,
+        'tipo': tipo,
+        'minuta_data_inicio': parcelas[0]['data_inicio'],
+        'minuta_data_fim': parcelas[-1]['data_fim']
+    }
+    # Sem SEI na planilha, o valor já gravado é mantido (coluna fora do upsert)
+    if processo_sei:
+        ferias['numero_processo_sei'] = processo_sei
+    
+    linhas_parcelas = [{
+        'parcela_num': parcela['parcela_num'],
+        'dias': parcela['dias'],
+        'data_inicio': parcela['data_inicio'],
+        'data_fim': parcela['data_fim'],
+        'mes': str(parcela['mes']) if parcela['mes'] else None,
+        'lancado_livro': parcela['lancado_livro'],
+        'lancado_sgpol': parcela['lancado_sgpol'],
+        'lancado_campanha': parcela['lancado_campanha']
+    } for parcela in parcelas]
+    
+    return ferias, linhas_parcelas
+
+def registros_para_gravar(registros, estado):
+    """Resolve a matrícula de cada registro e gera (matrícula, fat_ferias, parcelas) para o gravador"""
+    for idx, registro in registros:
+        matricula = registro['matricula']
+        
+        # Buscar efetivo_id (debug nas primeiras 5 para entender o problema)
+        debug_mode = estado['processados'] < 5
+        if debug_mode:
+            print(f"\nProcessando linha {idx + 1}, matrícula: {matricula}")
+        
+        efetivo_id = get_efetivo_id_by_matricula(matricula, debug=debug_mode)
+        if not efetivo_id:
+            if debug_mode:
+                print(f"  [NAO ENCONTRADA] Matrícula {matricula} não encontrada no banco")
+            # Não adicionar ao erro imediatamente, apenas contar
+            estado['processados'] += 1
+            if estado['processados'] % 50 == 0:
+                print(f"Processadas {estado['processados']} linhas... ({len(_matricula_cache)} matrículas verificadas, {sum(1 for v in _matricula_cache.values() if v is not None)} encontradas)")
+            continue
+        
+        if not registro['parcelas']:
+            continue
+        
         try:
-            result = supabase_query('dim_efetivo', method='GET', filters={
-                'matricula': f'eq.{formato}',
-                'select': 'id',
-                'limit': '1'
-            })
-            if result and len(result) > 0:
-                efetivo_id = result[0]['id']
-                # Armazenar no cache
-                _matricula_cache[matricula] = efetivo_id
-                if debug:
-                    print(f"  [OK] Matrícula {matricula} encontrada (formato usado: {formato})")
-                return efetivo_id
+            ferias, parcelas = montar_linhas_ferias(efetivo_id, registro)
         except Exception as e:
-            error_msg = str(e)
-            if debug:
-                print(f"  [ERRO] Erro ao buscar {matricula} (formato {formato}): {error_msg}")
-            # Se for erro de autenticação, não continuar tentando
-            if '401' in error_msg or 'Invalid API key' in error_msg:
-                print(f"\nERRO CRÍTICO: Chave de API inválida ou expirada!")
-                print(f"Verifique se a chave SUPABASE_SERVICE_ROLE_KEY ou VITE_SUPABASE_SERVICE_ROLE_KEY está correta no arquivo .env")
-                print(f"Obtenha a chave correta em: https://supabase.com/dashboard/project/oiwwptnqaunsyhpkwbrz/settings/api")
-                raise Exception("Chave de API inválida. Verifique o arquivo .env")
-            # Continuar tentando outros formatos para outros erros
+            estado['erros'].append(f"Erro ao processar matrícula {matricula}: {str(e)}")
+            print(f"ERRO ao processar {matricula}: {e}")
             continue
-    
-    # Se não encontrou, armazenar None no cache para não tentar novamente
-    _matricula_cache[matricula] = None
-    return None
+        
+        estado['processados'] += 1
+        if estado['processados'] % 10 == 0:
+            print(f"Processados {estado['processados']} registros...")
+        yield matricula, ferias, parcelas
+
+async def gravar_async(registros, stream, concorrencia, estado):
+    """Modo --async: resolução e upserts em lote com várias requisições simultâneas"""
+    async with ClienteAsync(concorrencia) as cliente:
+        if stream:
+            await preparar_resolvedor_async(cliente)
+        else:
+            await preparar_resolvedor_async(cliente, [registro['matricula'] for _, registro in registros])
+        gravador = GravadorFeriasAsync(cliente.consulta, lotes_em_voo=concorrencia)
+        for matricula, ferias, parcelas in registros_para_gravar(registros, estado):
+            await gravador.adicionar(matricula, ferias, parcelas)
+        await gravador.concluir()
+    return gravador
 
-def processar_ferias_excel():
+def processar_ferias_excel(stream=False, assincrono=False, concorrencia=CONCORRENCIA):
     """Processa o arquivo Excel e importa dados de férias"""
     
     print(f"Lendo arquivo Excel: {EXCEL_PATH}")
     print(f"Aba: {ABA_NOME}")
     
     try:
-        # Ler a aba específica
-        print(f"Lendo arquivo Excel: {EXCEL_PATH}")
-        print(f"Aba: {ABA_NOME}")
-        
         # Verificar se arquivo existe
         if not os.path.exists(EXCEL_PATH):
             print(f"ERRO: Arquivo não encontrado: {EXCEL_PATH}")
             return
         
-        print("Arquivo encontrado. Lendo dados...", flush=True)
-        print("Isso pode demorar alguns segundos para arquivos grandes...", flush=True)
-        try:
-            df = pd.read_excel(EXCEL_PATH, sheet_name=ABA_NOME, header=None, engine='openpyxl')
-            print(f"Arquivo lido com sucesso. Dimensoes: {df.shape}", flush=True)
-        except Exception as e:
-            print(f"ERRO ao ler arquivo Excel: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
-            return
-        
-        # Encontrar linha de cabeçalho procurando pela coluna Q (índice 16)
-        # A legenda diz que coluna Q = Matrícula
-        COL_MATRICULA = 16  # Coluna Q
-        
-        # Primeiro, procurar por texto "MAT" ou "MATR" na coluna Q
-        header_row = None
-        for i in range(min(30, len(df))):
-            if COL_MATRICULA < len(df.columns):
-                cell_value = str(df.iloc[i, COL_MATRICULA]).strip().upper() if pd.notna(df.iloc[i, COL_MATRICULA]) else ''
-                # Procurar por "MAT" seguido de espaço ou fim de string (para pegar "MAT" ou "MATRÍCULA")
-                if cell_value == 'MAT' or cell_value.startswith('MATR'):
-                    header_row = i
-                    print(f"Linha de cabeçalho encontrada na linha {i + 1}: '{df.iloc[i, COL_MATRICULA]}'")
-                    break
-        
-        # Se não encontrou, procurar pela primeira linha que tenha um número válido na coluna Q
-        # e verificar se a linha anterior tem cabeçalho
-        if header_row is None:
-            print("Procurando cabeçalho pela primeira linha com dados numéricos...")
-            for i in range(5, min(50, len(df))):
-                if COL_MATRICULA < len(df.columns):
-                    cell_value = df.iloc[i, COL_MATRICULA]
-                    if pd.notna(cell_value):
-                        matricula_test = str(cell_value).strip()
-                        # Verificar se parece uma matrícula (número ou número com X)
-                        matricula_clean = matricula_test.replace('X', '').replace('x', '').replace('-', '').replace('.', '')
-                        if matricula_clean.isdigit() and len(matricula_clean) >= 4:
-                            # Verificar linhas anteriores para encontrar cabeçalho
-                            for j in range(max(0, i-5), i):
-                                prev_cell = str(df.iloc[j, COL_MATRICULA]).strip().upper() if pd.notna(df.iloc[j, COL_MATRICULA]) else ''
-                                if prev_cell == 'MAT' or prev_cell.startswith('MATR') or prev_cell == '':
-                                    header_row = j if prev_cell else j + 1
-                                    print(f"Linha de cabeçalho inferida na linha {header_row + 1} (primeira matrícula encontrada na linha {i + 1}: {matricula_test})")
-                                    break
-                            if header_row is not None:
-                                break
-        
-        if header_row is None:
-            print("ERRO: Não foi possível encontrar a linha de cabeçalho!")
-            print("\nPrimeiras 20 linhas da coluna Q (matrícula):")
-            for i in range(min(20, len(df))):
-                if COL_MATRICULA < len(df.columns):
-                    cell_val = df.iloc[i, COL_MATRICULA]
-                    print(f"  Linha {i + 1}: {cell_val} (tipo: {type(cell_val).__name__})")
-            return
-        
-        print(f"Linha de cabeçalho confirmada: {header_row + 1}")
-        
-        # Mapear colunas conforme legenda fornecida
-        # Coluna Q = Matrícula (índice 16, 0-based)
-        # Coluna R = Graduação/Posto (índice 17)
-        # Coluna T = Nome Completo (índice 19)
-        # Coluna V = UPM (índice 21)
-        # Coluna W = Ano de referência (índice 22)
-        # Coluna X = Ano a ser gozada (índice 23)
-        # Coluna Y = Número do processo SEI (índice 24)
-        
-        # Parcelas:
-        # 1ª parcela: Z (dias), AA (início), AB (término), AC (livro), AD (SGPOL), AE (Campanha)
-        # 2ª parcela: AF (dias), AG (início), AH (término), AI (livro), AJ (SGPOL), AK (Campanha)
-        # 3ª parcela: AL (dias), AM (início), AN (término), AO (livro), AP (SGPOL), AQ (Campanha)
-        
-        COL_MATRICULA = 16  # Q
-        COL_POSTO = 17      # R
-        COL_NOME = 19       # T
-        COL_UPM = 21        # V
-        COL_ANO_REF = 22    # W
-        COL_ANO_GOZADA = 23 # X
-        COL_PROCESSO_SEI = 24 # Y
-        
-        # 1ª parcela
-        COL_P1_DIAS = 25    # Z
-        COL_P1_INICIO = 26  # AA
-        COL_P1_TERMINO = 27 # AB
-        COL_P1_LIVRO = 28   # AC
-        COL_P1_SGPOL = 29   # AD
-        COL_P1_CAMPANHA = 30 # AE
-        
-        # 2ª parcela
-        COL_P2_DIAS = 31    # AF
-        COL_P2_INICIO = 32  # AG
-        COL_P2_TERMINO = 33 # AH
-        COL_P2_LIVRO = 34   # AI
-        COL_P2_SGPOL = 35   # AJ
-        COL_P2_CAMPANHA = 36 # AK
-        
-        # 3ª parcela
-        COL_P3_DIAS = 37    # AL
-        COL_P3_INICIO = 38  # AM
-        COL_P3_TERMINO = 39 # AN
-        COL_P3_LIVRO = 40   # AO
-        COL_P3_SGPOL = 41   # AP
-        COL_P3_CAMPANHA = 42 # AQ
-        
-        registros_processados = 0
-        registros_inseridos = 0
-        erros = []
+        if stream:
+            # Linhas chegam enquanto a aba é decodificada (openpyxl read_only)
+            print("Arquivo encontrado. Lendo dados em modo streaming...", flush=True)
+            linhas = iterar_linhas(EXCEL_PATH, ABA_NOME)
+        else:
+            print("Arquivo encontrado. Lendo dados...", flush=True)
+            print("Isso pode demorar alguns segundos para arquivos grandes...", flush=True)
+            try:
+                df = ler_aba(EXCEL_PATH, ABA_NOME)
+                print(f"Arquivo lido com sucesso. Dimensoes: {df.shape}", flush=True)
+            except Exception as e:
+                print(f"ERRO ao ler arquivo Excel: {e}", flush=True)
+                import traceback
+                traceback.print_exc()
+                return
+            linhas = linhas_dataframe(df)
+            print(f"Iniciando processamento de {len(df)} linhas...")
         
-        total_linhas = len(df) - header_row - 1
-        print(f"Iniciando processamento de {total_linhas} linhas de dados...")
+        estado = {'processados': 0, 'erros': []}
+        registros = iterar_registros(linhas, TAMANHO_BLOCO_STREAM) if stream else list(iterar_registros(linhas))
         
-        # Processar cada linha de dados (começar após o cabeçalho)
-        for idx in range(header_row + 1, len(df)):
-            row = df.iloc[idx]
-            
-            # Verificar se há matrícula (coluna Q)
-            if COL_MATRICULA >= len(row):
-                continue
-                
-            matricula_raw = row.iloc[COL_MATRICULA]
-            
-            if pd.isna(matricula_raw):
-                continue
-            
-            matricula = str(matricula_raw).strip()
-            
-            # Pular linhas que não são matrículas válidas
-            # Matrículas válidas são números ou números com 'X' no final
-            palavras_ignorar = ['MATRÍCULA', 'MATRICULA', 'MAT', 'JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO', 'NAN', '']
-            if not matricula or matricula.upper() in palavras_ignorar:
-                continue
-            
-            # Validar formato de matrícula (deve ser número ou número com X)
-            # Remover caracteres especiais e verificar se é número
-            matricula_clean = matricula.replace('X', '').replace('x', '').replace('-', '').replace('.', '').replace(' ', '')
-            if not matricula_clean.isdigit() or len(matricula_clean) < 4:
-                continue
-            
-            # Buscar efetivo_id (debug nas primeiras 5 para entender o problema)
-            debug_mode = registros_processados < 5
-            if debug_mode:
-                print(f"\nProcessando linha {idx + 1}, matrícula: {matricula}")
-            
-            efetivo_id = get_efetivo_id_by_matricula(matricula, debug=debug_mode)
-            if not efetivo_id:
-                if debug_mode:
-                    print(f"  [NAO ENCONTRADA] Matrícula {matricula} não encontrada no banco")
-                # Não adicionar ao erro imediatamente, apenas contar
-                registros_processados += 1
-                if registros_processados % 50 == 0:
-                    print(f"Processadas {registros_processados} linhas... ({len(_matricula_cache)} matrículas verificadas, {sum(1 for v in _matricula_cache.values() if v is not None)} encontradas)")
-                continue
-            
-            # Ler dados básicos
-            ano_gozada = int(row.iloc[COL_ANO_GOZADA]) if COL_ANO_GOZADA < len(row) and not pd.isna(row.iloc[COL_ANO_GOZADA]) else 2026
-            processo_sei = str(row.iloc[COL_PROCESSO_SEI]).strip() if COL_PROCESSO_SEI < len(row) and not pd.isna(row.iloc[COL_PROCESSO_SEI]) else None
-            
-            # Processar parcelas
-            parcelas = []
-            
-            # 1ª parcela
-            p1_dias = row.iloc[COL_P1_DIAS] if COL_P1_DIAS < len(row) and not pd.isna(row.iloc[COL_P1_DIAS]) else None
-            if p1_dias and p1_dias > 0:
-                p1_inicio = parse_date(row.iloc[COL_P1_INICIO] if COL_P1_INICIO < len(row) else None, ano_gozada)
-                p1_termino = parse_date(row.iloc[COL_P1_TERMINO] if COL_P1_TERMINO < len(row) else None, ano_gozada)
-                p1_mes = parse_mes(row.iloc[COL_P1_INICIO] if COL_P1_INICIO < len(row) else None)
-                
-                parcelas.append({
-                    'parcela_num': 1,
-                    'dias': int(p1_dias),
-                    'data_inicio': p1_inicio.isoformat() if p1_inicio else None,
-                    'data_fim': p1_termino.isoformat() if p1_termino else None,
-                    'mes': p1_mes,
-                    'lancado_livro': bool(row.iloc[COL_P1_LIVRO] if COL_P1_LIVRO < len(row) and not pd.isna(row.iloc[COL_P1_LIVRO]) else False),
-                    'lancado_sgpol': bool(row.iloc[COL_P1_SGPOL] if COL_P1_SGPOL < len(row) and not pd.isna(row.iloc[COL_P1_SGPOL]) else False),
-                    'lancado_campanha': bool(row.iloc[COL_P1_CAMPANHA] if COL_P1_CAMPANHA < len(row) and not pd.isna(row.iloc[COL_P1_CAMPANHA]) else False)
-                })
-            
-            # 2ª parcela
-            p2_dias = row.iloc[COL_P2_DIAS] if COL_P2_DIAS < len(row) and not pd.isna(row.iloc[COL_P2_DIAS]) else None
-            if p2_dias and p2_dias > 0:
-                p2_inicio = parse_date(row.iloc[COL_P2_INICIO] if COL_P2_INICIO < len(row) else None, ano_gozada)
-                p2_termino = parse_date(row.iloc[COL_P2_TERMINO] if COL_P2_TERMINO < len(row) else None, ano_gozada)
-                p2_mes = parse_mes(row.iloc[COL_P2_INICIO] if COL_P2_INICIO < len(row) else None)
-                
-                parcelas.append({
-                    'parcela_num': 2,
-                    'dias': int(p2_dias),
-                    'data_inicio': p2_inicio.isoformat() if p2_inicio else None,
-                    'data_fim': p2_termino.isoformat() if p2_termino else None,
-                    'mes': p2_mes,
-                    'lancado_livro': bool(row.iloc[COL_P2_LIVRO] if COL_P2_LIVRO < len(row) and not pd.isna(row.iloc[COL_P2_LIVRO]) else False),
-                    'lancado_sgpol': bool(row.iloc[COL_P2_SGPOL] if COL_P2_SGPOL < len(row) and not pd.isna(row.iloc[COL_P2_SGPOL]) else False),
-                    'lancado_campanha': bool(row.iloc[COL_P2_CAMPANHA] if COL_P2_CAMPANHA < len(row) and not pd.isna(row.iloc[COL_P2_CAMPANHA]) else False)
-                })
-            
-            # 3ª parcela
-            p3_dias = row.iloc[COL_P3_DIAS] if COL_P3_DIAS < len(row) and not pd.isna(row.iloc[COL_P3_DIAS]) else None
-            if p3_dias and p3_dias > 0:
-                p3_inicio = parse_date(row.iloc[COL_P3_INICIO] if COL_P3_INICIO < len(row) else None, ano_gozada)
-                p3_termino = parse_date(row.iloc[COL_P3_TERMINO] if COL_P3_TERMINO < len(row) else None, ano_gozada)
-                p3_mes = parse_mes(row.iloc[COL_P3_INICIO] if COL_P3_INICIO < len(row) else None)
-                
-                parcelas.append({
-                    'parcela_num': 3,
-                    'dias': int(p3_dias),
-                    'data_inicio': p3_inicio.isoformat() if p3_inicio else None,
-                    'data_fim': p3_termino.isoformat() if p3_termino else None,
-                    'mes': p3_mes,
-                    'lancado_livro': bool(row.iloc[COL_P3_LIVRO] if COL_P3_LIVRO < len(row) and not pd.isna(row.iloc[COL_P3_LIVRO]) else False),
-                    'lancado_sgpol': bool(row.iloc[COL_P3_SGPOL] if COL_P3_SGPOL < len(row) and not pd.isna(row.iloc[COL_P3_SGPOL]) else False),
-                    'lancado_campanha': bool(row.iloc[COL_P3_CAMPANHA] if COL_P3_CAMPANHA < len(row) and not pd.isna(row.iloc[COL_P3_CAMPANHA]) else False)
-                })
-            
-            if not parcelas:
-                continue
-            
-            # Calcular totais
-            total_dias = sum(p['dias'] for p in parcelas)
-            tipo = 'INTEGRAL' if len(parcelas) == 1 and total_dias == 30 else 'PARCELADA'
-            
-            # Determinar mes_inicio (primeira parcela)
-            mes_inicio = parcelas[0]['mes'] if parcelas[0]['mes'] else None
-            if not mes_inicio and parcelas[0]['data_inicio']:
-                mes_inicio = datetime.fromisoformat(parcelas[0]['data_inicio']).month
+        if assincrono:
+            print(f"Modo assíncrono: até {concorrencia} requisições simultâneas", flush=True)
+            gravador = asyncio.run(gravar_async(registros, stream, concorrencia, estado))
+        else:
+            if stream:
+                # As matrículas só são conhecidas durante a leitura: carregar dim_efetivo inteira
+                preparar_resolvedor()
+            else:
+                # Coletar todas as matrículas da planilha e resolvê-las em poucas requisições
+                preparar_resolvedor([registro['matricula'] for _, registro in registros])
             
-            # Inserir/atualizar fat_ferias
-            try:
-                # Verificar se já existe registro para este efetivo e ano
-                existing = supabase_query('fat_ferias', method='GET', filters={
-                    'efetivo_id': f'eq.{efetivo_id}',
-                    'ano': f'eq.{ano_gozada}',
-                    'select': 'id',
-                    'limit': '1'
-                })
-                
-                if existing and len(existing) > 0:
-                    ferias_id = existing[0]['id']
-                    # Atualizar
-                    update_data = {
-                        'mes_inicio': mes_inicio,
-                        'dias': total_dias,
-                        'tipo': tipo,
-                        'minuta_data_inicio': parcelas[0]['data_inicio'],
-                        'minuta_data_fim': parcelas[-1]['data_fim']
-                    }
-                    if processo_sei:
-                        update_data['numero_processo_sei'] = processo_sei
-                    
-                    supabase_query('fat_ferias', method='PATCH', filters={'id': f'eq.{ferias_id}'}, data=update_data)
-                else:
-                    # Inserir novo
-                    insert_data = {
-                        'efetivo_id': efetivo_id,
-                        'ano': ano_gozada,
-                        'mes_inicio': mes_inicio,
-                        'dias': total_dias,
-                        'tipo': tipo,
-                        'minuta_data_inicio': parcelas[0]['data_inicio'],
-                        'minuta_data_fim': parcelas[-1]['data_fim']
-                    }
-                    if processo_sei:
-                        insert_data['numero_processo_sei'] = processo_sei
-                    
-                    result = supabase_query('fat_ferias', method='POST', data=insert_data)
-                    ferias_id = result[0]['id'] if result and len(result) > 0 else None
-                
-                if not ferias_id:
-                    erros.append(f"Erro ao inserir/atualizar férias para matrícula {matricula}")
-                    continue
-                
-                # Inserir/atualizar parcelas
-                for parcela in parcelas:
-                    parcela_data = {
-                        'fat_ferias_id': ferias_id,
-                        'parcela_num': parcela['parcela_num'],
-                        'dias': parcela['dias'],
-                        'data_inicio': parcela['data_inicio'],
-                        'data_fim': parcela['data_fim'],
-                        'mes': str(parcela['mes']) if parcela['mes'] else None,
-                        'lancado_livro': parcela['lancado_livro'],
-                        'lancado_sgpol': parcela['lancado_sgpol'],
-                        'lancado_campanha': parcela['lancado_campanha']
-                    }
-                    
-                    # Verificar se parcela já existe
-                    existing_parcela = supabase_query('fat_ferias_parcelas', method='GET', filters={
-                        'fat_ferias_id': f'eq.{ferias_id}',
-                        'parcela_num': f'eq.{parcela["parcela_num"]}',
-                        'select': 'fat_ferias_id',
-                        'limit': '1'
-                    })
-                    
-                    if existing_parcela and len(existing_parcela) > 0:
-                        supabase_query('fat_ferias_parcelas', method='PATCH', filters={
-                            'fat_ferias_id': f'eq.{ferias_id}',
-                            'parcela_num': f'eq.{parcela["parcela_num"]}'
-                        }, data=parcela_data)
-                    else:
-                        supabase_query('fat_ferias_parcelas', method='POST', data=parcela_data)
-                
-                registros_inseridos += 1
-                registros_processados += 1
-                
-                if registros_processados % 10 == 0:
-                    print(f"Processados {registros_processados} registros...")
-                    
-            except Exception as e:
-                erros.append(f"Erro ao processar matrícula {matricula}: {str(e)}")
-                print(f"ERRO ao processar {matricula}: {e}")
+            # fat_ferias/fat_ferias_parcelas são gravadas em lote (upsert)
+            gravador = GravadorFerias(supabase_query)
+            for matricula, ferias, parcelas in registros_para_gravar(registros, estado):
+                gravador.adicionar(matricula, ferias, parcelas)
+            gravador.descarregar()
+        
+        registros_processados = estado['processados']
+        registros_inseridos = gravador.gravados
+        erros = estado['erros'] + gravador.erros
+        print(f"Gravação em lote: {gravador.requisicoes} requisições")
+        imprimir_metricas()
         
         print(f"\n{'='*60}")
         print(f"Processamento concluído!")
@@ -545,5 +468,16 @@ def processar_ferias_excel():
         import traceback
         traceback.print_exc()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Importa férias 2026 do Excel para fat_ferias/fat_ferias_parcelas')
+    parser.add_argument('--stream', action='store_true',
+                        help='Lê a aba em streaming (openpyxl read_only) e grava cada linha assim que é lida')
+    parser.add_argument('--async', dest='assincrono', action='store_true',
+                        help='Envia as requisições em paralelo (asyncio + httpx)')
+    parser.add_argument('--concorrencia', type=int, default=CONCORRENCIA,
+                        help=f'Requisições simultâneas no modo --async (padrão: {CONCORRENCIA})')
+    return parser.parse_args()
+
 if __name__ == '__main__':
-    processar_ferias_excel()
+    args = parse_args()
+    processar_ferias_excel(stream=args.stream, assincrono=args.assincrono, concorrencia=args.concorrencia)
@@ -2,68 +2,29 @@
 Importa datas de inicio e termino de ferias planejadas
 e atualiza fat_ferias e fat_ferias_parcelas.
 """
+import argparse
+import asyncio
 import os
 import sys
-from datetime import datetime
-import unicodedata
+from itertools import chain
 
 import pandas as pd
-from dotenv import load_dotenv
-import requests
 
-# Carregar variaveis de ambiente
-load_dotenv()
-
-SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
-SUPABASE_KEY = (
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    or os.getenv("VITE_SUPABASE_SERVICE_ROLE_KEY")
-    or os.getenv("VITE_SUPABASE_ANON_KEY")
-)
+import cache_efetivo
+from cache_planilhas import ler_aba
+from esquema_planilha import TAMANHO_BLOCO, TAMANHO_BLOCO_STREAM, MapaColunas, em_blocos, extrair_bloco, mapear_lista
+from leitor_xlsx import iterar_linhas, linhas_dataframe
+from normalizacao import normalizar_texto
+from resolver_efetivo import ResolvedorMatriculas
+from gravador_ferias import GravadorFerias, GravadorFeriasAsync
+from supabase_async import CONCORRENCIA, ClienteAsync
+from supabase_client import SUPABASE_KEY, SUPABASE_URL, imprimir_metricas, supabase_query
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("ERRO: Variaveis de ambiente do Supabase nao encontradas.")
     print("Configure VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no .env")
     sys.exit(1)
 
-POSTGREST_URL = f"{SUPABASE_URL}/rest/v1"
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation",
-}
-
-
-def supabase_query(table, method="GET", filters=None, data=None):
-    url = f"{POSTGREST_URL}/{table}"
-    timeout = 20
-    if method == "GET":
-        params = filters or {}
-        response = requests.get(url, headers=HEADERS, params=params, timeout=timeout)
-    elif method == "POST":
-        response = requests.post(url, headers=HEADERS, json=data, timeout=timeout)
-    elif method == "PATCH":
-        params = filters or {}
-        response = requests.patch(url, headers=HEADERS, params=params, json=data, timeout=timeout)
-    else:
-        raise ValueError(f"Metodo HTTP nao suportado: {method}")
-
-    if response.status_code >= 400:
-        raise Exception(f"Erro {response.status_code}: {response.text}")
-    return response.json() if response.text else []
-
-
-def normalize_text(value):
-    if value is None:
-        return ""
-    text = str(value).strip().upper()
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
-    text = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in text)
-    text = " ".join(text.split())
-    return text
-
 
 def is_valid_matricula(value):
     if value is None or (isinstance(value, float) and pd.isna(value)):
@@ -79,19 +40,24 @@ def is_valid_matricula(value):
         "MATRICULA:",
         "NAN",
     }
-    if normalize_text(text) in ignore:
+    if normalizar_texto(text) in ignore:
         return False
     cleaned = text.replace("X", "").replace("x", "").replace("-", "").replace(".", "").replace(" ", "")
     return cleaned.isdigit() and len(cleaned) >= 4
 
 
-def find_header_row(df):
-    scan_rows = min(30, len(df))
-    for row_idx in range(scan_rows):
-        row_vals = [normalize_text(v) for v in df.iloc[row_idx].tolist()]
-        if any(v.startswith("MAT") for v in row_vals):
-            return row_idx, row_vals
-    return None, []
+HEADER_SCAN_ROWS = 30
+SUBHEADER_SCAN_ROWS = 12
+
+
+def is_header_row(row_vals):
+    return any(v.startswith("MAT") for v in row_vals)
+
+
+def is_subheader_row(row_vals):
+    return any("INICIO" in v or v.startswith("INI") for v in row_vals) or any(
+        "TERMINO" in v or v.startswith("TER") for v in row_vals
+    )
 
 
 def find_col_index(values, matcher):
@@ -101,85 +67,22 @@ def find_col_index(values, matcher):
     return None
 
 
-def find_subheader_row(df, header_row):
-    scan_limit = min(header_row + 12, len(df))
-    for row_idx in range(header_row + 1, scan_limit):
-        row_vals = [normalize_text(v) for v in df.iloc[row_idx].tolist()]
-        if any("INICIO" in v or v.startswith("INI") for v in row_vals) or any(
-            "TERMINO" in v or v.startswith("TER") for v in row_vals
-        ):
-            return row_idx, row_vals
-    return None, []
-
-
 def find_date_columns_in_values(values):
     col_inicio = find_col_index(values, lambda v: "INICIO" in v or v.startswith("INI"))
     col_termino = find_col_index(values, lambda v: "TERMINO" in v or v.startswith("TERM") or v.startswith("TER"))
     return col_inicio, col_termino
 
 
-def parse_date(value):
-    if value is None or (isinstance(value, float) and pd.isna(value)):
-        return None
-    if isinstance(value, datetime):
-        return value.date()
-    dt = pd.to_datetime(value, errors="coerce")
-    return dt.date() if not pd.isna(dt) else None
-
-
-def get_efetivo_id_by_matricula(matricula, cache):
-    matricula = str(matricula).strip()
-    if matricula in cache:
-        return cache[matricula]
-
-    formatos = list(dict.fromkeys([matricula, matricula.lstrip("0")]))
-    for fmt in formatos:
-        result = supabase_query(
-            "dim_efetivo",
-            method="GET",
-            filters={"matricula": f"eq.{fmt}", "select": "id", "limit": "1"},
-        )
-        if result:
-            efetivo_id = result[0]["id"]
-            cache[matricula] = efetivo_id
-            return efetivo_id
-
-    cache[matricula] = None
-    return None
+def get_efetivo_id_by_matricula(matricula, resolvedor):
+    """Busca efetivo_id no indice em lote (consulta o banco so para matriculas ainda nao carregadas)"""
+    return resolvedor.resolver(str(matricula).strip())
 
 
-def processar():
-    previsao_path = r"C:\Users\joaop\supabase\gestao_bpma\docs\uploads\Previsão de Férias 2026.xlsx"
-    janeiro_path = r"C:\Users\joaop\supabase\gestao_bpma\docs\uploads\MINUTA DE FÉRIAS JANEIRO 2026.xlsx"
-    excel_path = os.getenv("EXCEL_PATH") or (sys.argv[1] if len(sys.argv) > 1 else None)
-    if not excel_path:
-        excel_path = previsao_path if os.path.exists(previsao_path) else janeiro_path
-    aba_nome = os.getenv("EXCEL_SHEET")
-
-    if not os.path.exists(excel_path):
-        print(f"ERRO: Arquivo nao encontrado: {excel_path}")
-        sys.exit(1)
-
-    print(f"Arquivo: {excel_path}", flush=True)
-    print(f"Aba: {aba_nome or 'primeira aba'}", flush=True)
-
-    df = pd.read_excel(excel_path, sheet_name=aba_nome or 0, header=None, engine="openpyxl")
-
-    header_row, header_vals = find_header_row(df)
-    if header_row is None:
-        print("ERRO: Nao foi possivel localizar a linha de cabecalho (MAT).", flush=True)
-        sys.exit(1)
-    print(f"Cabecalho encontrado na linha {header_row + 1}", flush=True)
-
-    subheader_row, subheader_vals = find_subheader_row(df, header_row)
-
+def detectar_colunas(header_vals, subheader_vals):
+    """MapaColunas com matricula, ano, SEI e as colunas INICIO/TERMINO de cada parcela"""
     col_matricula = find_col_index(header_vals, lambda v: v.startswith("MAT"))
     col_ano = find_col_index(header_vals, lambda v: v == "ANO")
     col_sei = find_col_index(header_vals, lambda v: "SEI" in v)
-    col_dias_total = find_col_index(
-        header_vals,
-        lambda v: "QUANTIDADDE" in v or "TOTAL DE DIAS" in v,
-    )
 
     parcel_headers = []
     for idx, val in enumerate(header_vals):
@@ -215,149 +118,234 @@ def processar():
         parcel_columns = [{"parcela_num": 1, "inicio_col": col_inicio, "termino_col": col_termino}]
     print(f"Parcelas detectadas: {parcel_columns}", flush=True)
 
-    cache = {}
-    total = 0
-    atualizados = 0
-    erros = []
+    return MapaColunas(
+        campos={"matricula": (col_matricula, "cru"), "ano": (col_ano, "cru"), "processo_sei": (col_sei, "texto")},
+        parcelas=[
+            (parcel["parcela_num"], {"inicio": (parcel["inicio_col"], "data"), "termino": (parcel["termino_col"], "data")})
+            for parcel in parcel_columns
+        ],
+    )
 
-    has_subheader = bool(subheader_vals)
-    data_start = (subheader_row + 1) if has_subheader else header_row + 1
 
-    for idx in range(data_start, len(df)):
-        row = df.iloc[idx]
-        matricula = row.iloc[col_matricula] if col_matricula is not None else None
-        if not is_valid_matricula(matricula):
-            continue
+def _ano_celula(valor):
+    """Ano numerico da celula (None se vazia ou texto: usa o ano da primeira parcela)"""
+    return int(valor) if isinstance(valor, (int, float)) and not pd.isna(valor) else None
 
-        row_parcelas = []
-        for parcel in parcel_columns:
-            data_inicio = parse_date(row.iloc[parcel["inicio_col"]])
-            data_fim = parse_date(row.iloc[parcel["termino_col"]])
-            if not data_inicio or not data_fim:
-                continue
-            dias = (data_fim - data_inicio).days + 1
-            row_parcelas.append({
-                "parcela_num": parcel["parcela_num"],
-                "data_inicio": data_inicio,
-                "data_fim": data_fim,
-                "dias": dias,
-            })
 
+def _parcelas_do_bloco(num, parcela, validas):
+    """Parcela de cada linha do bloco (None se a matricula e invalida ou falta a data de inicio ou de termino)"""
+    return [
+        {"parcela_num": num, "data_inicio": data_inicio, "data_fim": data_fim, "dias": (data_fim - data_inicio).days + 1}
+        if valida and data_inicio and data_fim else None
+        for valida, data_inicio, data_fim in zip(validas, parcela["inicio"], parcela["termino"])
+    ]
+
+
+def extrair_registros(indices, linhas, colunas):
+    """(indice da linha, registro) das linhas com matricula e ao menos uma parcela, convertidas em bloco"""
+    bloco = extrair_bloco(linhas, colunas)
+    validas = mapear_lista(bloco.campos["matricula"], is_valid_matricula)
+    anos = mapear_lista(bloco.campos["ano"], _ano_celula)
+    parcelas = zip(*(_parcelas_do_bloco(num, parcela, validas) for num, parcela in bloco.parcelas))
+    for indice, matricula, ano, processo_sei, parcelas_linha in zip(
+        indices, bloco.campos["matricula"], anos, bloco.campos["processo_sei"], parcelas
+    ):
+        row_parcelas = [parcela for parcela in parcelas_linha if parcela is not None]
         if not row_parcelas:
             continue
+        yield indice, {
+            "matricula": matricula,
+            "ano": ano if ano is not None else row_parcelas[0]["data_inicio"].year,
+            "processo_sei": processo_sei,
+            "parcelas": row_parcelas,
+        }
+
+
+def iterar_registros(linhas, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera (indice da linha, registro) enquanto as linhas chegam.
+
+    So as linhas ate o fim da janela do subcabecalho ficam em buffer; a partir dai as
+    linhas sao convertidas em blocos de tamanho_bloco (esquema_planilha.py). No modo
+    streaming use TAMANHO_BLOCO_STREAM, para os registros sairem durante a leitura.
+    """
+    linhas = enumerate(linhas)
+    buffer = []
+    header_row = subheader_row = None
+    header_vals = subheader_vals = []
+
+    for idx, row in linhas:
+        buffer.append(row)
+        if header_row is None:
+            if idx >= HEADER_SCAN_ROWS:
+                break
+            row_vals = [normalizar_texto(v) for v in row]
+            if is_header_row(row_vals):
+                header_row, header_vals = idx, row_vals
+                print(f"Cabecalho encontrado na linha {header_row + 1}", flush=True)
+            continue
+
+        row_vals = [normalizar_texto(v) for v in row]
+        if is_subheader_row(row_vals):
+            subheader_row, subheader_vals = idx, row_vals
+        elif idx < header_row + SUBHEADER_SCAN_ROWS - 1:
+            continue
+        break
 
-        ano = row.iloc[col_ano] if col_ano is not None else None
-        ano = int(ano) if isinstance(ano, (int, float)) and not pd.isna(ano) else row_parcelas[0]["data_inicio"].year
-        processo_sei = (
-            str(row.iloc[col_sei]).strip()
-            if col_sei is not None and not pd.isna(row.iloc[col_sei])
-            else None
-        )
+    if header_row is None:
+        print("ERRO: Nao foi possivel localizar a linha de cabecalho (MAT).", flush=True)
+        sys.exit(1)
 
-        total += 1
+    # Sem subcabecalho (ou a planilha terminou dentro da janela de busca): dados logo apos o cabecalho
+    colunas = detectar_colunas(header_vals, subheader_vals)
+    data_start = (subheader_row + 1) if subheader_vals else header_row + 1
+    dados = chain(enumerate(buffer[data_start:], start=data_start), linhas)
+    for indices, bloco in em_blocos(dados, tamanho_bloco):
+        yield from extrair_registros(indices, bloco, colunas)
+
+
+def montar_linhas_ferias(efetivo_id, registro):
+    """Linhas de fat_ferias e fat_ferias_parcelas (sem fat_ferias_id) de um registro"""
+    processo_sei = registro["processo_sei"]
+    row_parcelas = registro["parcelas"]
+
+    min_inicio = min(p["data_inicio"] for p in row_parcelas)
+    max_fim = max(p["data_fim"] for p in row_parcelas)
+    total_dias = sum(p["dias"] for p in row_parcelas)
+    tipo = "INTEGRAL" if total_dias == 30 and len(row_parcelas) == 1 else "PARCELADA"
+
+    ferias = {
+        "efetivo_id": efetivo_id,
+        "ano": registro["ano"],
+        "mes_inicio": min_inicio.month,
+        "dias": total_dias,
+        "tipo": tipo,
+        "minuta_data_inicio": min_inicio.isoformat(),
+        "minuta_data_fim": max_fim.isoformat(),
+        **({"numero_processo_sei": processo_sei} if processo_sei else {}),
+    }
+    parcelas = [
+        {
+            "parcela_num": parcela["parcela_num"],
+            "dias": parcela["dias"],
+            "data_inicio": parcela["data_inicio"].isoformat(),
+            "data_fim": parcela["data_fim"].isoformat(),
+            "mes": str(parcela["data_inicio"].month),
+            "lancado_livro": False,
+            "lancado_sgpol": False,
+            "lancado_campanha": False,
+        }
+        for parcela in row_parcelas
+    ]
+    return ferias, parcelas
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Importa datas de ferias planejadas para fat_ferias/fat_ferias_parcelas")
+    parser.add_argument("excel_path", nargs="?", help="Arquivo Excel (padrao: EXCEL_PATH ou planilhas em docs/uploads)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Le a aba em streaming (openpyxl read_only) e grava cada linha assim que e lida")
+    parser.add_argument("--async", dest="assincrono", action="store_true",
+                        help="Envia as requisicoes em paralelo (asyncio + httpx)")
+    parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA,
+                        help=f"Requisicoes simultaneas no modo --async (padrao: {CONCORRENCIA})")
+    return parser.parse_args()
+
+
+def registros_para_gravar(registros, resolvedor, estado):
+    """Resolve a matricula de cada registro e gera (matricula, fat_ferias, parcelas) para o gravador"""
+    for idx, registro in registros:
+        matricula = registro["matricula"]
+        estado["total"] += 1
+        total = estado["total"]
         if total <= 5:
             print(f"Processando matricula {matricula} (linha {idx + 1})...", flush=True)
         try:
-            efetivo_id = get_efetivo_id_by_matricula(matricula, cache)
+            efetivo_id = get_efetivo_id_by_matricula(matricula, resolvedor)
             if not efetivo_id:
                 continue
-
-            existing = supabase_query(
-                "fat_ferias",
-                method="GET",
-                filters={"efetivo_id": f"eq.{efetivo_id}", "ano": f"eq.{ano}", "select": "id", "limit": "1"},
-            )
-
-            datas_inicio = [p["data_inicio"] for p in row_parcelas]
-            datas_fim = [p["data_fim"] for p in row_parcelas]
-            min_inicio = min(datas_inicio)
-            max_fim = max(datas_fim)
-            total_dias = sum(p["dias"] for p in row_parcelas)
-            tipo = "INTEGRAL" if total_dias == 30 and len(row_parcelas) == 1 else "PARCELADA"
-
-            if existing:
-                ferias_id = existing[0]["id"]
-                supabase_query(
-                    "fat_ferias",
-                    method="PATCH",
-                    filters={"id": f"eq.{ferias_id}"},
-                    data={
-                        "mes_inicio": min_inicio.month,
-                        "minuta_data_inicio": min_inicio.isoformat(),
-                        "minuta_data_fim": max_fim.isoformat(),
-                        "dias": total_dias,
-                        "tipo": tipo,
-                        **({"numero_processo_sei": processo_sei} if processo_sei else {}),
-                    },
-                )
-            else:
-                result = supabase_query(
-                    "fat_ferias",
-                    method="POST",
-                    data={
-                        "efetivo_id": efetivo_id,
-                        "ano": ano,
-                        "mes_inicio": min_inicio.month,
-                        "dias": total_dias,
-                        "tipo": tipo,
-                        "minuta_data_inicio": min_inicio.isoformat(),
-                        "minuta_data_fim": max_fim.isoformat(),
-                        **({"numero_processo_sei": processo_sei} if processo_sei else {}),
-                    },
-                )
-                ferias_id = result[0]["id"] if result else None
-
-            if not ferias_id:
-                erros.append(f"Falha em fat_ferias para matricula {matricula}")
-                continue
-
-            existing_parcelas = supabase_query(
-                "fat_ferias_parcelas",
-                method="GET",
-                filters={
-                    "fat_ferias_id": f"eq.{ferias_id}",
-                    "select": "parcela_num,data_inicio,data_fim,dias",
-                },
-            )
-            existing_map = {p.get("parcela_num"): p for p in existing_parcelas if p.get("parcela_num")}
-            for parcela in row_parcelas:
-                parcela_num = parcela["parcela_num"]
-                parcela_data = {
-                    "fat_ferias_id": ferias_id,
-                    "parcela_num": parcela_num,
-                    "dias": parcela["dias"],
-                    "data_inicio": parcela["data_inicio"].isoformat(),
-                    "data_fim": parcela["data_fim"].isoformat(),
-                    "mes": str(parcela["data_inicio"].month),
-                    "lancado_livro": False,
-                    "lancado_sgpol": False,
-                    "lancado_campanha": False,
-                }
-
-                if parcela_num in existing_map:
-                    supabase_query(
-                        "fat_ferias_parcelas",
-                        method="PATCH",
-                        filters={
-                            "fat_ferias_id": f"eq.{ferias_id}",
-                            "parcela_num": f"eq.{parcela_num}",
-                        },
-                        data=parcela_data,
-                    )
-                else:
-                    supabase_query("fat_ferias_parcelas", method="POST", data=parcela_data)
-
-            atualizados += 1
-            if total % 10 == 0:
-                print(f"Processados {total} registros (atualizados: {atualizados})...", flush=True)
+            linhas = montar_linhas_ferias(efetivo_id, registro)
         except Exception as exc:
             erro_msg = f"Matricula {matricula}: {exc}"
-            erros.append(erro_msg)
+            estado["erros"].append(erro_msg)
             print(f"ERRO: {erro_msg}", flush=True)
+            continue
+        if total % 10 == 0:
+            print(f"Processados {total} registros...", flush=True)
+        yield (matricula, *linhas)
+
+
+async def gravar_async(registros, stream, concorrencia, estado):
+    """Modo --async: resolucao e upserts em lote com varias requisicoes simultaneas"""
+    async with ClienteAsync(concorrencia) as cliente:
+        # Snapshot local de dim_efetivo (cache_efetivo.py); sem ele, carga em lote pelo banco
+        resolvedor = await asyncio.to_thread(cache_efetivo.carregar_resolvedor, supabase_query)
+        if resolvedor is None:
+            resolvedor = ResolvedorMatriculas(supabase_query)
+            if stream:
+                await resolvedor.carregar_todos_async(cliente.consulta, concorrencia)
+            else:
+                await resolvedor.carregar_async(cliente.consulta, [registro["matricula"] for _, registro in registros])
+            print(f"Matriculas carregadas em {resolvedor.requisicoes} requisicoes", flush=True)
+
+        gravador = GravadorFeriasAsync(cliente.consulta, lotes_em_voo=concorrencia)
+        for matricula, ferias, parcelas in registros_para_gravar(registros, resolvedor, estado):
+            await gravador.adicionar(matricula, ferias, parcelas)
+        await gravador.concluir()
+    return gravador
+
+
+def processar():
+    args = parse_args()
+    previsao_path = r"C:\Users\joaop\supabase\gestao_bpma\docs\uploads\Previsão de Férias 2026.xlsx"
+    janeiro_path = r"C:\Users\joaop\supabase\gestao_bpma\docs\uploads\MINUTA DE FÉRIAS JANEIRO 2026.xlsx"
+    excel_path = os.getenv("EXCEL_PATH") or args.excel_path
+    if not excel_path:
+        excel_path = previsao_path if os.path.exists(previsao_path) else janeiro_path
+    aba_nome = os.getenv("EXCEL_SHEET")
+
+    if not os.path.exists(excel_path):
+        print(f"ERRO: Arquivo nao encontrado: {excel_path}")
+        sys.exit(1)
+
+    print(f"Arquivo: {excel_path}", flush=True)
+    print(f"Aba: {aba_nome or 'primeira aba'}", flush=True)
+
+    if args.stream:
+        linhas = iterar_linhas(excel_path, aba_nome or 0)
+    else:
+        linhas = linhas_dataframe(ler_aba(excel_path, aba_nome or 0))
+
+    estado = {"total": 0, "erros": []}
+    # Matriculas chegam durante a leitura no modo streaming
+    registros = iterar_registros(linhas, TAMANHO_BLOCO_STREAM) if args.stream else list(iterar_registros(linhas))
+
+    if args.assincrono:
+        print(f"Modo assincrono: ate {args.concorrencia} requisicoes simultaneas", flush=True)
+        gravador = asyncio.run(gravar_async(registros, args.stream, args.concorrencia, estado))
+    else:
+        # Snapshot local de dim_efetivo (cache_efetivo.py); sem ele, carga em lote pelo banco
+        resolvedor = cache_efetivo.carregar_resolvedor(supabase_query)
+        if resolvedor is None:
+            resolvedor = ResolvedorMatriculas(supabase_query)
+            if args.stream:
+                # Carregar dim_efetivo inteira de uma vez
+                resolvedor.carregar_todos()
+            else:
+                resolvedor.carregar([registro["matricula"] for _, registro in registros])
+            print(f"Matriculas carregadas em {resolvedor.requisicoes} requisicoes", flush=True)
+
+        # fat_ferias e parcelas sao gravadas em lote (upsert)
+        gravador = GravadorFerias(supabase_query)
+        for matricula, ferias, parcelas in registros_para_gravar(registros, resolvedor, estado):
+            gravador.adicionar(matricula, ferias, parcelas)
+        gravador.descarregar()
 
+    erros = estado["erros"] + gravador.erros
     print("\nProcessamento concluido.", flush=True)
-    print(f"Registros processados: {total}", flush=True)
-    print(f"Registros atualizados/inseridos: {atualizados}", flush=True)
+    print(f"Registros processados: {estado['total']}", flush=True)
+    print(f"Registros atualizados/inseridos: {gravador.gravados}", flush=True)
+    print(f"Gravacao em lote: {gravador.requisicoes} requisicoes", flush=True)
+    imprimir_metricas()
     if erros:
         print("Primeiros 10 erros:", flush=True)
         for erro in erros[:10]:
@@ -0,0 +1,148 @@
+"""
+Deduplicação das linhas na geração do SQL, pela chave do ON CONFLICT de cada tabela
+
+Cada tabela tem um IndiceConflitos: linhas com a mesma chave viram uma só, com o mesmo
+resultado dos UPSERTs sequenciais (a primeira linha insere; as seguintes só sobrescrevem
+as colunas do DO UPDATE SET). Chave com algum valor None nunca colide, como NULL no
+Postgres. As colisões encontradas vão para um relatório JSON ao lado da migration,
+no lugar de corrigir/verificar duplicatas depois nos arquivos .sql.
+
+ConflitosDataFrame faz o mesmo sobre um DataFrame inteiro (drop_duplicates/duplicated),
+para os geradores que formatam o SQL por coluna (emissor_sql.py).
+"""
+import json
+
+import pandas as pd
+
+
+class IndiceConflitos:
+    """Índice em memória chave -> linha final (last-write-wins nas colunas atualizadas)"""
+
+    def __init__(self, tabela, chave, atualizadas):
+        self.tabela = tabela
+        self.chave = tuple(chave)
+        self.atualizadas = tuple(atualizadas)
+        self._linhas = {}
+        self._ocorrencias = {}
+        self._sem_chave = 0
+        self.entradas = 0
+
+    def adicionar(self, linha, origem=None):
+        """linha: dict coluna -> valor; origem: identificação da linha de entrada (ex.: linha do CSV)"""
+        self.entradas += 1
+        chave = tuple(linha[c] for c in self.chave)
+        if any(v is None for v in chave):
+            self._sem_chave += 1
+            chave = ('__sem_chave__', self._sem_chave)
+        atual = self._linhas.get(chave)
+        if atual is None:
+            self._linhas[chave] = dict(linha)
+        else:
+            atual.update((c, linha[c]) for c in self.atualizadas)
+        self._ocorrencias.setdefault(chave, []).append({'origem': origem, 'valores': linha})
+
+    def linhas(self):
+        """Linhas finais, na ordem da primeira ocorrência de cada chave"""
+        return list(self._linhas.values())
+
+    def colisoes(self):
+        return [
+            {
+                'chave': dict(zip(self.chave, chave)),
+                'ocorrencias': ocorrencias,
+                'resultado': self._linhas[chave],
+            }
+            for chave, ocorrencias in self._ocorrencias.items()
+            if len(ocorrencias) > 1
+        ]
+
+    def resumo(self):
+        colisoes = self.colisoes()
+        return {
+            'tabela': self.tabela,
+            'chave': list(self.chave),
+            'colunas_atualizadas': list(self.atualizadas),
+            'linhas_entrada': self.entradas,
+            'linhas_saida': len(self._linhas),
+            'chaves_com_colisao': len(colisoes),
+            'colisoes': colisoes,
+        }
+
+
+def _registros(df):
+    """Linhas como dicionários com tipos do Python (NaN vira None)"""
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict('records')
+
+
+class ConflitosDataFrame:
+    """Mesmo resultado do IndiceConflitos, calculado por coluna sobre um DataFrame.
+
+    df: só as colunas da linha (a chave inclusive); origem: Series opcional, alinhada ao df,
+    com a identificação de cada linha de entrada. O resultado fica em self.df, na ordem
+    da primeira ocorrência de cada chave.
+    """
+
+    def __init__(self, df, tabela, chave, atualizadas, origem=None):
+        self.tabela = tabela
+        self.chave = tuple(chave)
+        self.atualizadas = tuple(atualizadas)
+        self.entradas = len(df)
+        chave = list(self.chave)
+        atualizadas = list(self.atualizadas)
+
+        sem_chave = df[chave].isna().any(axis=1)
+        repetidas = df.duplicated(chave, keep=False) & ~sem_chave
+        self._repetidas = df[repetidas]
+        self._origem = origem
+        self._colisoes = None
+        if not repetidas.any():
+            self.df = df
+            return
+
+        # Primeira linha de cada chave, com as colunas atualizadas vindas da última
+        resultado = df[sem_chave | ~df.duplicated(chave, keep='first')].copy()
+        ultimas = df[~sem_chave].drop_duplicates(chave, keep='last')
+        ultimas = ultimas[atualizadas].set_axis(pd.MultiIndex.from_frame(ultimas[chave]))
+        alvo = resultado[chave].notna().all(axis=1)
+        posicao = pd.MultiIndex.from_frame(resultado.loc[alvo, chave])
+        for coluna in atualizadas:
+            resultado.loc[alvo, coluna] = ultimas[coluna].reindex(posicao).to_numpy()
+        self.df = resultado
+
+    def colisoes(self):
+        if self._colisoes is None:
+            chave = list(self.chave)
+            # A linha final de cada chave repetida fica na posição da primeira ocorrência
+            finais = self.df[self.df.index.isin(self._repetidas.index)]
+            resultados = {tuple(r[c] for c in chave): r for r in _registros(finais)}
+            origens = ([None] * len(self._repetidas) if self._origem is None
+                       else self._origem.loc[self._repetidas.index].tolist())
+            ocorrencias = {}
+            for origem, valores in zip(origens, _registros(self._repetidas)):
+                ocorrencias.setdefault(tuple(valores[c] for c in chave), []).append(
+                    {'origem': origem, 'valores': valores})
+            self._colisoes = [
+                {'chave': dict(zip(self.chave, k)), 'ocorrencias': lista, 'resultado': resultados[k]}
+                for k, lista in ocorrencias.items()
+            ]
+        return self._colisoes
+
+    def resumo(self):
+        colisoes = self.colisoes()
+        return {
+            'tabela': self.tabela,
+            'chave': list(self.chave),
+            'colunas_atualizadas': list(self.atualizadas),
+            'linhas_entrada': self.entradas,
+            'linhas_saida': len(self.df),
+            'chaves_com_colisao': len(colisoes),
+            'colisoes': colisoes,
+        }
+
+
+def salvar_relatorio(caminho, indices):
+    """Grava o relatório de colisões (JSON) de todos os índices; devolve o caminho"""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump([indice.resumo() for indice in indices], f, ensure_ascii=False, indent=2, default=str)
+    return caminho
@@ -0,0 +1,296 @@
+"""
+Ingestão incremental do Excel de Estatísticas BPMA (process_excel_to_supabase.py --incremental)
+
+Um arquivo de estado JSON guarda o hash do conteúdo de cada aba, de cada bloco extraído
+(atendimentos e cada seção de resgates por ano) e dos arquivos Parquet gerados
+(dados_processados.py). Na execução seguinte:
+  - abas com o mesmo hash não são reprocessadas (as linhas vêm dos dados anteriores);
+  - blocos com o mesmo hash não geram delta;
+  - para os anos alterados, as linhas antigas e novas são comparadas pela chave das
+    tabelas fact_* (estrutura adaptada) e só o delta vira migration:
+    upserts (inserções/alterações) e DELETEs (chaves que sumiram da planilha).
+    Antes dos upserts, os meses (dim_tempo) e as naturezas (dim_indicador_bpma) que eles
+    referenciam são inseridos com ON CONFLICT DO NOTHING (ano ou natureza nova na planilha).
+
+Sem estado (ou com dados processados alterados fora do script) não há base de comparação: todas as
+linhas entram como upsert e nada é excluído.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from classificador_indicadores import categoria_indicador
+from dados_processados import COLUNAS_ATENDIMENTOS, COLUNAS_RESGATES, ESQUEMAS, ler_tabela
+from indice_conflitos import IndiceConflitos
+from normalizacao import criar_id_slug
+
+# 2: hashes dos arquivos Parquet em 'dados' (antes, dos CSVs em 'csv')
+VERSAO_ESTADO = 2
+
+MESES_ABREV = ('JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ')
+
+
+def _sha256(texto):
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def hash_arquivo(caminho):
+    """SHA-256 de um arquivo (None se não existir)"""
+    if not os.path.exists(caminho):
+        return None
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_aba(df):
+    """Hash do conteúdo de uma aba (valores das células, sem formatação)"""
+    return _sha256(df.to_csv(index=False, header=False))
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, float) and pd.isna(valor))
+
+
+def _chave_bloco(tabela, linha):
+    if tabela == 'atendimentos':
+        return 'atendimentos'
+    tipo = linha.get('tipo_fauna')
+    return f"resgates:{'' if _vazio(tipo) else tipo}"
+
+
+def hashes_blocos(ano, atendimentos, resgates):
+    """{'<ano>/atendimentos': hash, '<ano>/resgates:<tipo_fauna>': hash, ...}"""
+    blocos = {}
+    for tabela, linhas, colunas in (('atendimentos', atendimentos, COLUNAS_ATENDIMENTOS),
+                                    ('resgates', resgates, COLUNAS_RESGATES)):
+        for linha in linhas:
+            valores = ['' if _vazio(linha.get(c)) else str(linha.get(c)) for c in colunas]
+            blocos.setdefault(f"{ano}/{_chave_bloco(tabela, linha)}", []).append('\t'.join(valores))
+    return {chave: _sha256('\n'.join(linhas)) for chave, linhas in blocos.items()}
+
+
+def carregar_estado(caminho):
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return estado if estado.get('versao') == VERSAO_ESTADO else None
+
+
+def salvar_estado(caminho, estado):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = caminho + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, caminho)
+
+
+def _parquet(data_dir, tabela):
+    return os.path.join(data_dir, f'{tabela}.parquet')
+
+
+def hashes_dados(data_dir):
+    """{tabela: hash do <tabela>.parquet} dos dados processados"""
+    return {tabela: hash_arquivo(_parquet(data_dir, tabela)) for tabela in ESQUEMAS}
+
+
+def base_anterior(estado, excel_path, data_dir):
+    """(atendimentos, resgates) dos dados anteriores, se o estado ainda descreve esses arquivos"""
+    if not estado or estado.get('arquivo') != os.path.abspath(excel_path):
+        return None
+    if estado.get('dados') != hashes_dados(data_dir):
+        return None
+    return (ler_tabela('atendimentos', caminho=_parquet(data_dir, 'atendimentos')),
+            ler_tabela('resgates', caminho=_parquet(data_dir, 'resgates')))
+
+
+def linhas_do_ano(df, ano, colunas):
+    """Linhas de um ano dos dados anteriores como dicionários (valores Python; vazio vira None)"""
+    if df is None or df.empty:
+        return []
+    recorte = df[df['ano'] == ano].reindex(columns=colunas)
+    registros = recorte.astype(object).where(recorte.notna(), None).to_dict('records')
+    # int16/int32 do Parquet voltam como int, igual às linhas recém-extraídas da planilha
+    return [{c: v.item() if hasattr(v, 'item') else v for c, v in r.items()} for r in registros]
+
+
+def _indice_indicadores(linhas):
+    indice = IndiceConflitos('fact_indicador_mensal_bpma', ('tempo_id', 'indicador_id'), ('valor',))
+    for linha in linhas:
+        indice.adicionar({
+            'tempo_id': int(linha['ano']) * 100 + int(linha['mes']),
+            'indicador_id': criar_id_slug(str(linha['natureza']).strip()),
+            'valor': int(linha['quantidade']),
+        })
+    return indice
+
+
+def _indice_resgates(linhas):
+    # Mesmo filtro de generate_sql_inserts_adapted.py: exige nome_popular e nome_cientifico
+    indice = IndiceConflitos('fact_resgate_fauna_especie_mensal', ('tempo_id', 'nome_cientifico'),
+                             ('nome_popular', 'quantidade'))
+    for linha in linhas:
+        nome_popular = None if _vazio(linha['nome_popular']) else str(linha['nome_popular']).strip()
+        nome_cientifico = None if _vazio(linha['nome_cientifico']) else str(linha['nome_cientifico']).strip()
+        if not nome_popular or not nome_cientifico:
+            continue
+        indice.adicionar({
+            'tempo_id': int(linha['ano']) * 100 + int(linha['mes']),
+            'nome_cientifico': nome_cientifico,
+            'nome_popular': nome_popular,
+            'quantidade': int(linha['quantidade']),
+        })
+    return indice
+
+
+def _comparar(antigo, novo):
+    """(upserts, exclusoes) entre dois IndiceConflitos da mesma tabela"""
+    chave = antigo.chave
+    anteriores = {tuple(l[c] for c in chave): l for l in antigo.linhas()}
+    upserts = []
+    for linha in novo.linhas():
+        k = tuple(linha[c] for c in chave)
+        if anteriores.pop(k, None) != linha:
+            upserts.append(linha)
+    exclusoes = [dict(zip(chave, k)) for k in anteriores]
+    return upserts, exclusoes
+
+
+class Delta:
+    """Inserções/alterações e exclusões acumuladas das tabelas fact_*"""
+
+    def __init__(self):
+        self.indicadores = []
+        self.indicadores_excluidos = []
+        self.resgates = []
+        self.resgates_excluidos = []
+        # indicador_id -> natureza dos upserts (última ocorrência, como em generate_sql_adapted.py)
+        self.naturezas = {}
+
+    def adicionar_ano(self, antigos_at, novos_at, antigos_rs, novos_rs):
+        upserts, exclusoes = _comparar(_indice_indicadores(antigos_at), _indice_indicadores(novos_at))
+        novos_ids = {l['indicador_id'] for l in upserts}
+        for linha in novos_at:
+            natureza = str(linha['natureza']).strip()
+            slug = criar_id_slug(natureza)
+            if slug in novos_ids:
+                self.naturezas[slug] = natureza
+        self.indicadores.extend(upserts)
+        self.indicadores_excluidos.extend(exclusoes)
+        upserts, exclusoes = _comparar(_indice_resgates(antigos_rs), _indice_resgates(novos_rs))
+        self.resgates.extend(upserts)
+        self.resgates_excluidos.extend(exclusoes)
+
+    def tempos(self):
+        """tempo_id (AAAAMM) referenciados pelos upserts"""
+        return sorted({l['tempo_id'] for l in self.indicadores} | {l['tempo_id'] for l in self.resgates})
+
+    def vazio(self):
+        return not (self.indicadores or self.indicadores_excluidos or self.resgates or self.resgates_excluidos)
+
+    def resumo(self):
+        return (f"fact_indicador_mensal_bpma: {len(self.indicadores)} upserts, {len(self.indicadores_excluidos)} exclusões | "
+                f"fact_resgate_fauna_especie_mensal: {len(self.resgates)} upserts, {len(self.resgates_excluidos)} exclusões")
+
+
+def _txt(valor):
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def sql_delta(delta):
+    """Migration com o delta (upserts e DELETEs) das tabelas fact_* e os meses/naturezas que os upserts referenciam"""
+    sql = f"""-- ============================================
+-- DELTA DAS TABELAS FACT - ESTATÍSTICAS BPMA
+-- ============================================
+-- Gerado em: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+-- {delta.resumo()}
+-- ============================================
+
+"""
+    tempos = delta.tempos()
+    if tempos:
+        valores = ",\n".join(
+            f"({t},{t // 100},{t % 100},'{MESES_ABREV[t % 100 - 1]}','{t // 100}-{t % 100:02d}-01')" for t in tempos
+        )
+        sql += f"""INSERT INTO public.dim_tempo (id, ano, mes, mes_abreviacao, inicio_mes) VALUES
+{valores}
+ON CONFLICT (id) DO NOTHING;
+
+"""
+    if delta.naturezas:
+        valores = ",\n".join(f"({_txt(slug)},{_txt(nome)},{_txt(categoria_indicador(nome))})"
+                             for slug, nome in sorted(delta.naturezas.items()))
+        sql += f"""INSERT INTO public.dim_indicador_bpma (id, nome, categoria) VALUES
+{valores}
+ON CONFLICT (id) DO NOTHING;
+
+"""
+    if delta.indicadores_excluidos:
+        valores = ",\n".join(f"  ({l['tempo_id']}, {_txt(l['indicador_id'])})" for l in delta.indicadores_excluidos)
+        sql += f"""DELETE FROM public.fact_indicador_mensal_bpma
+WHERE (tempo_id, indicador_id) IN (VALUES
+{valores}
+);
+
+"""
+    if delta.indicadores:
+        valores = ",\n".join(f"({l['tempo_id']},{_txt(l['indicador_id'])},{l['valor']})" for l in delta.indicadores)
+        sql += f"""INSERT INTO public.fact_indicador_mensal_bpma (tempo_id, indicador_id, valor) VALUES
+{valores}
+ON CONFLICT (tempo_id, indicador_id) DO UPDATE SET valor=EXCLUDED.valor;
+
+"""
+    if delta.resgates_excluidos:
+        valores = ",\n".join(f"  ({l['tempo_id']}, {_txt(l['nome_cientifico'])})" for l in delta.resgates_excluidos)
+        sql += f"""DELETE FROM public.fact_resgate_fauna_especie_mensal
+WHERE (tempo_id, nome_cientifico) IN (VALUES
+{valores}
+);
+
+"""
+    if delta.resgates:
+        valores = ",\n".join(
+            f"    ({l['tempo_id']}, {_txt(l['nome_cientifico'])}, {_txt(l['nome_popular'])}, {l['quantidade']})"
+            for l in delta.resgates
+        )
+        sql += f"""WITH v (tempo_id, nome_cientifico, nome_popular, quantidade) AS (
+  VALUES
+{valores}
+),
+especie_cientifico AS (
+  SELECT DISTINCT ON (LOWER(TRIM(nome_cientifico))) LOWER(TRIM(nome_cientifico)) AS chave, id
+  FROM public.dim_especies_fauna
+),
+especie_popular AS (
+  SELECT DISTINCT ON (LOWER(TRIM(nome_popular))) LOWER(TRIM(nome_popular)) AS chave, id
+  FROM public.dim_especies_fauna
+)
+INSERT INTO public.fact_resgate_fauna_especie_mensal (
+    tempo_id, id_regiao_administrativa, id_especie_fauna,
+    nome_cientifico, nome_popular, quantidade
+)
+SELECT
+    v.tempo_id,
+    NULL,
+    COALESCE(ec.id, ep.id),
+    v.nome_cientifico,
+    v.nome_popular,
+    v.quantidade
+FROM v
+LEFT JOIN especie_cientifico ec ON ec.chave = LOWER(TRIM(v.nome_cientifico))
+LEFT JOIN especie_popular ep ON ep.chave = LOWER(TRIM(v.nome_popular))
+ON CONFLICT (tempo_id, nome_cientifico)
+DO UPDATE SET
+    quantidade=EXCLUDED.quantidade,
+    nome_popular=EXCLUDED.nome_popular,
+    id_especie_fauna=COALESCE(EXCLUDED.id_especie_fauna, fact_resgate_fauna_especie_mensal.id_especie_fauna);
+
+"""
+    return sql
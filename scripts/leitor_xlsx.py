@@ -0,0 +1,24 @@
+"""
+Leitura em streaming de abas XLSX (openpyxl read_only)
+
+As linhas são geradas uma a uma enquanto o XML da aba é decodificado, sem montar
+um DataFrame: a memória fica constante e o consumidor pode começar a gravar no
+banco antes do fim da leitura.
+"""
+from openpyxl import load_workbook
+
+
+def iterar_linhas(caminho, aba=0):
+    """Gera as linhas da aba como listas de valores (células vazias = None)"""
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[aba] if isinstance(aba, int) else wb[aba]
+        for row in ws.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        wb.close()
+
+
+def linhas_dataframe(df):
+    """Linhas de um DataFrame (header=None) no mesmo formato de iterar_linhas"""
+    return df.to_numpy(dtype=object).tolist()
@@ -0,0 +1,109 @@
+"""
+Normalização de texto compartilhada pelos scripts
+
+criar_id_slug: id textual (slug) usado em dim_indicador_bpma / fact_indicador_mensal_bpma.
+normalizar_texto: comparação de rótulos de planilha (maiúsculas, sem acentos/pontuação).
+
+Os dois são memoizados: as planilhas repetem poucas dezenas de valores distintos
+(naturezas, cabeçalhos) em milhares de linhas. As tabelas de tradução e os padrões
+são montados uma única vez na importação do módulo.
+
+Micro-benchmark (compara com a versão anterior, baseada em re.sub):
+  python scripts/normalizacao.py
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Mesmos caracteres da versão original do slug (os demais não-ASCII são removidos);
+# o id já gravado no banco depende exatamente desta tabela.
+_ACENTOS_SLUG = str.maketrans('àáâãäåèéêëìíîïòóôõöùúûüçñ', 'aaaaaaeeeeiiiiooooouuuucn')
+_NAO_SLUG = re.compile(r'[^a-z0-9\s]+')
+_ESPACOS = re.compile(r'\s+')
+# Pontuação (tudo que não é letra/dígito/espaço; '_' também vira espaço)
+_PONTUACAO = re.compile(r'[^\w\s]|_')
+
+
+@lru_cache(maxsize=4096)
+def criar_id_slug(nome):
+    """Cria ID slug a partir do nome ('Crimes contra a Fauna' -> 'crimes_contra_a_fauna')"""
+    slug = nome.lower().translate(_ACENTOS_SLUG)
+    slug = _NAO_SLUG.sub('', slug)
+    slug = _ESPACOS.sub('_', slug)
+    return slug.strip('_')
+
+
+@lru_cache(maxsize=65536)
+def _normalizar(texto):
+    texto = texto.strip().upper()
+    if not texto.isascii():
+        texto = unicodedata.normalize('NFD', texto)
+        texto = ''.join(ch for ch in texto if unicodedata.category(ch) != 'Mn')
+    return ' '.join(_PONTUACAO.sub(' ', texto).split())
+
+
+def normalizar_texto(valor):
+    """Texto em maiúsculas, sem acentos, pontuação ou espaços repetidos ('' para None)"""
+    if valor is None:
+        return ''
+    return _normalizar(str(valor))
+
+
+def _benchmark():
+    import timeit
+
+    def slug_anterior(nome):
+        slug = nome.lower()
+        slug = re.sub(r'[àáâãäå]', 'a', slug)
+        slug = re.sub(r'[èéêë]', 'e', slug)
+        slug = re.sub(r'[ìíîï]', 'i', slug)
+        slug = re.sub(r'[òóôõö]', 'o', slug)
+        slug = re.sub(r'[ùúûü]', 'u', slug)
+        slug = re.sub(r'[ç]', 'c', slug)
+        slug = re.sub(r'[ñ]', 'n', slug)
+        slug = re.sub(r'[^a-z0-9\s]', '', slug)
+        slug = re.sub(r'\s+', '_', slug)
+        slug = slug.strip('_')
+        return slug
+
+    def texto_anterior(value):
+        if value is None:
+            return ""
+        text = str(value).strip().upper()
+        text = unicodedata.normalize("NFD", text)
+        text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+        text = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in text)
+        text = " ".join(text.split())
+        return text
+
+    naturezas = [
+        'Atendimentos registrados (RAP)', 'Termos Circunstanciados de Ocorrência - PMDF',
+        'Crime contra as Áreas de Proteção Permanente', 'QUANTIDADE DE ÓBITOS',
+        'Captura de animais / Busca de Animais / Recolhimento e Remoção de Animais',
+        'JACARÉ DO PAPO AMARELO', 'Corte de Árvores', 'P.A.A.I.', 'Em apuração',
+    ]
+    rotulos = ['MATRÍCULA', 'Nome', 'POSTO/GRAD.', '1º PERÍODO', 'INÍCIO', 'TÉRMINO', 'JANEIRO', None, 12345]
+    # Mesmo padrão de uso dos scripts: poucos valores distintos repetidos em milhares de linhas
+    linhas = 6000
+    entrada_slug = [naturezas[i % len(naturezas)] for i in range(linhas)]
+    entrada_texto = [rotulos[i % len(rotulos)] for i in range(linhas)]
+
+    assert [slug_anterior(n) for n in naturezas] == [criar_id_slug(n) for n in naturezas]
+    assert [texto_anterior(v) for v in rotulos] == [normalizar_texto(v) for v in rotulos]
+
+    casos = [
+        ('criar_id_slug', slug_anterior, criar_id_slug.__wrapped__, criar_id_slug, entrada_slug),
+        ('normalizar_texto', texto_anterior,
+         lambda v: '' if v is None else _normalizar.__wrapped__(str(v)), normalizar_texto, entrada_texto),
+    ]
+    print(f"{'função':<18} {'anterior':>10} {'sem cache':>10} {'com cache':>10}   (µs por chamada, {linhas} chamadas)")
+    for nome, anterior, sem_cache, atual, entrada in casos:
+        tempos = []
+        for funcao in (anterior, sem_cache, atual):
+            melhor = min(timeit.repeat(lambda: [funcao(v) for v in entrada], number=1, repeat=5))
+            tempos.append(melhor / linhas * 1e6)
+        print(f"{nome:<18} {tempos[0]:>10.2f} {tempos[1]:>10.2f} {tempos[2]:>10.2f}")
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,148 @@
+"""
+Planilhas sintéticas no layout das reais, para o benchmark (benchmark_desempenho.py)
+
+  - "Resumos Estatísticas": uma aba por ano com o bloco NATUREZA / MESES e as seções de
+    resgate (AVES, MAMÍFEROS, RÉPTEIS) no formato lido por process_excel_to_supabase.py;
+  - "AFASTAMENTOS": a aba de férias das praças com matrícula na coluna Q e as três
+    parcelas em Z..AQ, no formato lido por importar_ferias_2026.py.
+
+A escala multiplica as linhas de cada aba (1x tem o tamanho aproximado das planilhas
+reais). O conteúdo depende só da escala e da semente, então o mesmo arquivo pode ser
+reaproveitado entre execuções.
+
+Uso direto:
+  python scripts/planilhas_sinteticas.py --escala 10 --saida /tmp/planilhas
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime
+
+from openpyxl import Workbook
+
+MESES = ['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ']
+
+# Tamanho de 1x (próximo dos dados reais: ~6 mil atendimentos e ~3,5 mil resgates)
+ANOS_RESUMOS = list(range(2025, 2019, -1))
+NATUREZAS_POR_ABA = 130
+ESPECIES_POR_SECAO = 50
+SERVIDORES_AFASTAMENTOS = 300
+
+ABA_FERIAS = '02 | FÉRIAS 2026 PRAÇAS'
+COLUNAS_FERIAS = 43
+# Colunas da aba de férias (0-based): Q, T, X, Y e o início das parcelas (Z, AF, AL)
+COL_MATRICULA, COL_NOME, COL_ANO_GOZADA, COL_PROCESSO_SEI = 16, 19, 23, 24
+COLUNAS_PARCELAS = (25, 31, 37)
+
+# Primeira matrícula sintética; PERCENTUAL_SEM_CADASTRO delas não está em dim_efetivo
+MATRICULA_INICIAL = 1000000
+PERCENTUAL_SEM_CADASTRO = 10
+
+
+def _gravar(caminho, abas):
+    """Grava {aba: linhas} com openpyxl write_only (atômico: o arquivo só aparece completo)"""
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    wb = Workbook(write_only=True)
+    for nome, linhas in abas.items():
+        ws = wb.create_sheet(nome)
+        for linha in linhas:
+            ws.append(linha)
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix='.xlsx', dir=os.path.dirname(os.path.abspath(caminho)))
+    os.close(fd)
+    try:
+        wb.save(tmp)
+        os.replace(tmp, caminho)
+    except Exception:
+        os.remove(tmp)
+        raise
+
+
+def _aba_resumo(r, escala):
+    largura = 16
+    vazia = [None] * largura
+    linhas = [['RESUMO ESTATÍSTICO BPMA'] + [None] * (largura - 1), vazia,
+              ['NATUREZA / MESES'] + MESES + ['TOTAL', None, None]]
+    for k in range(NATUREZAS_POR_ABA * escala):
+        quantidades = [r.choice((None, 0, r.randint(1, 60))) for _ in MESES]
+        linhas.append([f'Natureza {k:05d}'] + quantidades + [sum(q or 0 for q in quantidades), None, None])
+    linhas.append(vazia)
+    for secao in ('AVES', 'MAMÍFEROS', 'RÉPTEIS'):
+        # Rótulo da seção na linha dos meses, acima do cabeçalho (como na planilha real)
+        linhas.append([None, secao, None] + MESES + [None])
+        linhas.append(['NOME POPULAR', 'NOME CIENTÍFICO', 'ORDEM'] + [None] * (largura - 3))
+        for k in range(ESPECIES_POR_SECAO * escala):
+            linhas.append([f'{secao.title()} {k:05d}', f'Genus  species{k:05d}', f'Ordem{k % 7}'] +
+                          [r.choice((None, 0, r.randint(1, 8))) for _ in MESES] + [None])
+        linhas.append(vazia)
+    return linhas
+
+
+def gerar_resumos(caminho, escala=1, semente=0):
+    """Workbook "Resumos Estatísticas" com uma aba por ano de ANOS_RESUMOS"""
+    r = random.Random(semente)
+    _gravar(caminho, {str(ano): _aba_resumo(r, escala) for ano in ANOS_RESUMOS})
+    return caminho
+
+
+def _data_parcela(r, ano):
+    mes, dia = r.randint(1, 12), r.randint(1, 28)
+    formato = r.random()
+    if formato < 0.6:
+        return f'{dia:02d}/{mes:02d}'
+    if formato < 0.8:
+        return f'{dia:02d}/{mes:02d}/{ano}'
+    if formato < 0.9:
+        return MESES[mes - 1]
+    return datetime(ano, mes, dia)
+
+
+def matriculas_afastamentos(escala=1):
+    """Matrículas da aba de férias na escala (na ordem das linhas)"""
+    return [str(MATRICULA_INICIAL + k) for k in range(SERVIDORES_AFASTAMENTOS * escala)]
+
+
+def matriculas_cadastradas(escala=1):
+    """Matrículas que existem em dim_efetivo no stub (as demais ficam sem cadastro)"""
+    return [m for k, m in enumerate(matriculas_afastamentos(escala)) if k % 100 >= PERCENTUAL_SEM_CADASTRO]
+
+
+def gerar_afastamentos(caminho, escala=1, semente=0):
+    """Workbook "AFASTAMENTOS" com a aba ABA_FERIAS"""
+    r = random.Random(semente)
+    cabecalho = [None] * COLUNAS_FERIAS
+    cabecalho[COL_MATRICULA], cabecalho[COL_NOME] = 'MATRÍCULA', 'NOME COMPLETO'
+    cabecalho[COL_ANO_GOZADA], cabecalho[COL_PROCESSO_SEI] = 'ANO A SER GOZADA', 'PROCESSO SEI'
+    for num, inicio in enumerate(COLUNAS_PARCELAS, start=1):
+        cabecalho[inicio:inicio + 6] = [f'{num}ª PARCELA DIAS', 'INÍCIO', 'TÉRMINO', 'LIVRO', 'SGPOL', 'CAMPANHA']
+    linhas = [['AFASTAMENTOS BPMA 2026'] + [None] * (COLUNAS_FERIAS - 1), [None] * COLUNAS_FERIAS, cabecalho]
+
+    for k, matricula in enumerate(matriculas_afastamentos(escala)):
+        linha = [None] * COLUNAS_FERIAS
+        # Mesmos formatos de matrícula da planilha real: texto, número e com zero à esquerda
+        linha[COL_MATRICULA] = r.choice((matricula, int(matricula), '0' + matricula))
+        linha[COL_NOME] = f'Servidor {k:06d}'
+        ano = r.choice((2026, 2026, 2026, 2027))
+        linha[COL_ANO_GOZADA] = ano
+        linha[COL_PROCESSO_SEI] = r.choice((None, f'00060-{k:08d}/2025'))
+        for inicio in COLUNAS_PARCELAS:
+            if r.random() < 0.7:
+                linha[inicio:inicio + 6] = [
+                    r.choice((10, 15, 20, 30)), _data_parcela(r, ano), _data_parcela(r, ano),
+                    r.choice((None, True, 'X')), r.choice((None, 1)), r.choice((None, False, True)),
+                ]
+        linhas.append(linha)
+    _gravar(caminho, {ABA_FERIAS: linhas})
+    return caminho
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera planilhas sintéticas de Resumos Estatísticas e AFASTAMENTOS')
+    parser.add_argument('--escala', type=int, default=1, help='Multiplicador de linhas (1 = tamanho real)')
+    parser.add_argument('--semente', type=int, default=0, help='Semente do gerador aleatório')
+    parser.add_argument('--saida', default='.', help='Diretório de saída')
+    args = parser.parse_args()
+
+    for nome, gerar in (('resumos', gerar_resumos), ('afastamentos', gerar_afastamentos)):
+        caminho = os.path.join(args.saida, f'{nome}_{args.escala}x.xlsx')
+        print(f"{gerar(caminho, args.escala, args.semente)} ({os.path.getsize(caminho)} bytes)")
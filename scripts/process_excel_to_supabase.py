@@ -1,13 +1,21 @@
 """
 Script para processar Excel de Estatísticas BPMA e gerar tabelas dim e fat no Supabase
 """
+import argparse
+import numpy as np
 import pandas as pd
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import re
 
-excel_path = r'C:\Users\joaop\BPMA\Resumos Estatísticas 2025 a 2020.xlsx'
+from cache_planilhas import ler_aba, listar_abas
+from dados_processados import gravar_tabela
+import ingestao_incremental as incremental
+
+# Workbook padrão (sobrescrito pelo argumento da linha de comando ou EXCEL_PATH)
+excel_path = os.environ.get('EXCEL_PATH', r'C:\Users\joaop\BPMA\Resumos Estatísticas 2025 a 2020.xlsx')
 
 # Mapeamento de meses
 MESES = {
@@ -15,6 +23,13 @@ MESES = {
     'JUL': 7, 'AGO': 8, 'SET': 9, 'OUT': 10, 'NOV': 11, 'DEZ': 12
 }
 
+# Rótulos de seção aceitos na linha dos meses (célula inteira, já em maiúsculas)
+ROTULOS_FAUNA = {
+    'AVES': 'AVES',
+    'MAMÍFEROS': 'MAMÍFEROS', 'MAMIFEROS': 'MAMÍFEROS',
+    'RÉPTEIS': 'RÉPTEIS', 'REPTEIS': 'RÉPTEIS', 'RÉPTIL': 'RÉPTEIS', 'REPTIL': 'RÉPTEIS'
+}
+
 def limpar_nome_cientifico(nome):
     """Limpa e normaliza nome científico"""
     if pd.isna(nome) or nome == '':
@@ -31,195 +46,356 @@ def limpar_nome_popular(nome):
     nome = str(nome).strip()
     return nome
 
-def processar_aba_atendimentos(df, ano):
+def normalizar_aba(df):
+    """Converte a aba inteira para texto maiúsculo de uma só vez (células vazias viram '')"""
+    texto = df.astype(str).where(df.notna(), '')
+    return texto.apply(lambda col: col.str.upper())
+
+def _texto_linhas(texto):
+    """Concatena cada linha da aba normalizada em uma única string (equivale ao ' '.join por linha)"""
+    colunas = [texto.iloc[:, c] for c in range(1, texto.shape[1])]
+    return texto.iloc[:, 0].str.cat(colunas, sep=' ') if colunas else texto.iloc[:, 0]
+
+def _contem(serie, termos):
+    """Máscara booleana das linhas que contêm qualquer um dos termos"""
+    mascara = np.zeros(len(serie), dtype=bool)
+    for termo in termos:
+        mascara |= serie.str.contains(termo, regex=False).to_numpy(dtype=bool)
+    return mascara
+
+def _rotulos_fauna(texto):
+    """Tipo de fauna de cada linha pela primeira célula (da esquerda) que é exatamente um rótulo de seção"""
+    rotulos = np.full(len(texto), None, dtype=object)
+    for c in range(texto.shape[1]):
+        celula = texto.iloc[:, c].str.strip().map(ROTULOS_FAUNA).to_numpy(dtype=object)
+        novos = pd.notna(celula) & pd.isna(rotulos)
+        rotulos[novos] = celula[novos]
+    return rotulos
+
+def _colunas_meses(valores_linha, colunas):
+    """Mapeia índice de coluna -> número do mês a partir de uma linha normalizada"""
+    meses_cols = {}
+    for col_idx in colunas:
+        mes_str = valores_linha[col_idx].strip()
+        if mes_str in MESES:
+            meses_cols[col_idx] = MESES[mes_str]
+    return meses_cols
+
+def _numerico(col):
+    """Converte uma coluna para float; textos não numéricos viram NaN (como o try/except original)"""
+    if pd.api.types.is_numeric_dtype(col):
+        return pd.to_numeric(col, errors='coerce')
+    return pd.to_numeric(col.astype(str).str.strip(), errors='coerce')
+
+def _quantidades(df, linhas, meses_cols):
+    """Extrai a matriz de quantidades (linhas x meses) truncada para inteiro.
+
+    Retorna os índices (linha, mês) com quantidade > 0 em ordem de linha, como o loop original.
+    """
+    cols = list(meses_cols)
+    bloco = df.iloc[linhas, cols].apply(_numerico)
+    valores = np.trunc(bloco.to_numpy(dtype=float, na_value=np.nan))
+    with np.errstate(invalid='ignore'):
+        pos_linha, pos_col = np.nonzero(valores > 0)
+    meses = np.array([meses_cols[c] for c in cols], dtype=int)
+    return pos_linha, meses[pos_col], valores[pos_linha, pos_col].astype(int)
+
+def processar_aba_atendimentos(df, ano, texto=None):
     """Processa dados de atendimentos agregados"""
     dados = []
+    if df.empty:
+        return dados
+    if texto is None:
+        texto = normalizar_aba(df)
     
     # Encontrar linha de cabeçalho (NATUREZA / MESES)
-    header_row = None
-    for i in range(len(df)):
-        row_str = ' '.join([str(val).upper() if pd.notna(val) else '' for val in df.iloc[i].values])
-        if 'NATUREZA' in row_str and 'MESES' in row_str:
-            header_row = i
-            break
-    
-    if header_row is None:
+    linhas_str = _texto_linhas(texto)
+    candidatas = np.flatnonzero(_contem(linhas_str, ['NATUREZA']) & _contem(linhas_str, ['MESES']))
+    if len(candidatas) == 0:
         return dados
+    header_row = int(candidatas[0])
     
     # Ler cabeçalho de meses
-    meses_cols = {}
-    for col_idx in range(len(df.columns)):
-        val = df.iloc[header_row, col_idx]
-        if pd.notna(val):
-            mes_str = str(val).strip().upper()
-            if mes_str in MESES:
-                meses_cols[col_idx] = MESES[mes_str]
+    meses_cols = _colunas_meses(texto.iloc[header_row].to_numpy(), range(len(df.columns)))
+    if not meses_cols:
+        return dados
     
-    # Processar linhas de dados (começando da linha seguinte ao cabeçalho)
-    for i in range(header_row + 1, len(df)):
-        natureza = df.iloc[i, 0]
-        if pd.isna(natureza) or str(natureza).strip() == '':
-            continue
-        
-        natureza = str(natureza).strip()
-        
-        # Processar valores por mês
-        for col_idx, mes_num in meses_cols.items():
-            valor = df.iloc[i, col_idx]
-            if pd.notna(valor):
-                try:
-                    quantidade = int(float(valor))
-                    if quantidade > 0:
-                        dados.append({
-                            'ano': ano,
-                            'mes': mes_num,
-                            'natureza': natureza,
-                            'quantidade': quantidade
-                        })
-                except (ValueError, TypeError):
-                    pass
+    # Linhas de dados: após o cabeçalho e com natureza preenchida
+    natureza = df.iloc[header_row + 1:, 0]
+    natureza_str = natureza.astype(str).str.strip()
+    validas = natureza.notna().to_numpy() & (natureza_str != '').to_numpy()
+    linhas = np.flatnonzero(validas) + header_row + 1
+    if len(linhas) == 0:
+        return dados
+    naturezas = df.iloc[linhas, 0].astype(str).str.strip().to_numpy()
+    
+    pos_linha, meses, quantidades = _quantidades(df, linhas, meses_cols)
+    for p, mes_num, quantidade in zip(pos_linha.tolist(), meses.tolist(), quantidades.tolist()):
+        dados.append({
+            'ano': ano,
+            'mes': mes_num,
+            'natureza': naturezas[p],
+            'quantidade': quantidade
+        })
     
     return dados
 
-def processar_aba_resgates(df, ano):
+def _limpar_coluna(serie, espacos=False):
+    """Versão vetorizada de limpar_nome_popular / limpar_nome_cientifico"""
+    vazia = serie.isna() | (serie.astype(str) == '')
+    limpa = serie.astype(str).str.strip()
+    if espacos:
+        limpa = limpa.str.replace(r'\s+', ' ', regex=True)
+    return limpa.astype(object).where(~vazia, None)
+
+def processar_aba_resgates(df, ano, texto=None):
     """Processa dados de resgate por espécie"""
     dados = []
+    if df.empty:
+        return dados
+    if texto is None:
+        texto = normalizar_aba(df)
+    
+    n = len(df)
+    ncols = len(df.columns)
+    linhas_str = _texto_linhas(texto)
+    preenchidas = (texto.apply(lambda col: col.str.strip()) != '').sum(axis=1).to_numpy()
+    poucas = preenchidas <= 2
+    
+    # Seções de espécies (AVES, MAMÍFEROS, RÉPTEIS), na mesma prioridade do loop original
+    aves = _contem(linhas_str, ['AVES']) & poucas
+    mamiferos = _contem(linhas_str, ['MAMÍFEROS', 'MAMIFEROS']) & poucas & ~aves
+    repteis = _contem(linhas_str, ['RÉPTEIS', 'REPTEIS', 'RÉPTIL', 'REPTIL']) & poucas & ~aves & ~mamiferos
+    secao = np.full(n, None, dtype=object)
+    secao[aves] = 'AVES'
+    secao[mamiferos] = 'MAMÍFEROS'
+    secao[repteis] = 'RÉPTEIS'
+    # Rótulo de seção na própria linha dos meses (acima do cabeçalho)
+    rotulo_meses = _rotulos_fauna(texto)
+    
+    # Cabeçalhos: "NOME POPULAR" na primeira coluna e algo com "CIENT" na segunda
+    col0 = texto.iloc[:, 0]
+    col1 = texto.iloc[:, 1] if ncols > 1 else pd.Series([''] * n, index=df.index)
+    cabecalho = _contem(col0, ['NOME POPULAR']) & _contem(col1, ['CIENT'])
     
-    # Procurar seções de espécies (AVES, MAMÍFEROS, RÉPTEIS)
+    # Linhas sem nome popular que encerram um bloco de espécies
+    col0_vazia = (df.iloc[:, 0].isna() | (df.iloc[:, 0].astype(str).str.strip() == '')).to_numpy()
+    quebras = np.flatnonzero(col0_vazia & _contem(linhas_str, ['AVES', 'MAMÍFEROS', 'MAMIFEROS', 'RÉPTEIS', 'REPTEIS', 'NOME POPULAR', 'RESGATE']))
+    rotulo = col0.str.strip().isin(['NOME POPULAR', 'NOME CIENTÍFICO', 'NOME CIENTIFICO', 'ORDEM']).to_numpy()
+    especie = ~col0_vazia & ~rotulo
+    
+    nome_popular = _limpar_coluna(df.iloc[:, 0]).to_numpy()
+    nome_cientifico = _limpar_coluna(df.iloc[:, 1], espacos=True).to_numpy() if ncols > 1 else np.full(n, None, dtype=object)
+    if ncols > 2:
+        ordem_col = df.iloc[:, 2]
+        ordem = ordem_col.astype(str).str.strip().astype(object).where(ordem_col.notna(), None).to_numpy()
+    else:
+        ordem = np.full(n, None, dtype=object)
+    
+    # Percorre apenas os marcadores de seção/cabeçalho; o conteúdo dos blocos é extraído em lote
     tipo_fauna = None
     i = 0
-    
-    while i < len(df):
-        row_values = [str(val).upper() if pd.notna(val) else '' for val in df.iloc[i].values]
-        row_str = ' '.join(row_values)
-        
-        # Detectar tipo de fauna
-        if 'AVES' in row_str and len([x for x in row_values if x.strip()]) <= 2:
-            tipo_fauna = 'AVES'
-            i += 1
-            continue
-        elif ('MAMÍFEROS' in row_str or 'MAMIFEROS' in row_str) and len([x for x in row_values if x.strip()]) <= 2:
-            tipo_fauna = 'MAMÍFEROS'
-            i += 1
-            continue
-        elif ('RÉPTEIS' in row_str or 'REPTEIS' in row_str or 'RÉPTIL' in row_str or 'REPTIL' in row_str) and len([x for x in row_values if x.strip()]) <= 2:
-            tipo_fauna = 'RÉPTEIS'
+    while i < n:
+        if secao[i] is not None:
+            tipo_fauna = secao[i]
             i += 1
             continue
         
-        # Procurar linha de cabeçalho com NOME POPULAR, NOME CIENTÍFICO (com ou sem acento)
-        # Verificar se a primeira coluna tem "NOME POPULAR" e segunda tem algo com "CIENT"
-        col0 = str(df.iloc[i, 0]).upper() if pd.notna(df.iloc[i, 0]) and len(df.columns) > 0 else ''
-        col1 = str(df.iloc[i, 1]).upper() if pd.notna(df.iloc[i, 1]) and len(df.columns) > 1 else ''
-        
-        if 'NOME POPULAR' in col0 and 'CIENT' in col1:
-            # Esta é a linha de cabeçalho
-            header_row = i
-            
+        if cabecalho[i]:
             # Os meses estão na linha anterior (onde está o tipo de fauna)
-            meses_row = i - 1
-            meses_cols = {}
-            for col_idx in range(3, min(16, len(df.columns))):  # Começar da coluna 3
-                val = df.iloc[meses_row, col_idx]
-                if pd.notna(val):
-                    mes_str = str(val).strip().upper()
-                    if mes_str in MESES:
-                        meses_cols[col_idx] = MESES[mes_str]
+            if i > 0 and rotulo_meses[i - 1] is not None:
+                tipo_fauna = rotulo_meses[i - 1]
+            meses_cols = _colunas_meses(texto.iloc[i - 1].to_numpy(), range(3, min(16, ncols)))
             
-            # Processar linhas de espécies (começando da linha seguinte)
-            i += 1
-            while i < len(df):
-                nome_popular = df.iloc[i, 0] if len(df.columns) > 0 else None
-                
-                # Verificar se é uma linha válida de espécie
-                if pd.isna(nome_popular) or str(nome_popular).strip() == '':
-                    # Verificar se encontrou outra seção
-                    row_check = ' '.join([str(val).upper() if pd.notna(val) else '' for val in df.iloc[i].values])
-                    if any(x in row_check for x in ['AVES', 'MAMÍFEROS', 'MAMIFEROS', 'RÉPTEIS', 'REPTEIS', 'NOME POPULAR', 'RESGATE']):
-                        break
-                    i += 1
-                    continue
-                
-                # Filtrar linha de cabeçalho
-                nome_popular_upper = str(nome_popular).upper().strip()
-                if nome_popular_upper in ['NOME POPULAR', 'NOME CIENTÍFICO', 'NOME CIENTIFICO', 'ORDEM']:
-                    i += 1
-                    continue
-                
-                nome_popular = limpar_nome_popular(nome_popular)
-                nome_cientifico = df.iloc[i, 1] if len(df.columns) > 1 else None
-                nome_cientifico = limpar_nome_cientifico(nome_cientifico)
-                ordem = df.iloc[i, 2] if len(df.columns) > 2 else None
-                ordem = str(ordem).strip() if pd.notna(ordem) else None
-                
-                # Processar valores por mês
-                for col_idx, mes_num in meses_cols.items():
-                    if col_idx < len(df.columns):
-                        valor = df.iloc[i, col_idx]
-                        if pd.notna(valor):
-                            try:
-                                quantidade = int(float(valor))
-                                if quantidade > 0:
-                                    dados.append({
-                                        'ano': ano,
-                                        'mes': mes_num,
-                                        'tipo_fauna': tipo_fauna,
-                                        'nome_popular': nome_popular,
-                                        'nome_cientifico': nome_cientifico,
-                                        'ordem': ordem,
-                                        'quantidade': quantidade
-                                    })
-                            except (ValueError, TypeError):
-                                pass
-                
-                i += 1
+            # O bloco vai até a próxima linha de quebra (que também é pulada, como no loop original)
+            k = np.searchsorted(quebras, i + 1)
+            fim = int(quebras[k]) if k < len(quebras) else n
+            linhas = np.flatnonzero(especie[i + 1:fim]) + i + 1
+            
+            if meses_cols and len(linhas) > 0:
+                pos_linha, meses, quantidades = _quantidades(df, linhas, meses_cols)
+                for p, mes_num, quantidade in zip(pos_linha.tolist(), meses.tolist(), quantidades.tolist()):
+                    linha = linhas[p]
+                    dados.append({
+                        'ano': ano,
+                        'mes': mes_num,
+                        'tipo_fauna': tipo_fauna,
+                        'nome_popular': nome_popular[linha],
+                        'nome_cientifico': nome_cientifico[linha],
+                        'ordem': ordem[linha],
+                        'quantidade': quantidade
+                    })
+            i = fim + 1
+            continue
         
         i += 1
     
     return dados
 
+def processar_aba(caminho, sheet_name):
+    """Lê e processa uma aba (um ano); roda isolada em cada processo do pool"""
+    ano = int(sheet_name)
+    df = ler_aba(caminho, sheet_name)
+    # Normalizar a aba uma única vez para os dois parsers
+    texto = normalizar_aba(df)
+    atendimentos = processar_aba_atendimentos(df, ano, texto)
+    resgates = processar_aba_resgates(df, ano, texto)
+    return ano, atendimentos, resgates
+
+def processar_abas(caminho, sheet_names, workers=1):
+    """Processa as abas em série ou em um ProcessPoolExecutor.
+
+    Os resultados são devolvidos na ordem de sheet_names, independente da ordem de término.
+    """
+    if workers <= 1 or len(sheet_names) <= 1:
+        for sheet_name in sheet_names:
+            yield processar_aba(caminho, sheet_name)
+        return
+    
+    with ProcessPoolExecutor(max_workers=min(workers, len(sheet_names))) as executor:
+        yield from executor.map(processar_aba, [caminho] * len(sheet_names), sheet_names)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Processa o Excel de Estatísticas BPMA')
+    parser.add_argument('excel', nargs='?', default=excel_path,
+                        help='Workbook de Estatísticas BPMA (padrão: EXCEL_PATH ou o caminho configurado no script); '
+                             'vários workbooks: processar_estatisticas_lote.py')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Número de processos para processar as abas em paralelo (padrão: 1)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reprocessa só as abas alteradas e gera uma migration apenas com o delta')
+    parser.add_argument('--estado', default=None,
+                        help='Arquivo de estado do modo incremental (padrão: data/processed/estado_incremental.json)')
+    parser.add_argument('--csv', action='store_true',
+                        help='Também exporta atendimentos.csv e resgates.csv (além do Parquet)')
+    return parser.parse_args()
+
+def processar_incremental(caminho, sheet_names, output_dir, estado_path, workers=1):
+    """Reprocessa só as abas cujo conteúdo mudou desde a última execução incremental.
+
+    Devolve (df_atendimentos, df_resgates, delta, estado); o estado é gravado pelo chamador
+    depois de salvar os dados processados (o hash deles faz parte do estado).
+    """
+    estado_anterior = incremental.carregar_estado(estado_path)
+    base = incremental.base_anterior(estado_anterior, caminho, output_dir)
+    if base is None:
+        print("Sem estado válido: todas as abas serão processadas e enviadas como upsert\n")
+        estado_anterior = None
+    antigos_at, antigos_rs = base if base is not None else (None, None)
+    
+    hashes_abas = {nome: incremental.hash_aba(ler_aba(caminho, nome)) for nome in sheet_names}
+    alteradas = [nome for nome in sheet_names
+                 if estado_anterior is None or estado_anterior['abas'].get(nome) != hashes_abas[nome]]
+    print(f"Abas alteradas: {alteradas or 'nenhuma'}\n")
+    
+    novas = {ano: (atendimentos, resgates) for ano, atendimentos, resgates in processar_abas(caminho, alteradas, workers)}
+    blocos = dict(estado_anterior['blocos']) if estado_anterior else {}
+    delta = incremental.Delta()
+    partes_at, partes_rs = [], []
+    for nome in sheet_names:
+        ano = int(nome)
+        if ano not in novas:
+            partes_at.append(incremental.linhas_do_ano(antigos_at, ano, incremental.COLUNAS_ATENDIMENTOS))
+            partes_rs.append(incremental.linhas_do_ano(antigos_rs, ano, incremental.COLUNAS_RESGATES))
+            continue
+        atendimentos, resgates = novas[ano]
+        partes_at.append(atendimentos)
+        partes_rs.append(resgates)
+        
+        blocos_ano = incremental.hashes_blocos(ano, atendimentos, resgates)
+        prefixo = f"{ano}/"
+        anteriores = {k: v for k, v in blocos.items() if k.startswith(prefixo)}
+        if anteriores == blocos_ano:
+            print(f"Ano {ano}: aba alterada, mas nenhum bloco de dados mudou")
+            continue
+        mudados = sorted(set(anteriores.items()) ^ set(blocos_ano.items()))
+        print(f"Ano {ano}: blocos alterados {sorted({k for k, _ in mudados})}")
+        for k in anteriores:
+            del blocos[k]
+        blocos.update(blocos_ano)
+        delta.adicionar_ano(
+            incremental.linhas_do_ano(antigos_at, ano, incremental.COLUNAS_ATENDIMENTOS),
+            atendimentos,
+            incremental.linhas_do_ano(antigos_rs, ano, incremental.COLUNAS_RESGATES),
+            resgates,
+        )
+    
+    df_atendimentos = pd.DataFrame([l for parte in partes_at for l in parte], columns=incremental.COLUNAS_ATENDIMENTOS)
+    df_resgates = pd.DataFrame([l for parte in partes_rs for l in parte], columns=incremental.COLUNAS_RESGATES)
+    estado = {
+        'versao': incremental.VERSAO_ESTADO,
+        'arquivo': os.path.abspath(caminho),
+        'abas': hashes_abas,
+        'blocos': {k: v for k, v in blocos.items() if k.split('/')[0] in sheet_names},
+    }
+    return df_atendimentos, df_resgates, delta, estado
+
+def salvar_delta(delta, migrations_dir):
+    """Grava a migration do delta; devolve o caminho (ou None se não houver mudanças)"""
+    if delta.vazio():
+        return None
+    os.makedirs(migrations_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    caminho = os.path.join(migrations_dir, f"{timestamp}_delta_estatisticas_bpma_adaptado.sql")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(incremental.sql_delta(delta))
+    return caminho
+
 def main():
+    args = parse_args()
+    excel_path = args.excel
     if not os.path.exists(excel_path):
         print(f"Arquivo não encontrado: {excel_path}")
         sys.exit(1)
     
     try:
-        xls = pd.ExcelFile(excel_path)
-        print(f"Processando abas: {xls.sheet_names}\n")
+        # Converte o workbook para o cache colunar uma única vez, antes de distribuir as abas
+        sheet_names = listar_abas(excel_path)
+        print(f"Processando abas: {sheet_names}\n")
+        if args.workers > 1:
+            print(f"Usando {args.workers} processos em paralelo\n")
         
-        todos_atendimentos = []
-        todos_resgates = []
+        output_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed')
+        os.makedirs(output_dir, exist_ok=True)
         
-        for sheet_name in xls.sheet_names:
-            ano = int(sheet_name)
-            print(f"Processando ano {ano}...")
-            
-            df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+        if args.incremental:
+            estado_path = args.estado or os.path.join(output_dir, 'estado_incremental.json')
+            df_atendimentos, df_resgates, delta, estado = processar_incremental(
+                excel_path, sheet_names, output_dir, estado_path, args.workers)
+        else:
+            todos_atendimentos = []
+            todos_resgates = []
             
-            # Processar atendimentos
-            atendimentos = processar_aba_atendimentos(df, ano)
-            todos_atendimentos.extend(atendimentos)
-            print(f"  - {len(atendimentos)} registros de atendimentos")
+            for ano, atendimentos, resgates in processar_abas(excel_path, sheet_names, args.workers):
+                print(f"Processando ano {ano}...")
+                
+                # Processar atendimentos
+                todos_atendimentos.extend(atendimentos)
+                print(f"  - {len(atendimentos)} registros de atendimentos")
+                
+                # Processar resgates
+                todos_resgates.extend(resgates)
+                print(f"  - {len(resgates)} registros de resgates")
             
-            # Processar resgates
-            resgates = processar_aba_resgates(df, ano)
-            todos_resgates.extend(resgates)
-            print(f"  - {len(resgates)} registros de resgates")
-        
-        print(f"\nTotal de atendimentos: {len(todos_atendimentos)}")
-        print(f"Total de resgates: {len(todos_resgates)}")
+            # Salvar dados processados
+            df_atendimentos = pd.DataFrame(todos_atendimentos)
+            df_resgates = pd.DataFrame(todos_resgates)
         
-        # Salvar dados processados
-        df_atendimentos = pd.DataFrame(todos_atendimentos)
-        df_resgates = pd.DataFrame(todos_resgates)
+        print(f"\nTotal de atendimentos: {len(df_atendimentos)}")
+        print(f"Total de resgates: {len(df_resgates)}")
         
-        output_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed')
-        os.makedirs(output_dir, exist_ok=True)
+        gravados = (gravar_tabela(df_atendimentos, 'atendimentos', output_dir, csv=args.csv) +
+                    gravar_tabela(df_resgates, 'resgates', output_dir, csv=args.csv))
         
-        df_atendimentos.to_csv(os.path.join(output_dir, 'atendimentos.csv'), index=False, encoding='utf-8-sig')
-        df_resgates.to_csv(os.path.join(output_dir, 'resgates.csv'), index=False, encoding='utf-8-sig')
+        print(f"\nDados salvos em: {output_dir} ({', '.join(os.path.basename(c) for c in gravados)})")
         
-        print(f"\nDados salvos em: {output_dir}")
+        if args.incremental:
+            migrations_dir = os.path.join(os.path.dirname(__file__), '..', 'supabase', 'migrations')
+            migration = salvar_delta(delta, migrations_dir)
+            print(f"\nDelta: {delta.resumo()}")
+            print(f"Migration do delta: {migration}" if migration else "Nenhuma mudança nas tabelas fact_*")
+            estado['dados'] = incremental.hashes_dados(output_dir)
+            incremental.salvar_estado(estado_path, estado)
         
         # Estatísticas
         print("\n=== ESTATÍSTICAS ===")
@@ -237,7 +413,7 @@ def main():
         else:
             print("\nNenhum resgate encontrado. Verificando estrutura do Excel...")
             # Debug: mostrar algumas linhas da aba 2025
-            df_debug = pd.read_excel(xls, sheet_name='2025', header=None)
+            df_debug = ler_aba(excel_path, '2025')
             print("\nPrimeiras 100 linhas da aba 2025 procurando por 'NOME POPULAR':")
             for i in range(min(100, len(df_debug))):
                 row_str = ' '.join([str(val).upper() if pd.notna(val) else '' for val in df_debug.iloc[i].values[:5]])
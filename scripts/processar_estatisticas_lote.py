@@ -0,0 +1,177 @@
+"""
+Processa vários workbooks de Estatísticas BPMA de uma vez (ex.: anos arquivados)
+
+Recebe arquivos, diretórios (todos os .xlsx dentro, recursivamente) ou globs e distribui
+o trabalho num ProcessPoolExecutor em duas etapas:
+  1. um workbook por tarefa: decodifica o arquivo para o cache colunar (cache_planilhas.py)
+     e lista as abas;
+  2. uma aba (ano) por tarefa: os mesmos parsers de process_excel_to_supabase.py, e o
+     próprio processo grava o resultado.
+
+A saída é particionada por ano (layout Hive, legível por pd.read_parquet no diretório):
+  data/processed/atendimentos/ano=2025/part-0.parquet
+  data/processed/resgates/ano=2025/part-0.parquet
+Só as partições dos anos processados são substituídas; as demais ficam como estão.
+Um ano presente em mais de um workbook vem do arquivo modificado mais recentemente.
+
+No fim, todas as partições são consolidadas em atendimentos.parquet/resgates.parquet
+(dados_processados.py), lidos pelos geradores de SQL; --csv também exporta os CSVs.
+
+Uso:
+  python scripts/processar_estatisticas_lote.py "C:/BPMA/Resumos/"
+  python scripts/processar_estatisticas_lote.py "arquivo/*.xlsx" --workers 8 --csv
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from cache_planilhas import listar_abas
+from dados_processados import COLUNAS_ATENDIMENTOS, COLUNAS_RESGATES, gravar_tabela, tipar
+from process_excel_to_supabase import processar_aba
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAIDA_PADRAO = os.path.join(base_dir, 'data', 'processed')
+
+TABELAS = {'atendimentos': COLUNAS_ATENDIMENTOS, 'resgates': COLUNAS_RESGATES}
+
+
+def expandir_entradas(entradas):
+    """Workbooks .xlsx de arquivos, diretórios e globs (sem repetição, em ordem de nome)"""
+    arquivos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = glob.glob(os.path.join(entrada, '**', '*.xlsx'), recursive=True)
+        elif glob.has_magic(entrada):
+            candidatos = glob.glob(entrada, recursive=True)
+        else:
+            candidatos = [entrada]
+        for caminho in candidatos:
+            # ~$arquivo.xlsx: arquivo de bloqueio do Excel aberto
+            if not os.path.basename(caminho).startswith('~$'):
+                arquivos.add(os.path.abspath(caminho))
+    return sorted(arquivos)
+
+
+def particao(saida, tabela, ano):
+    return os.path.join(saida, tabela, f'ano={ano}')
+
+
+def gravar_particao(saida, tabela, ano, linhas):
+    """Substitui a partição do ano (o diretório novo entra no lugar do antigo no fim)"""
+    colunas = [c for c in TABELAS[tabela] if c != 'ano']
+    df = tipar(pd.DataFrame(linhas, columns=TABELAS[tabela]), tabela, colunas)
+    destino = particao(saida, tabela, ano)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f'.tmp_ano={ano}_', dir=os.path.dirname(destino))
+    try:
+        df.to_parquet(os.path.join(tmp, 'part-0.parquet'), index=False)
+        shutil.rmtree(destino, ignore_errors=True)
+        os.replace(tmp, destino)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return len(df)
+
+
+def _listar(caminho):
+    """Etapa 1 (no pool): constrói o cache do workbook e devolve as abas de ano"""
+    abas = listar_abas(caminho)
+    return caminho, [aba for aba in abas if aba.strip().isdigit()], [aba for aba in abas if not aba.strip().isdigit()]
+
+
+def _processar(caminho, sheet_name, saida):
+    """Etapa 2 (no pool): processa uma aba e grava as duas partições do ano"""
+    ano, atendimentos, resgates = processar_aba(caminho, sheet_name)
+    return (caminho, ano,
+            gravar_particao(saida, 'atendimentos', ano, atendimentos),
+            gravar_particao(saida, 'resgates', ano, resgates))
+
+
+def escolher_abas(workbooks):
+    """{ano: (workbook, aba)}; ano repetido: vale o workbook modificado por último"""
+    escolhidas = {}
+    ignoradas = []
+    for caminho, abas in sorted(workbooks.items(), key=lambda item: (os.path.getmtime(item[0]), item[0])):
+        for aba in abas:
+            ano = int(aba)
+            if ano in escolhidas:
+                ignoradas.append((ano, escolhidas[ano][0]))
+            escolhidas[ano] = (caminho, aba)
+    return escolhidas, ignoradas
+
+
+def ler_tabela(saida, tabela):
+    """Todas as partições de uma tabela, com o schema de dados_processados"""
+    df = pd.read_parquet(os.path.join(saida, tabela))
+    # ano vem da partição como categoria de texto
+    df['ano'] = df['ano'].astype(str)
+    return tipar(df, tabela)
+
+
+def consolidar(saida, csv=False):
+    """atendimentos.parquet/resgates.parquet únicos (anos do mais recente ao mais antigo, como nas abas)"""
+    gravados = []
+    for tabela in TABELAS:
+        df = ler_tabela(saida, tabela)
+        df = df.sort_values('ano', ascending=False, kind='stable').reset_index(drop=True)
+        gravados.extend(gravar_tabela(df, tabela, saida, csv=csv))
+    return gravados
+
+
+def processar_lote(arquivos, saida=SAIDA_PADRAO, workers=None):
+    """Processa os workbooks; devolve {ano: (workbook, atendimentos, resgates)} e os anos ignorados"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        workbooks = {}
+        for caminho, anos, outras in executor.map(_listar, arquivos):
+            workbooks[caminho] = anos
+            if outras:
+                print(f"  {os.path.basename(caminho)}: abas ignoradas (não são anos): {outras}")
+        escolhidas, ignoradas = escolher_abas(workbooks)
+
+        tarefas = [executor.submit(_processar, caminho, aba, saida) for caminho, aba in escolhidas.values()]
+        resultado = {}
+        for tarefa in tarefas:
+            caminho, ano, n_atendimentos, n_resgates = tarefa.result()
+            resultado[ano] = (caminho, n_atendimentos, n_resgates)
+    return resultado, ignoradas
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Processa vários workbooks de Estatísticas BPMA em paralelo (saída Parquet por ano)')
+    parser.add_argument('entradas', nargs='+', help='Workbooks .xlsx, diretórios ou globs')
+    parser.add_argument('--saida', default=SAIDA_PADRAO, help='Diretório de saída (padrão: data/processed)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processos no pool (padrão: número de CPUs)')
+    parser.add_argument('--csv', action='store_true',
+                        help='Também exporta atendimentos.csv e resgates.csv com todos os anos da saída')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    arquivos = expandir_entradas(args.entradas)
+    faltando = [a for a in arquivos if not os.path.exists(a)]
+    if faltando or not arquivos:
+        print("ERRO: nenhum workbook encontrado" if not arquivos else f"ERRO: arquivos não encontrados: {faltando}")
+        sys.exit(1)
+
+    print(f"Workbooks: {len(arquivos)}")
+    inicio = time.perf_counter()
+    resultado, ignoradas = processar_lote(arquivos, args.saida, args.workers)
+    for ano, caminho in ignoradas:
+        print(f"  Ano {ano} de {os.path.basename(caminho)} ignorado (há um workbook mais recente com o mesmo ano)")
+    for ano in sorted(resultado, reverse=True):
+        caminho, n_atendimentos, n_resgates = resultado[ano]
+        print(f"  {ano}: {n_atendimentos} atendimentos, {n_resgates} resgates ({os.path.basename(caminho)})")
+    print(f"\n{len(resultado)} anos em {time.perf_counter() - inicio:.1f}s -> {args.saida}")
+
+    gravados = consolidar(args.saida, args.csv)
+    print(f"Consolidado: {', '.join(os.path.basename(c) for c in gravados)}")
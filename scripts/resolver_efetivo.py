@@ -0,0 +1,153 @@
+"""
+Resolução em lote de matrícula -> dim_efetivo.id
+
+Em vez de um GET por matrícula (e outro para a forma sem zeros à esquerda), as
+matrículas da planilha são buscadas de uma vez em requisições matricula=in.(...)
+ou por varredura paginada da tabela inteira. O resultado fica em um índice em
+memória com todas as formas normalizadas (original, sem zeros à esquerda e com
+8 dígitos, como em dim_efetivo após a normalização, que remove
+caracteres não numéricos).
+"""
+import asyncio
+import re
+
+# Matrículas por requisição in.(...); cada uma vai com até 5 formas (formas_matricula),
+# então 100 matrículas dão até 500 valores, ~5,5 KB de URL (abaixo dos 8 KB comuns em proxies)
+TAMANHO_LOTE_IN = 100
+# Linhas por página na varredura completa de dim_efetivo
+TAMANHO_PAGINA = 1000
+
+_NAO_DIGITO = re.compile(r'[^0-9]')
+
+
+def formas_matricula(matricula):
+    """Formas de busca de uma matrícula: original, sem zeros à esquerda, só dígitos e 8 dígitos (lpad)"""
+    original = str(matricula).strip()
+    formas = [original, original.lstrip('0')]
+    digitos = _NAO_DIGITO.sub('', original)
+    if digitos:
+        formas += [digitos, digitos.lstrip('0'), digitos.zfill(8)]
+    return [f for f in dict.fromkeys(formas) if f]
+
+
+class ResolvedorMatriculas:
+    """Índice em memória de dim_efetivo por matrícula, carregado em lote.
+
+    consulta: função no formato supabase_query(table, method, filters, data).
+    """
+
+    def __init__(self, consulta, tamanho_lote=TAMANHO_LOTE_IN, tamanho_pagina=TAMANHO_PAGINA):
+        self.consulta = consulta
+        self.tamanho_lote = tamanho_lote
+        self.tamanho_pagina = tamanho_pagina
+        # Matrícula exatamente como está no banco -> id (tem prioridade, como a busca eq. original)
+        self.exatas = {}
+        # Formas normalizadas da matrícula do banco -> id
+        self.normalizadas = {}
+        self.consultadas = set()
+        self.tabela_completa = False
+        self.requisicoes = 0
+
+    def indexar(self, linhas):
+        """Adiciona linhas {id, matricula} de dim_efetivo ao índice"""
+        for linha in linhas:
+            matricula = linha.get('matricula')
+            if matricula is None or str(matricula).strip() == '':
+                continue
+            self.exatas.setdefault(str(matricula).strip(), linha['id'])
+            for forma in formas_matricula(matricula):
+                self.normalizadas.setdefault(forma, linha['id'])
+
+    def _filtros_pendentes(self, matriculas):
+        """Filtros matricula=in.(...) das matrículas ainda não consultadas"""
+        if self.tabela_completa:
+            return []
+        pendentes = []
+        for matricula in matriculas:
+            matricula = str(matricula).strip()
+            if matricula and matricula not in self.consultadas:
+                self.consultadas.add(matricula)
+                pendentes.append(matricula)
+
+        # Lotes de tamanho_lote matrículas, cada uma com todas as suas formas (sem repetir formas entre lotes)
+        vistas = set()
+        filtros = []
+        for inicio in range(0, len(pendentes), self.tamanho_lote):
+            formas = []
+            for m in pendentes[inicio:inicio + self.tamanho_lote]:
+                for f in formas_matricula(m):
+                    if f not in vistas:
+                        vistas.add(f)
+                        formas.append(f)
+            if formas:
+                lista = ','.join(f'"{f}"' for f in formas)
+                filtros.append({'matricula': f'in.({lista})', 'select': 'id,matricula'})
+        return filtros
+
+    def _filtros_pagina(self, offset):
+        return {
+            'select': 'id,matricula',
+            'order': 'id',
+            'limit': str(self.tamanho_pagina),
+            'offset': str(offset),
+        }
+
+    def carregar(self, matriculas):
+        """Busca em lote (matricula=in.(...)) todas as matrículas ainda não consultadas"""
+        for filtros in self._filtros_pendentes(matriculas):
+            self.requisicoes += 1
+            self.indexar(self.consulta('dim_efetivo', method='GET', filters=filtros))
+
+    def carregar_todos(self):
+        """Carrega dim_efetivo inteira em páginas (útil quando as matrículas não são conhecidas antes)"""
+        offset = 0
+        while True:
+            self.requisicoes += 1
+            pagina = self.consulta('dim_efetivo', method='GET', filters=self._filtros_pagina(offset))
+            self.indexar(pagina)
+            if len(pagina) < self.tamanho_pagina:
+                break
+            offset += self.tamanho_pagina
+        self.tabela_completa = True
+
+    async def carregar_async(self, consulta, matriculas):
+        """carregar() com os lotes in.(...) enviados em paralelo (consulta = ClienteAsync.consulta)"""
+        filtros = self._filtros_pendentes(matriculas)
+        self.requisicoes += len(filtros)
+        for linhas in await asyncio.gather(*(consulta('dim_efetivo', method='GET', filters=f) for f in filtros)):
+            self.indexar(linhas)
+
+    async def carregar_todos_async(self, consulta, paginas_por_rodada=8):
+        """carregar_todos() buscando várias páginas por rodada em paralelo"""
+        offset = 0
+        while True:
+            offsets = [offset + k * self.tamanho_pagina for k in range(paginas_por_rodada)]
+            self.requisicoes += len(offsets)
+            paginas = await asyncio.gather(*(
+                consulta('dim_efetivo', method='GET', filters=self._filtros_pagina(o)) for o in offsets
+            ))
+            for pagina in paginas:
+                self.indexar(pagina)
+            if any(len(pagina) < self.tamanho_pagina for pagina in paginas):
+                break
+            offset = offsets[-1] + self.tamanho_pagina
+        self.tabela_completa = True
+
+    def buscar(self, matricula):
+        """Procura a matrícula apenas no índice local (None se não estiver carregada)"""
+        formas = formas_matricula(matricula)
+        for forma in formas:
+            if forma in self.exatas:
+                return self.exatas[forma]
+        for forma in formas:
+            if forma in self.normalizadas:
+                return self.normalizadas[forma]
+        return None
+
+    def resolver(self, matricula):
+        """efetivo_id da matrícula; consulta o banco só se ela ainda não foi carregada"""
+        efetivo_id = self.buscar(matricula)
+        if efetivo_id is None and str(matricula).strip() not in self.consultadas:
+            self.carregar([matricula])
+            efetivo_id = self.buscar(matricula)
+        return efetivo_id
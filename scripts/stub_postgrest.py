@@ -0,0 +1,194 @@
+"""
+PostgREST local em memória para medir os importadores de férias sem tocar no Supabase
+
+Atende, em http://127.0.0.1:<porta>/rest/v1/<tabela>, o subconjunto da API usado por
+resolver_efetivo.py e gravador_ferias.py:
+  - GET dim_efetivo: select, matricula=eq./in.(...), created_at=gt., order=id ou
+    created_at,id, limit/offset e Prefer: count=exact (Content-Range);
+  - POST fat_ferias / fat_ferias_parcelas em array com on_conflict e
+    Prefer: resolution=merge-duplicates (upsert), return=representation ou minimal.
+
+Uma latência fixa por requisição (--latencia-ms) simula a rede até o Supabase.
+
+Uso:
+  with StubPostgrest(matriculas) as stub:
+      os.environ['VITE_SUPABASE_URL'] = stub.url   # antes de importar supabase_client
+"""
+import itertools
+import json
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONFLITOS = {
+    'fat_ferias': ('efetivo_id', 'ano'),
+    'fat_ferias_parcelas': ('fat_ferias_id', 'parcela_num'),
+}
+
+# created_at das linhas de dim_efetivo do stub (uma por segundo, na ordem das matrículas)
+INICIO_EFETIVO = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class BancoMemoria:
+    """Tabelas do stub: dim_efetivo (alterável só pelo Python) e as tabelas de férias gravadas via upsert"""
+
+    def __init__(self, matriculas):
+        self._trava = threading.Lock()
+        self.efetivo = []
+        self._por_matricula = {}
+        self._sequencia = itertools.count()
+        self.adicionar_efetivo(matriculas)
+        self.tabelas = {tabela: {} for tabela in CONFLITOS}
+        self._ids = itertools.count(1)
+        self.requisicoes = 0
+
+    def adicionar_efetivo(self, matriculas):
+        """Novas linhas em dim_efetivo (created_at depois das existentes)"""
+        with self._trava:
+            for m in matriculas:
+                k = next(self._sequencia)
+                linha = {'id': f'ef-{k:08d}', 'matricula': str(m), 'ativo': True,
+                         'created_at': (INICIO_EFETIVO + timedelta(seconds=k)).isoformat()}
+                self.efetivo.append(linha)
+                self._por_matricula[linha['matricula']] = linha
+
+    def remover_efetivo(self, matriculas):
+        with self._trava:
+            remover = {str(m) for m in matriculas}
+            self.efetivo = [linha for linha in self.efetivo if linha['matricula'] not in remover]
+            for m in remover:
+                self._por_matricula.pop(m, None)
+
+    def consultar(self, tabela, metodo, filtros, corpo, prefer):
+        """(status, resposta, total) de uma requisição; total só com Prefer: count=exact"""
+        with self._trava:
+            self.requisicoes += 1
+            if tabela == 'dim_efetivo' and metodo == 'GET':
+                linhas, total = self._dim_efetivo(filtros)
+                return 200, linhas, total if 'count=exact' in prefer else None
+            if tabela in CONFLITOS and metodo == 'POST':
+                return (*self._upsert(tabela, filtros, corpo, prefer), None)
+            return 404, {'message': f'{metodo} {tabela} não suportado pelo stub'}, None
+
+    def _dim_efetivo(self, filtros):
+        filtro = filtros.get('matricula')
+        if filtro is None:
+            linhas = self.efetivo
+        else:
+            operador, valor = filtro.split('.', 1)
+            chaves = [valor] if operador == 'eq' else [v.strip('"') for v in valor[1:-1].split(',')]
+            linhas = [self._por_matricula[c] for c in dict.fromkeys(chaves) if c in self._por_matricula]
+        if 'created_at' in filtros:
+            limite = datetime.fromisoformat(filtros['created_at'].removeprefix('gt.'))
+            linhas = [linha for linha in linhas if datetime.fromisoformat(linha['created_at']) > limite]
+        if filtros.get('order') == 'id':
+            linhas = sorted(linhas, key=lambda linha: linha['id'])
+        elif filtros.get('order') == 'created_at,id':
+            linhas = sorted(linhas, key=lambda linha: (linha['created_at'], linha['id']))
+        inicio = int(filtros.get('offset', 0))
+        fim = inicio + int(filtros['limit']) if 'limit' in filtros else None
+        return [dict(linha) for linha in linhas[inicio:fim]], len(linhas)
+
+    def _upsert(self, tabela, filtros, corpo, prefer):
+        chave = CONFLITOS[tabela]
+        if filtros.get('on_conflict') != ','.join(chave) or 'merge-duplicates' not in prefer:
+            return 400, {'message': 'stub só aceita upsert com on_conflict na chave única'}
+        linhas = corpo if isinstance(corpo, list) else [corpo]
+        if len({tuple(sorted(linha)) for linha in linhas}) > 1:
+            # Mesmo erro do PostgREST: todas as linhas de um POST em array precisam das mesmas chaves
+            return 400, {'code': 'PGRST102', 'message': 'All object keys must match'}
+        tabela_memoria = self.tabelas[tabela]
+        gravadas = []
+        for linha in linhas:
+            k = tuple(linha[c] for c in chave)
+            atual = tabela_memoria.get(k)
+            if atual is None:
+                atual = tabela_memoria[k] = {'id': f'{tabela}-{next(self._ids)}'}
+            atual.update(linha)
+            gravadas.append(dict(atual))
+        return 201, gravadas if 'return=representation' in prefer else None
+
+
+def _manipulador(banco, latencia):
+    class Manipulador(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _responder(self, metodo):
+            url = urllib.parse.urlparse(self.path)
+            tabela = url.path.rsplit('/', 1)[-1]
+            filtros = dict(urllib.parse.parse_qsl(url.query))
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            corpo = json.loads(self.rfile.read(tamanho)) if tamanho else None
+            if latencia:
+                time.sleep(latencia)
+            status, resposta, total = banco.consultar(tabela, metodo, filtros, corpo, self.headers.get('Prefer', ''))
+            dados = b'' if resposta is None else json.dumps(resposta).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            if total is not None:
+                self.send_header('Content-Range', f"{filtros.get('offset', 0)}-*/{total}")
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            self._responder('GET')
+
+        def do_POST(self):
+            self._responder('POST')
+
+        def do_PATCH(self):
+            self._responder('PATCH')
+
+        def do_DELETE(self):
+            self._responder('DELETE')
+
+        def log_message(self, *args):
+            pass
+
+    return Manipulador
+
+
+class StubPostgrest:
+    """Servidor do stub numa thread; url é o equivalente de VITE_SUPABASE_URL"""
+
+    def __init__(self, matriculas, latencia_ms=0, porta=0):
+        self.banco = BancoMemoria(matriculas)
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', porta), _manipulador(self.banco, latencia_ms / 1000))
+        self._servidor.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._servidor.server_address[1]}'
+        self._thread = None
+
+    def reiniciar(self, matriculas):
+        """Volta às tabelas iniciais (dim_efetivo com as matrículas, férias vazias)"""
+        self.banco.__init__(matriculas)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Sobe o stub de PostgREST com dim_efetivo sintética')
+    parser.add_argument('--escala', type=int, default=1, help='Escala das matrículas (planilhas_sinteticas.py)')
+    parser.add_argument('--porta', type=int, default=54321)
+    parser.add_argument('--latencia-ms', type=float, default=0, help='Atraso fixo por requisição')
+    args = parser.parse_args()
+
+    from planilhas_sinteticas import matriculas_cadastradas
+
+    with StubPostgrest(matriculas_cadastradas(args.escala), args.latencia_ms, args.porta) as stub:
+        print(f"VITE_SUPABASE_URL={stub.url}  (Ctrl+C para encerrar)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
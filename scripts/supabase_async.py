@@ -0,0 +1,80 @@
+"""
+Cliente PostgREST assíncrono (asyncio + httpx) para o modo --async dos importadores
+
+Usa a mesma configuração, política de retentativas e métricas de supabase_client.py,
+com um semáforo limitando quantas requisições ficam em voo ao mesmo tempo.
+
+Requer httpx (pip install httpx); o import só acontece ao abrir o cliente.
+"""
+import asyncio
+import time
+
+from supabase_client import (
+    HEADERS, POSTGREST_URL, STATUS_RETENTAVEIS, TENTATIVAS, TIMEOUT,
+    _espera, _idempotente, metricas,
+)
+
+# Requisições simultâneas padrão
+CONCORRENCIA = 8
+
+
+class ClienteAsync:
+    """async with ClienteAsync(8) as cliente: await cliente.consulta('dim_efetivo', ...)"""
+
+    def __init__(self, concorrencia=CONCORRENCIA):
+        self.concorrencia = concorrencia
+        self._semaforo = asyncio.Semaphore(concorrencia)
+        self._cliente = None
+
+    async def __aenter__(self):
+        try:
+            import httpx
+        except ImportError:
+            raise Exception("Modo --async requer httpx: pip install httpx")
+        self._httpx = httpx
+        self._cliente = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(max_connections=self.concorrencia, max_keepalive_connections=self.concorrencia),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._cliente.aclose()
+
+    async def _requisicao(self, table, method, params, data, prefer):
+        url = f"{POSTGREST_URL}/{table}"
+        headers = {'Prefer': prefer} if prefer else None
+        tentativas = TENTATIVAS + 1 if _idempotente(method, prefer) else 1
+        inicio = time.perf_counter()
+        for tentativa in range(tentativas):
+            ultima = tentativa == tentativas - 1
+            try:
+                async with self._semaforo:
+                    response = await self._cliente.request(method, url, params=params, json=data, headers=headers)
+            except self._httpx.TransportError:
+                if ultima:
+                    metricas.registrar(method, table, time.perf_counter() - inicio, tentativa + 1, erro=True)
+                    raise
+                await asyncio.sleep(_espera(tentativa))
+                continue
+            if response.status_code in STATUS_RETENTAVEIS and not ultima:
+                await asyncio.sleep(_espera(tentativa, response))
+                continue
+            metricas.registrar(method, table, time.perf_counter() - inicio, tentativa + 1,
+                               erro=response.status_code >= 400)
+            return response
+
+    async def consulta(self, table, method='GET', filters=None, data=None, prefer=None):
+        """Equivalente assíncrono de supabase_client.supabase_query"""
+        url = f"{POSTGREST_URL}/{table}"
+        try:
+            response = await self._requisicao(table, method, filters or {}, data, prefer)
+        except self._httpx.TimeoutException:
+            raise Exception(f"Timeout ao acessar {url} - requisição demorou mais de {TIMEOUT} segundos")
+        except self._httpx.TransportError as e:
+            raise Exception(f"Erro de conexão ao acessar {url}: {str(e)}")
+
+        if response.status_code >= 400:
+            raise Exception(f"Erro na requisição: {response.status_code} - {response.text}")
+        return response.json() if response.text else []
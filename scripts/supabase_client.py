@@ -0,0 +1,172 @@
+"""
+Cliente HTTP compartilhado pelos scripts que acessam o Supabase via PostgREST
+
+Uma única requests.Session por processo mantém as conexões abertas (keep-alive),
+evitando um handshake TLS a cada requisição. Respostas 429/5xx e falhas de
+conexão são repetidas com backoff exponencial (respeitando Retry-After), e o
+tempo de cada requisição é acumulado por tabela/método para o resumo final.
+
+Variáveis de ambiente:
+  VITE_SUPABASE_URL
+  SUPABASE_SERVICE_ROLE_KEY / VITE_SUPABASE_SERVICE_ROLE_KEY (recomendado) ou VITE_SUPABASE_ANON_KEY
+  SUPABASE_HTTP_POOL=10       conexões mantidas abertas por host
+  SUPABASE_HTTP_RETRIES=5     novas tentativas em 429/5xx/erro de conexão
+  SUPABASE_HTTP_BACKOFF=0.5   fator do backoff (0.5s, 1s, 2s, 4s, ...)
+  SUPABASE_HTTP_TIMEOUT=30    timeout padrão por requisição (segundos)
+"""
+import os
+import threading
+import time
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
+# service_role primeiro (acesso completo); anon_key pode ter limitações de RLS
+USANDO_SERVICE_ROLE = bool(os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('VITE_SUPABASE_SERVICE_ROLE_KEY'))
+SUPABASE_KEY = (
+    os.getenv('SUPABASE_SERVICE_ROLE_KEY') or
+    os.getenv('VITE_SUPABASE_SERVICE_ROLE_KEY') or
+    os.getenv('VITE_SUPABASE_ANON_KEY')
+)
+POSTGREST_URL = f"{SUPABASE_URL}/rest/v1"
+
+HEADERS = {
+    "apikey": SUPABASE_KEY,
+    "Authorization": f"Bearer {SUPABASE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=representation"
+}
+
+TAMANHO_POOL = int(os.getenv('SUPABASE_HTTP_POOL', '10'))
+TENTATIVAS = int(os.getenv('SUPABASE_HTTP_RETRIES', '5'))
+BACKOFF = float(os.getenv('SUPABASE_HTTP_BACKOFF', '0.5'))
+TIMEOUT = float(os.getenv('SUPABASE_HTTP_TIMEOUT', '30'))
+
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+# Espera máxima entre tentativas (segundos)
+BACKOFF_MAXIMO = 30
+
+_sessao = None
+_trava_sessao = threading.Lock()
+
+
+class Metricas:
+    """Tempo e contagem de requisições por (método, tabela)"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.por_chave = {}
+
+    def registrar(self, metodo, tabela, segundos, tentativas, erro=False):
+        with self._trava:
+            m = self.por_chave.setdefault((metodo, tabela), {
+                'requisicoes': 0, 'segundos': 0.0, 'maximo': 0.0, 'retentativas': 0, 'erros': 0,
+            })
+            m['requisicoes'] += 1
+            m['segundos'] += segundos
+            m['maximo'] = max(m['maximo'], segundos)
+            m['retentativas'] += tentativas - 1
+            m['erros'] += int(erro)
+
+    def total_requisicoes(self):
+        return sum(m['requisicoes'] for m in self.por_chave.values())
+
+    def resumo(self):
+        """Tabela de texto com as métricas acumuladas"""
+        if not self.por_chave:
+            return "Nenhuma requisição HTTP realizada"
+        linhas = [f"{'metodo':<6} {'tabela':<28} {'req':>6} {'total(s)':>9} {'media(ms)':>10} {'max(ms)':>9} {'retry':>6} {'erros':>6}"]
+        for (metodo, tabela), m in sorted(self.por_chave.items(), key=lambda kv: -kv[1]['segundos']):
+            media = m['segundos'] / m['requisicoes'] * 1000
+            linhas.append(
+                f"{metodo:<6} {tabela:<28} {m['requisicoes']:>6} {m['segundos']:>9.2f} {media:>10.1f} "
+                f"{m['maximo'] * 1000:>9.1f} {m['retentativas']:>6} {m['erros']:>6}"
+            )
+        return '\n'.join(linhas)
+
+
+metricas = Metricas()
+
+
+def obter_sessao():
+    """Sessão HTTP compartilhada (criada no primeiro uso)"""
+    global _sessao
+    with _trava_sessao:
+        if _sessao is None:
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=TAMANHO_POOL, pool_maxsize=TAMANHO_POOL)
+            sessao.mount('https://', adaptador)
+            sessao.mount('http://', adaptador)
+            sessao.headers.update(HEADERS)
+            _sessao = sessao
+        return _sessao
+
+
+def _idempotente(method, prefer):
+    # POST só é repetido quando é upsert (merge-duplicates); um INSERT simples poderia duplicar linhas
+    return method != 'POST' or 'merge-duplicates' in (prefer or '')
+
+
+def _espera(tentativa, response=None):
+    """Backoff exponencial, ou o Retry-After informado pelo servidor"""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAXIMO)
+    return min(BACKOFF * (2 ** tentativa), BACKOFF_MAXIMO)
+
+
+def requisicao(table, method='GET', params=None, data=None, prefer=None, timeout=None):
+    """Executa a requisição com retentativas e devolve o requests.Response final"""
+    url = f"{POSTGREST_URL}/{table}"
+    headers = {'Prefer': prefer} if prefer else None
+    timeout = timeout or TIMEOUT
+    tentativas = TENTATIVAS + 1 if _idempotente(method, prefer) else 1
+    sessao = obter_sessao()
+    inicio = time.perf_counter()
+    for tentativa in range(tentativas):
+        ultima = tentativa == tentativas - 1
+        try:
+            response = sessao.request(method, url, params=params, json=data, headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if ultima:
+                metricas.registrar(method, table, time.perf_counter() - inicio, tentativa + 1, erro=True)
+                raise
+            time.sleep(_espera(tentativa))
+            continue
+        if response.status_code in STATUS_RETENTAVEIS and not ultima:
+            time.sleep(_espera(tentativa, response))
+            continue
+        metricas.registrar(method, table, time.perf_counter() - inicio, tentativa + 1,
+                           erro=response.status_code >= 400)
+        return response
+
+
+def supabase_query(table, method='GET', filters=None, data=None, prefer=None, timeout=None):
+    """Função helper para fazer queries no Supabase via PostgREST
+
+    filters vão na query string (também no POST, ex.: on_conflict); prefer substitui o header Prefer.
+    """
+    if method not in ('GET', 'POST', 'PATCH', 'DELETE'):
+        raise ValueError(f"Método HTTP não suportado: {method}")
+    url = f"{POSTGREST_URL}/{table}"
+    try:
+        response = requisicao(table, method, params=filters or {}, data=data, prefer=prefer, timeout=timeout)
+    except requests.exceptions.Timeout:
+        raise Exception(f"Timeout ao acessar {url} - requisição demorou mais de {timeout or TIMEOUT} segundos")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Erro de conexão ao acessar {url}: {str(e)}")
+
+    if response.status_code >= 400:
+        raise Exception(f"Erro na requisição: {response.status_code} - {response.text}")
+    return response.json() if response.text else []
+
+
+def imprimir_metricas():
+    """Imprime o resumo das requisições feitas no processo"""
+    print(f"\nRequisições HTTP ({metricas.total_requisicoes()}):")
+    print(metricas.resumo(), flush=True)
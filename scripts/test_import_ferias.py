@@ -4,11 +4,10 @@ Script de teste para verificar conexão e leitura do arquivo Excel
 import pandas as pd
 import sys
 import os
-from dotenv import load_dotenv
 import requests
 
-# Carregar variáveis de ambiente
-load_dotenv()
+from cache_efetivo import descrever, resolvedor_em_cache
+from supabase_client import SUPABASE_KEY, SUPABASE_URL, requisicao
 
 print("=" * 60)
 print("TESTE DE CONEXÃO E LEITURA")
@@ -16,13 +15,6 @@ print("=" * 60)
 
 # Teste 1: Verificar variáveis de ambiente
 print("\n1. Verificando variáveis de ambiente...")
-SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
-SUPABASE_KEY = (
-    os.getenv('SUPABASE_SERVICE_ROLE_KEY') or 
-    os.getenv('VITE_SUPABASE_SERVICE_ROLE_KEY') or 
-    os.getenv('VITE_SUPABASE_ANON_KEY')
-)
-
 if SUPABASE_URL:
     print(f"  [OK] VITE_SUPABASE_URL: {SUPABASE_URL[:30]}...")
 else:
@@ -64,21 +56,9 @@ except Exception as e:
 # Teste 4: Testar conexão com Supabase
 print("\n4. Testando conexão com Supabase...")
 if SUPABASE_URL and SUPABASE_KEY:
-    POSTGREST_URL = f"{SUPABASE_URL}/rest/v1"
-    HEADERS = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-    }
-    
     try:
         print("  Fazendo requisição de teste...")
-        response = requests.get(
-            f"{POSTGREST_URL}/dim_efetivo",
-            headers=HEADERS,
-            params={'select': 'id', 'limit': '1'},
-            timeout=10
-        )
+        response = requisicao('dim_efetivo', params={'select': 'id', 'limit': '1'}, timeout=10)
         print(f"  Status HTTP: {response.status_code}")
         if response.status_code == 200:
             print("  [OK] Conexao com Supabase OK")
@@ -95,6 +75,19 @@ if SUPABASE_URL and SUPABASE_KEY:
 else:
     print("  [AVISO] Pulando teste de conexao (variaveis nao configuradas)")
 
+# Teste 5: Atualizar o snapshot local de dim_efetivo usado pelos importadores
+print("\n5. Atualizando snapshot de dim_efetivo...")
+if SUPABASE_URL and SUPABASE_KEY:
+    try:
+        resolvedor, resumo = resolvedor_em_cache()
+        print(f"  [OK] {descrever(resumo)}")
+    except Exception as e:
+        if '401' in str(e):
+            print("  [ERRO] Erro de autenticacao (chave invalida)")
+        print(f"  [ERRO] Erro ao atualizar snapshot: {e}")
+else:
+    print("  [AVISO] Pulando snapshot (variaveis nao configuradas)")
+
 print("\n" + "=" * 60)
 print("TESTE CONCLUÍDO")
 print("=" * 60)
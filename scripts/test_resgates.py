@@ -1,9 +1,16 @@
+import os
+import sys
+
 import pandas as pd
 
-excel_path = r'C:\Users\joaop\BPMA\Resumos Estatísticas 2025 a 2020.xlsx'
-xls = pd.ExcelFile(excel_path)
+from cache_planilhas import ler_aba
 
-df = pd.read_excel(xls, sheet_name='2025', header=None)
+# Caminho: 1º argumento, 2º env EXCEL_PATH, 3º default
+excel_path = (
+    sys.argv[1] if len(sys.argv) > 1 else
+    os.environ.get('EXCEL_PATH', r'C:\Users\joaop\BPMA\Resumos Estatísticas 2025 a 2020.xlsx')
+)
+df = ler_aba(excel_path, '2025')
 
 # Verificar linha 58
 print("Linha 58:")
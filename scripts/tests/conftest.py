@@ -0,0 +1,72 @@
+"""
+Os módulos de scripts/ são importados pelo nome (como os scripts fazem entre si).
+
+Os testes que usam url_banco / url_banco_estatisticas / banco_estatisticas só rodam com DATABASE_URL apontando para um Postgres
+onde o usuário possa criar bancos; cada teste usa um banco novo, apagado no final.
+"""
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MIGRATION_TABELAS = os.path.join(RAIZ, 'supabase', 'migrations',
+                                 '20260105225710_criar_tabelas_estatisticas_bpma_adaptado.sql')
+
+# O que a migration das tabelas adaptadas espera encontrar no Supabase (só as colunas usadas)
+SQL_PREREQUISITOS = """
+CREATE SCHEMA auth;
+CREATE FUNCTION auth.uid() RETURNS uuid LANGUAGE sql STABLE AS 'SELECT NULL::uuid';
+CREATE TABLE public.dim_regiao_administrativa (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), nome text);
+CREATE TABLE public.dim_especies_fauna (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  nome_popular text,
+  nome_cientifico text
+);
+"""
+
+
+@pytest.fixture
+def url_banco():
+    """URL de um banco vazio e descartável (criado a partir de DATABASE_URL, com pgcrypto)"""
+    url = os.getenv('DATABASE_URL')
+    if not url:
+        pytest.skip('DATABASE_URL não definida')
+    psycopg = pytest.importorskip('psycopg')
+    from psycopg.conninfo import make_conninfo
+
+    nome = f"bpma_teste_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(url, autocommit=True) as admin:
+        admin.execute(f'CREATE DATABASE "{nome}"')
+    try:
+        url_teste = make_conninfo(url, dbname=nome)
+        with psycopg.connect(url_teste) as conn:
+            conn.execute('CREATE EXTENSION IF NOT EXISTS pgcrypto')
+        yield url_teste
+    finally:
+        with psycopg.connect(url, autocommit=True) as admin:
+            admin.execute(f'DROP DATABASE IF EXISTS "{nome}" WITH (FORCE)')
+
+
+@pytest.fixture
+def url_banco_estatisticas(url_banco):
+    """url_banco com as tabelas adaptadas"""
+    import psycopg
+
+    with psycopg.connect(url_banco) as conn:
+        conn.execute(SQL_PREREQUISITOS)
+        with open(MIGRATION_TABELAS, 'r', encoding='utf-8') as f:
+            conn.execute(f.read())
+    return url_banco
+
+
+@pytest.fixture
+def banco_estatisticas(url_banco_estatisticas):
+    """Conexão com o banco de url_banco_estatisticas"""
+    import psycopg
+
+    with psycopg.connect(url_banco_estatisticas) as conn:
+        yield conn
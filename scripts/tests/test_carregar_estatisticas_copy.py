@@ -0,0 +1,110 @@
+"""
+Carga via COPY (carregar_estatisticas_copy.py) contra a migration de
+generate_sql_inserts_adapted.py: as duas tabelas fato precisam ficar iguais
+
+Só roda com DATABASE_URL definida (ver conftest.py).
+
+  DATABASE_URL=postgresql://... python -m pytest scripts/tests/test_carregar_estatisticas_copy.py
+"""
+import glob
+import os
+import shutil
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from dados_processados import gravar_tabela
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ATENDIMENTOS = [
+    (2024, 1, 'Crimes contra a Fauna', 3),
+    (2024, 1, 'Flagrantes', 1),
+    # Chave repetida (mesmo slug): vale a última linha
+    (2024, 2, 'Crimes contra a Fauna', 5),
+    (2024, 2, ' Crimes contra a Fauna ', 8),
+    (2025, 12, 'QUANTIDADE DE RESGATE', 120),
+]
+
+RESGATES = [
+    # ano, mes, tipo_fauna, nome_popular, nome_cientifico, ordem, quantidade
+    (2024, 1, 'AVES', 'Arara', 'Ara ararauna', 'Psittaciformes', 2),
+    # Espécie encontrada pelo nome científico (LOWER/TRIM) e pelo popular
+    (2024, 1, 'AVES', 'Arara azul', ' ARA ARARAUNA ', 'Psittaciformes', 4),
+    (2024, 1, 'MAMÍFEROS', 'gambá', 'Didelphis sp.', 'Didelphimorphia', 1),
+    # Sem correspondência em dim_especies_fauna
+    (2024, 3, 'RÉPTEIS', 'Jiboia', 'Boa constrictor', 'Squamata', 6),
+    # Chave repetida: a última linha prevalece
+    (2025, 5, 'RÉPTEIS', "Cobra d'água", 'Helicops modestus', 'Squamata', 1),
+    (2025, 5, 'RÉPTEIS', "Cobra-d'água", 'Helicops modestus', 'Squamata', 9),
+    # Sem nome científico: fica de fora nas duas cargas
+    (2025, 5, 'AVES', 'Sem nome', None, None, 7),
+]
+
+ESPECIES = [
+    ('Arara-canindé', 'Ara ararauna'),
+    ('Gambá', 'Didelphis albiventris'),
+]
+
+
+def _dados(pasta):
+    data_dir = os.path.join(pasta, 'data', 'processed')
+    gravar_tabela(pd.DataFrame(ATENDIMENTOS, columns=['ano', 'mes', 'natureza', 'quantidade']),
+                  'atendimentos', data_dir)
+    gravar_tabela(pd.DataFrame(RESGATES, columns=['ano', 'mes', 'tipo_fauna', 'nome_popular', 'nome_cientifico',
+                                                  'ordem', 'quantidade']),
+                  'resgates', data_dir)
+    return data_dir
+
+
+def _migration(pasta, *opcoes):
+    """Roda generate_sql_inserts_adapted.py numa cópia de scripts/ ao lado de data/processed"""
+    shutil.copytree(SCRIPTS, os.path.join(pasta, 'scripts'), ignore=shutil.ignore_patterns('tests', '__pycache__'))
+    subprocess.run([sys.executable, os.path.join('scripts', 'generate_sql_inserts_adapted.py'), *opcoes],
+                   cwd=pasta, check=True, capture_output=True)
+    caminho, = glob.glob(os.path.join(pasta, 'supabase', 'migrations', '*_popular_tabelas_estatisticas_bpma_adaptado.sql'))
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _fatos(conn):
+    indicadores = conn.execute(
+        'SELECT tempo_id, indicador_id, valor FROM public.fact_indicador_mensal_bpma ORDER BY 1, 2'
+    ).fetchall()
+    resgates = conn.execute("""
+        SELECT r.tempo_id, r.nome_cientifico, r.nome_popular, r.quantidade, e.nome_popular
+        FROM public.fact_resgate_fauna_especie_mensal r
+        LEFT JOIN public.dim_especies_fauna e ON e.id = r.id_especie_fauna
+        ORDER BY 1, 2
+    """).fetchall()
+    return indicadores, resgates
+
+
+@pytest.mark.parametrize('opcoes', [(), ('--por-linha',)])
+def test_copy_igual_a_migration(url_banco_estatisticas, banco_estatisticas, tmp_path, opcoes):
+    from carregar_estatisticas_copy import carregar
+
+    conn = banco_estatisticas
+    with conn.cursor() as cur:
+        cur.executemany('INSERT INTO public.dim_especies_fauna (nome_popular, nome_cientifico) VALUES (%s, %s)',
+                        ESPECIES)
+    conn.commit()
+
+    data_dir = _dados(str(tmp_path))
+    resumo = carregar(url_banco_estatisticas, data_dir)
+    assert resumo['indicadores_copiados'] == len(ATENDIMENTOS)
+    assert resumo['resgates_copiados'] == len(RESGATES) - 1
+    copy = _fatos(conn)
+    conn.commit()
+
+    conn.execute('TRUNCATE public.fact_indicador_mensal_bpma, public.fact_resgate_fauna_especie_mensal')
+    conn.execute(_migration(str(tmp_path), *opcoes))
+    migration = _fatos(conn)
+
+    assert copy == migration
+    indicadores, resgates = copy
+    assert len(indicadores) == 4 and (202402, 'crimes_contra_a_fauna', 8) in indicadores
+    assert (202505, 'Helicops modestus', "Cobra-d'água", 9, None) in resgates
+    assert (202401, 'Didelphis sp.', 'gambá', 1, 'Gambá') in resgates
@@ -0,0 +1,129 @@
+"""
+Diff de dim_efetivo calculado no cliente (diff_efetivo em gerar_migration_dim_efetivo_from_upsert.py):
+segue as regras de SQL_RECONCILIAR e, com DATABASE_URL, dá as mesmas contagens que
+carregar(..., dry_run=True)
+
+  python -m pytest scripts/tests/test_gerar_migration_dim_efetivo.py
+"""
+import io
+import uuid
+
+from gerar_migration_dim_efetivo_from_upsert import COLUNAS, carregar, diff, diff_efetivo, linhas_staging
+
+
+def _upsert(*linhas):
+    """dim_efetivo_upsert.sql com (matricula, antiguidade, nome) por linha"""
+    tuplas = ",\n".join(f"('{matricula}', {'NULL' if antiguidade is None else antiguidade}, '{nome}')"
+                        for matricula, antiguidade, nome in linhas)
+    return f"INSERT INTO public.dim_efetivo (matricula, antiguidade, nome) VALUES\n{tuplas};\n"
+
+
+def _novas(*linhas):
+    return list(linhas_staging(io.StringIO(_upsert(*linhas))))
+
+
+def _atual(id, matricula, antiguidade=None, nome=None, tem_role=False):
+    linha = dict.fromkeys(COLUNAS)
+    linha.update(id=uuid.UUID(int=id), tem_role=tem_role, matricula=matricula, antiguidade=antiguidade, nome=nome)
+    return linha
+
+
+def _resumo(**contagens):
+    return dict({"inserir": 0, "atualizar": 0, "inalteradas": 0, "remover": 0, "duplicatas": 0}, **contagens)
+
+
+def test_duplicata_sem_user_roles_fica_o_menor_id():
+    novas = _novas(("00000010", 1, "ANA"))
+    atuais = [_atual(2, "00000010", 1, "OUTRA"), _atual(1, "00000010", 1, "ANA")]
+
+    assert diff_efetivo(novas, atuais) == _resumo(inalteradas=1, duplicatas=1)
+
+
+def test_duplicata_com_user_roles_fica_a_que_tem_role():
+    novas = _novas(("00000010", 1, "ANA"))
+    atuais = [_atual(1, "00000010", 1, "OUTRA"), _atual(2, "00000010", 1, "ANA", tem_role=True)]
+
+    assert diff_efetivo(novas, atuais) == _resumo(inalteradas=1, duplicatas=1)
+
+
+def test_matriculas_iguais_depois_de_normalizar():
+    # Na tabela nova fica a de menor antiguidade; em dim_efetivo, 0731549 e 731549 são duplicatas
+    novas = _novas(("0731549", 5, "MAIS NOVO"), ("731549", 3, "ANA"), ("731.549", None, "SEM ANTIGUIDADE"))
+    atuais = [_atual(1, "00731549", 3, "ANA"), _atual(2, "0731549", 3, "ANA")]
+
+    assert diff_efetivo(novas, atuais) == _resumo(inalteradas=1, duplicatas=1)
+
+
+def test_matricula_vazia_sai_e_nao_entra():
+    novas = _novas(("", 1, "SEM MATRICULA"), ("  ", 2, "SO ESPACOS"), ("00000010", 3, "ANA"))
+    atuais = [_atual(1, None), _atual(2, " "), _atual(3, "00000010", 3, "ANA")]
+
+    assert diff_efetivo(novas, atuais) == _resumo(inalteradas=1, remover=2)
+
+
+def test_linha_inalterada_alterada_nova_e_removida():
+    novas = _novas(("00000010", 1, "ANA"), ("00000020", 2, "BETO"), ("30", 3, "CAIO"), ("00000040", 4, "DORA"))
+    atuais = [
+        _atual(1, "00000010", 1, "ANA"),
+        _atual(2, "00000020", 2, "ROBERTO"),
+        # Só a matrícula gravada muda (normalizada para 8 dígitos)
+        _atual(3, "30", 3, "CAIO"),
+        _atual(4, "00000050", 5, "ELIS"),
+    ]
+
+    assert diff_efetivo(novas, atuais) == _resumo(inserir=1, atualizar=2, inalteradas=1, remover=1)
+
+
+SQL_DIM_EFETIVO = """
+CREATE TABLE public.dim_efetivo (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  antiguidade integer, posto_graduacao text, quadro text, quadro_sigla text, nome_guerra text, nome text,
+  matricula text, sexo text, lotacao text, ativo boolean, cpf bigint, data_nascimento date,
+  data_inclusao date, idade integer, contato text, email text, telefone text, telefone_2 text,
+  email_2 text, porte_arma text, logradouro text
+);
+CREATE TABLE public.user_roles (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  efetivo_id uuid REFERENCES public.dim_efetivo (id) ON DELETE CASCADE,
+  ativo boolean DEFAULT true
+);
+CREATE TABLE public.usuarios_por_login (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), efetivo_id uuid);
+CREATE TABLE public.fat_equipe_membros (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), efetivo_id uuid);
+CREATE TABLE public.fat_campanha_membros (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), efetivo_id uuid);
+"""
+
+
+def test_diff_igual_ao_dry_run_no_postgres(url_banco, tmp_path):
+    import psycopg
+
+    entrada = tmp_path / "dim_efetivo_upsert.sql"
+    entrada.write_text(_upsert(
+        ("00000010", 1, "ANA"), ("00000020", 2, "BETO"), ("30", 3, "CAIO"), ("00000040", 4, "DORA"),
+        ("0731549", 5, "MAIS NOVO"), ("731549", 3, "GIL"), ("", 6, "SEM MATRICULA"), ("00000060", 7, "IVO"),
+    ), encoding="utf-8")
+    atuais = [
+        ("00000000-0000-0000-0000-000000000001", "00000010", 1, "ANA", False),
+        ("00000000-0000-0000-0000-000000000002", "00000020", 2, "ROBERTO", False),
+        ("00000000-0000-0000-0000-000000000003", "30", 3, "CAIO", False),
+        ("00000000-0000-0000-0000-000000000004", "00000050", 5, "ELIS", False),
+        ("00000000-0000-0000-0000-000000000005", "0731549", 3, "OUTRO", False),
+        ("00000000-0000-0000-0000-000000000006", "731549", 3, "GIL", True),
+        ("00000000-0000-0000-0000-000000000007", " ", None, "SEM MATRICULA", False),
+        ("00000000-0000-0000-0000-000000000008", "00000060", 7, "IVO", False),
+        ("00000000-0000-0000-0000-000000000009", "60", 7, "IVO", True),
+    ]
+    with psycopg.connect(url_banco) as conn:
+        conn.execute(SQL_DIM_EFETIVO)
+        with conn.cursor() as cur:
+            cur.executemany("INSERT INTO public.dim_efetivo (id, matricula, antiguidade, nome) VALUES (%s, %s, %s, %s)",
+                            [linha[:4] for linha in atuais])
+            cur.executemany("INSERT INTO public.user_roles (efetivo_id) VALUES (%s)",
+                            [(linha[0],) for linha in atuais if linha[4]])
+
+    esperado = diff(url_banco, entrada)
+    assert esperado == _resumo(inserir=1, atualizar=4, inalteradas=1, remover=2, duplicatas=2)
+
+    resumo = carregar(url_banco, entrada, dry_run=True)
+    assert {chave: resumo[chave] for chave in esperado} == esperado
+    # dry-run desfaz tudo
+    assert diff(url_banco, entrada) == esperado
@@ -0,0 +1,85 @@
+"""
+Gravação de férias em lote contra o PostgREST local (stub_postgrest.py): o modo assíncrono
+grava o mesmo que o síncrono e, com latência de rede, termina antes
+
+  python -m pytest scripts/tests/test_gravador_ferias.py
+"""
+import asyncio
+import time
+
+import pytest
+
+import supabase_async
+import supabase_client
+from gravador_ferias import GravadorFerias, GravadorFeriasAsync
+from stub_postgrest import StubPostgrest
+
+REGISTROS = 3000
+LATENCIA_MS = 50
+
+
+def _registros():
+    for i in range(REGISTROS):
+        ferias = {'efetivo_id': f'efetivo-{i % 2900}', 'ano': 2026, 'numero_processo_sei': f'SEI {i}'}
+        # Parcelas com conjuntos de colunas diferentes viram POSTs separados
+        parcelas = [dict({'parcela_num': n, 'dias': 10, 'data_inicio': f'2026-0{n}-01'},
+                         **({'data_fim': f'2026-0{n}-10'} if (i + n) % 3 else {}))
+                    for n in (1, 2, 3)]
+        yield f'{i:06d}', ferias, parcelas
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with StubPostgrest([], LATENCIA_MS) as stub:
+        url = f'{stub.url}/rest/v1'
+        monkeypatch.setattr(supabase_client, 'POSTGREST_URL', url)
+        monkeypatch.setattr(supabase_async, 'POSTGREST_URL', url)
+        monkeypatch.setitem(supabase_client.HEADERS, 'apikey', 'stub')
+        monkeypatch.setitem(supabase_client.HEADERS, 'Authorization', 'Bearer stub')
+        monkeypatch.setattr(supabase_client, '_sessao', None)
+        yield stub
+
+
+def _tabelas(stub):
+    """Conteúdo das tabelas sem os ids gerados pelo stub"""
+    ferias = {k: {c: v for c, v in linha.items() if c != 'id'} for k, linha in stub.banco.tabelas['fat_ferias'].items()}
+    chave_ferias = {linha['id']: k for k, linha in stub.banco.tabelas['fat_ferias'].items()}
+    parcelas = {(chave_ferias[k[0]], k[1]): {c: v for c, v in linha.items() if c not in ('id', 'fat_ferias_id')}
+                for k, linha in stub.banco.tabelas['fat_ferias_parcelas'].items()}
+    return ferias, parcelas
+
+
+def _sincrono(stub):
+    gravador = GravadorFerias(supabase_client.supabase_query)
+    inicio = time.perf_counter()
+    for registro in _registros():
+        gravador.adicionar(*registro)
+    gravador.descarregar()
+    return gravador, time.perf_counter() - inicio
+
+
+def _assincrono(stub):
+    async def gravar():
+        async with supabase_async.ClienteAsync() as cliente:
+            gravador = GravadorFeriasAsync(cliente.consulta)
+            for registro in _registros():
+                await gravador.adicionar(*registro)
+            await gravador.concluir()
+            return gravador
+
+    inicio = time.perf_counter()
+    gravador = asyncio.run(gravar())
+    return gravador, time.perf_counter() - inicio
+
+
+def test_assincrono_grava_o_mesmo_e_mais_rapido(stub):
+    pytest.importorskip('httpx')
+    sincrono, tempo_sincrono = _sincrono(stub)
+    esperado = _tabelas(stub)
+    stub.reiniciar([])
+    assincrono, tempo_assincrono = _assincrono(stub)
+
+    assert _tabelas(stub) == esperado
+    assert len(esperado[0]) == 2900 and len(esperado[1]) == 3 * 2900
+    assert (assincrono.gravados, assincrono.erros) == (sincrono.gravados, sincrono.erros) == (REGISTROS, [])
+    assert tempo_assincrono < tempo_sincrono, (tempo_assincrono, tempo_sincrono)
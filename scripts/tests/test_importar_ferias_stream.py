@@ -0,0 +1,76 @@
+"""
+Modo streaming dos importadores de férias (iterar_registros): com TAMANHO_BLOCO_STREAM o
+primeiro registro sai antes de a planilha terminar, e os registros são os mesmos em blocos
+pequenos ou grandes e na conversão célula a célula ou por colunas (esquema_planilha.py)
+
+  python -m pytest scripts/tests/test_importar_ferias_stream.py
+"""
+import importlib
+from datetime import datetime
+
+import pytest
+
+import esquema_planilha
+import supabase_client
+from esquema_planilha import TAMANHO_BLOCO_STREAM
+
+LINHAS_DADOS = 3 * TAMANHO_BLOCO_STREAM
+
+
+@pytest.fixture(params=['importar_ferias_2026', 'importar_ferias_janeiro_2026'])
+def importador(request, monkeypatch):
+    """Módulo do importador e uma função que gera as linhas de uma aba no formato dele"""
+    # Os importadores encerram na importação sem as credenciais do Supabase
+    monkeypatch.setattr(supabase_client, 'SUPABASE_URL', 'http://localhost')
+    monkeypatch.setattr(supabase_client, 'SUPABASE_KEY', 'stub.stub.stub')
+    modulo = importlib.import_module(request.param)
+    linhas = _linhas_2026 if request.param == 'importar_ferias_2026' else _linhas_janeiro
+    return modulo, linhas
+
+
+def _linhas_2026(lidas):
+    """Cabeçalho "MATRÍCULA" na coluna Q e uma parcela (Z..AE) por linha"""
+    largura = 43
+    cabecalho = [None] * largura
+    cabecalho[16] = 'MATRÍCULA'
+    yield cabecalho
+    for i in range(LINHAS_DADOS):
+        lidas.append(i)
+        linha = [None] * largura
+        linha[16] = f'{100000 + i}'
+        linha[23] = 2026.0 if i % 2 else None
+        linha[24] = f'SEI {i}'
+        linha[25:31] = [10, datetime(2026, 1 + i % 12, 1), datetime(2026, 1 + i % 12, 10), 'X', None, None]
+        yield linha
+
+
+def _linhas_janeiro(lidas):
+    """Cabeçalho com MAT/ANO/SEI/1ª PARCELA e subcabeçalho INÍCIO/TÉRMINO"""
+    yield ['MATRÍCULA', 'ANO', 'SEI', '1ª PARCELA', None]
+    yield [None, None, None, 'INÍCIO', 'TÉRMINO']
+    for i in range(LINHAS_DADOS):
+        lidas.append(i)
+        yield [f'{100000 + i}', 2026 if i % 2 else None, f'SEI {i}',
+               datetime(2026, 1 + i % 12, 1), datetime(2026, 1 + i % 12, 10)]
+
+
+def test_primeiro_registro_sai_antes_do_fim_das_linhas(importador):
+    modulo, linhas = importador
+    lidas = []
+    registros = modulo.iterar_registros(linhas(lidas), TAMANHO_BLOCO_STREAM)
+
+    indice, registro = next(registros)
+
+    assert registro['matricula'] == '100000'
+    assert len(lidas) <= TAMANHO_BLOCO_STREAM + 1 < LINHAS_DADOS
+    assert sum(1 for _ in registros) == LINHAS_DADOS - 1
+
+
+def test_registros_iguais_em_blocos_pequenos_e_grandes(importador, monkeypatch):
+    modulo, linhas = importador
+    em_blocos_grandes = list(modulo.iterar_registros(linhas([])))
+
+    assert list(modulo.iterar_registros(linhas([]), TAMANHO_BLOCO_STREAM)) == em_blocos_grandes
+    # Conversão por colunas em qualquer bloco
+    monkeypatch.setattr(esquema_planilha, 'LINHAS_COLUNAR', 0)
+    assert list(modulo.iterar_registros(linhas([]))) == em_blocos_grandes
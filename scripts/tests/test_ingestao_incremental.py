@@ -0,0 +1,68 @@
+"""
+Migration de delta da ingestão incremental (ingestao_incremental.py): ano e natureza novos
+precisam das linhas de dim_tempo / dim_indicador_bpma antes dos upserts nas tabelas fact_*
+
+  python -m pytest scripts/tests/test_ingestao_incremental.py
+"""
+from ingestao_incremental import Delta, sql_delta
+
+ATENDIMENTOS_2025 = [
+    {'ano': 2025, 'mes': 12, 'natureza': 'Crimes contra a Fauna', 'quantidade': 4},
+]
+ATENDIMENTOS_2026 = [
+    {'ano': 2026, 'mes': 1, 'natureza': 'Crimes contra a Fauna', 'quantidade': 7},
+    {'ano': 2026, 'mes': 2, 'natureza': "Natureza d'Teste Nova", 'quantidade': 3},
+]
+RESGATES_2026 = [
+    {'ano': 2026, 'mes': 3, 'tipo_fauna': 'AVES', 'nome_popular': 'Arara',
+     'nome_cientifico': 'Ara ararauna', 'ordem': 'Psittaciformes', 'quantidade': 2},
+]
+
+
+def _delta():
+    delta = Delta()
+    delta.adicionar_ano([], ATENDIMENTOS_2025, [], [])
+    delta.adicionar_ano([], ATENDIMENTOS_2026, [], RESGATES_2026)
+    return delta
+
+
+def test_dimensoes_antes_dos_upserts():
+    sql = sql_delta(_delta())
+    tempo = sql.index('INSERT INTO public.dim_tempo')
+    indicador = sql.index('INSERT INTO public.dim_indicador_bpma')
+    assert tempo < sql.index('INSERT INTO public.fact_indicador_mensal_bpma')
+    assert indicador < sql.index('INSERT INTO public.fact_indicador_mensal_bpma')
+    assert tempo < sql.index('INSERT INTO public.fact_resgate_fauna_especie_mensal')
+    for linha in ("(202512,2025,12,'DEZ','2025-12-01')", "(202601,2026,1,'JAN','2026-01-01')",
+                  "(202602,2026,2,'FEV','2026-02-01')", "(202603,2026,3,'MAR','2026-03-01')",
+                  "('natureza_dteste_nova','Natureza d''Teste Nova','outros')",
+                  "('crimes_contra_a_fauna','Crimes contra a Fauna','ocorrencias_ambientais')"):
+        assert linha in sql
+    assert sql.count('ON CONFLICT (id) DO NOTHING') == 2
+
+
+def test_sem_upserts_nao_gera_dimensoes():
+    delta = Delta()
+    delta.adicionar_ano(ATENDIMENTOS_2025, [], [], [])
+    sql = sql_delta(delta)
+    assert 'DELETE FROM public.fact_indicador_mensal_bpma' in sql
+    assert 'dim_tempo' not in sql and 'dim_indicador_bpma' not in sql
+
+
+def test_delta_aplicado_no_postgres(banco_estatisticas):
+    conn = banco_estatisticas
+    conn.execute(sql_delta(_delta()))
+    assert conn.execute(
+        'SELECT tempo_id, indicador_id, valor::int FROM public.fact_indicador_mensal_bpma ORDER BY 1'
+    ).fetchall() == [(202512, 'crimes_contra_a_fauna', 4), (202601, 'crimes_contra_a_fauna', 7),
+                     (202602, 'natureza_dteste_nova', 3)]
+    assert conn.execute(
+        'SELECT tempo_id, nome_cientifico, quantidade FROM public.fact_resgate_fauna_especie_mensal'
+    ).fetchall() == [(202603, 'Ara ararauna', 2)]
+    assert conn.execute(
+        "SELECT nome, categoria FROM public.dim_indicador_bpma WHERE id = 'natureza_dteste_nova'"
+    ).fetchone() == ("Natureza d'Teste Nova", 'outros')
+    # A natureza que já existia na dimensão não é sobrescrita
+    assert conn.execute(
+        "SELECT nome FROM public.dim_indicador_bpma WHERE id = 'crimes_contra_a_fauna'"
+    ).fetchone() == ('Crimes contra a Fauna',)
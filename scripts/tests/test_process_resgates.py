@@ -0,0 +1,55 @@
+"""
+Tipo de fauna dos resgates por espécie a partir do rótulo na linha dos meses
+(processar_aba_resgates em process_excel_to_supabase.py)
+
+  python -m pytest scripts/tests/test_process_resgates.py
+"""
+import pandas as pd
+
+from process_excel_to_supabase import processar_aba_resgates
+
+MESES = ['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ']
+LARGURA = 16
+
+
+def _linha(*celulas):
+    return list(celulas) + [None] * (LARGURA - len(celulas))
+
+
+def _bloco(rotulos, especies):
+    """Linha dos meses (com os rótulos antes de JAN), cabeçalho, espécies e linha vazia"""
+    linhas = [_linha(*rotulos, *MESES)]
+    linhas.append(_linha('NOME POPULAR', 'NOME CIENTÍFICO', 'ORDEM'))
+    for nome, cientifico, ordem in especies:
+        linhas.append(_linha(nome, cientifico, ordem, 1))
+    linhas.append(_linha())
+    return linhas
+
+
+def _tipos(linhas):
+    df = pd.DataFrame(linhas, dtype=object)
+    return {r['nome_popular']: r['tipo_fauna'] for r in processar_aba_resgates(df, 2025)}
+
+
+def test_rotulo_da_secao_na_linha_dos_meses():
+    linhas = (_bloco([None, 'AVES', None], [('Arara', 'Ara ararauna', 'Psittaciformes')])
+              + _bloco([None, 'MAMÍFEROS', None], [('Gambá', 'Didelphis albiventris', 'Didelphimorphia')])
+              + _bloco([None, 'Répteis', None], [('Jiboia', 'Boa constrictor', 'Squamata')]))
+    assert _tipos(linhas) == {'Arara': 'AVES', 'Gambá': 'MAMÍFEROS', 'Jiboia': 'RÉPTEIS'}
+
+
+def test_primeiro_rotulo_da_linha_vence():
+    linhas = _bloco(['RÉPTIL', 'AVES', 'MAMIFEROS'], [('Teiú', 'Salvator merianae', 'Squamata')])
+    assert _tipos(linhas) == {'Teiú': 'RÉPTEIS'}
+
+
+def test_texto_que_so_contem_o_rotulo_nao_conta():
+    linhas = (_bloco([None, 'MAMÍFEROS', None], [('Gambá', 'Didelphis albiventris', 'Didelphimorphia')])
+              + _bloco([None, 'RESGATE DE AVES', None], [('Sagui', 'Callithrix penicillata', 'Primates')]))
+    # Sem rótulo exato, o bloco herda o tipo de fauna anterior
+    assert _tipos(linhas) == {'Gambá': 'MAMÍFEROS', 'Sagui': 'MAMÍFEROS'}
+
+
+def test_rotulo_em_linha_propria_continua_valendo():
+    linhas = [_linha('AVES')] + _bloco([None, None, None], [('Arara', 'Ara ararauna', 'Psittaciformes')])
+    assert _tipos(linhas) == {'Arara': 'AVES'}
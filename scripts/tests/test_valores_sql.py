@@ -0,0 +1,77 @@
+"""
+Casos de borda do leitor de INSERT ... VALUES (valores_sql.py)
+
+  python -m pytest scripts/tests/test_valores_sql.py
+"""
+import io
+
+import pytest
+
+from valores_sql import EXPRESSAO, ler_values, linha_copy
+
+# Blocos de 1 caractere forçam todo token a atravessar a fronteira de leitura
+TAMANHOS_BLOCO = (1, 2, 3, 7, 1024 * 1024)
+
+SQL = '''-- cabeçalho; com ponto e vírgula e 'aspas'
+INSERT INTO public.dim_efetivo_upsert (id, matricula, nome, ativo) VALUES
+  ('1', '0001', 'linha
+quebrada; com (parênteses)', true),
+  /* comentário, com vírgula ) */
+  ('2', '0002', 'O''Brien', false),
+  ('3', '0003', E'tab\\there\\nnova \\'aspa\\' \\\\ \\x41\\u00e9', NULL),
+  ('4', '0004', $$x ' y; )$$, false),
+  ('5', '0005', $tag$a $$ b); c$tag$, TRUE),
+  ('6', '0006', ''::text, now());
+INSERT INTO "Outra ""Tabela""" VALUES ('7', E'', -1.5e3, DEFAULT);
+'''
+
+ESPERADO = [
+    ('public.dim_efetivo_upsert', ['id', 'matricula', 'nome', 'ativo'], ['1', '0001', 'linha\nquebrada; com (parênteses)', True]),
+    ('public.dim_efetivo_upsert', ['id', 'matricula', 'nome', 'ativo'], ['2', '0002', "O'Brien", False]),
+    ('public.dim_efetivo_upsert', ['id', 'matricula', 'nome', 'ativo'], ['3', '0003', "tab\there\nnova 'aspa' \\ Aé", None]),
+    ('public.dim_efetivo_upsert', ['id', 'matricula', 'nome', 'ativo'], ['4', '0004', "x ' y; )", False]),
+    ('public.dim_efetivo_upsert', ['id', 'matricula', 'nome', 'ativo'], ['5', '0005', 'a $$ b); c', True]),
+    ('public.dim_efetivo_upsert', ['id', 'matricula', 'nome', 'ativo'], ['6', '0006', '', EXPRESSAO]),
+    ('"Outra ""Tabela"""', None, ['7', '', '-1.5e3', EXPRESSAO]),
+]
+
+
+def _tuplas(sql, tamanho_bloco):
+    return [(t.tabela, t.colunas, [v.valor for v in t.valores]) for t in ler_values(io.StringIO(sql), tamanho_bloco)]
+
+
+@pytest.mark.parametrize('tamanho_bloco', TAMANHOS_BLOCO)
+def test_valores_em_qualquer_tamanho_de_bloco(tamanho_bloco):
+    assert _tuplas(SQL, tamanho_bloco) == ESPERADO
+
+
+@pytest.mark.parametrize('tamanho_bloco', TAMANHOS_BLOCO)
+def test_sql_original_dos_literais(tamanho_bloco):
+    tuplas = list(ler_values(io.StringIO(SQL), tamanho_bloco))
+    assert [v.sql for v in tuplas[3].valores] == ["'4'", "'0004'", "$$x ' y; )$$", 'false']
+    assert [v.sql for v in tuplas[5].valores] == ["'6'", "'0006'", "''::text", 'now()']
+
+
+def test_parametro_posicional_nao_abre_dollar_quoting():
+    sql = "INSERT INTO t VALUES ($1, $$a$$);"
+    assert _tuplas(sql, 1) == [('t', None, [EXPRESSAO, 'a'])]
+
+
+@pytest.mark.parametrize('sql', [
+    "INSERT INTO t VALUES ('sem fim);",
+    "INSERT INTO t VALUES ($$sem fim);",
+    "INSERT INTO t VALUES ($x$sem fim$y$);",
+    "INSERT INTO t VALUES ('1'); /* sem fim",
+])
+def test_literal_sem_fechamento(sql):
+    with pytest.raises(ValueError, match='sem fechamento'):
+        _tuplas(sql, 4)
+
+
+def test_tupla_com_numero_errado_de_valores():
+    with pytest.raises(ValueError, match='2 valores para 3 colunas'):
+        _tuplas("INSERT INTO t (a, b, c) VALUES ('1', '2');", 1024)
+
+
+def test_linha_copy():
+    assert linha_copy(['a\tb', None, True, 'x\\y\n']) == 'a\\tb\t\\N\tt\tx\\\\y\\n\n'
@@ -0,0 +1,222 @@
+"""
+Leitura em streaming das tuplas de INSERT ... VALUES de um arquivo SQL
+
+O arquivo é lido em blocos de TAMANHO_BLOCO e quebrado em tokens SQL (strings '...'
+com '' escapado, E'...' com barra invertida, dollar-quoting $$...$$ / $tag$...$tag$,
+identificadores "...", comentários, pontuação e palavras). Uma tupla pode ocupar várias linhas e ter parênteses, vírgulas
+ou ponto e vírgula dentro das strings; só os tokens de nível superior contam. A
+memória fica limitada a um bloco e à tupla atual, qualquer que seja o tamanho do arquivo.
+
+Cada valor vem como Valor(sql, valor): o texto SQL original do literal (com cast, se
+houver) e o valor Python (str, None, True/False; números ficam como texto). Expressões
+que não são literais (funções, DEFAULT) trazem valor=EXPRESSAO e só servem para
+reemitir o SQL.
+"""
+import re
+from collections import namedtuple
+
+# Caracteres lidos por vez
+TAMANHO_BLOCO = 1024 * 1024
+
+Valor = namedtuple('Valor', ['sql', 'valor'])
+# Tupla de um INSERT: tabela como está no arquivo, colunas (None sem lista) e valores
+Tupla = namedtuple('Tupla', ['tabela', 'colunas', 'valores'])
+
+
+class _Expressao:
+    def __repr__(self):
+        return 'EXPRESSAO'
+
+
+EXPRESSAO = _Expressao()
+
+# Espaços antes do token entram no mesmo match; fim: só espaços até o fim do buffer
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<comentario>--[^\n]*(?:\n|\Z))
+  | (?P<bloco>/\*.*?\*/)
+  | (?P<escape>[eE]'(?:[^'\\]|\\.|'')*')
+  | (?P<dolar>(?P<tag>\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$).*?(?P=tag))
+  | (?P<texto>'(?:[^']|'')*')
+  | (?P<identificador>"(?:[^"]|"")*")
+  | (?P<cast>::)
+  | (?P<pontuacao>[(),;])
+  | (?P<palavra>[^\s(),;'":]+)
+  | (?P<outro>.)
+  | (?P<fim>\Z)
+)""", re.S | re.X)
+
+# Inícios de token que só terminam num delimitador de fechamento
+_ABERTURAS = ("'", '"', '/*', "E'", "e'")
+# Abertura de dollar-quoting ($$ ou $tag$; $1 é parâmetro, não abertura), como em dividir_migration.py
+_ABERTURA_DOLAR = re.compile(r'\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$')
+_DESCARTAR = ('comentario', 'bloco')
+_ENTRE_ASPAS = ('escape', 'texto', 'identificador')
+_LITERAIS = ('palavra', 'identificador', 'texto', 'escape', 'dolar')
+
+_ESCAPES_E = re.compile(r"''|\\(?:([0-7]{1,3})|x([0-9A-Fa-f]{1,2})|u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))", re.S)
+_ESCAPES_SIMPLES = {'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_NUMERO = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+
+def _aberto(buf, m, tipo):
+    """O token ainda não terminou: string/comentário sem fechamento ou 'abc' seguido de ' ('' escapado)"""
+    if tipo in ('outro', 'palavra'):
+        return buf.startswith(_ABERTURAS, m.start(tipo)) or bool(_ABERTURA_DOLAR.match(buf, m.start(tipo)))
+    return tipo in _ENTRE_ASPAS and buf.startswith(m.group(tipo)[-1], m.end())
+
+
+def tokens(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """(tipo, texto) de cada token significativo do arquivo texto (sem espaços e comentários)"""
+    buf = arquivo.read(tamanho_bloco)
+    fim = not buf
+    pos = 0
+    while True:
+        n = len(buf)
+        for m in _TOKEN.finditer(buf, pos):
+            tipo = m.lastgroup
+            if tipo == 'fim':
+                if fim:
+                    return
+                break
+            aberto = _aberto(buf, m, tipo)
+            # Token que pode continuar no próximo bloco: lê mais antes de aceitar
+            if aberto or m.end() == n:
+                if not fim:
+                    break
+                if aberto:
+                    raise ValueError(f"String, identificador ou comentário sem fechamento: {buf[m.start(tipo):m.start(tipo) + 40]!r}...")
+            pos = m.end()
+            if tipo not in _DESCARTAR:
+                yield tipo, m.group(tipo)
+        bloco = arquivo.read(tamanho_bloco)
+        fim = not bloco
+        buf = buf[pos:] + bloco
+        pos = 0
+
+
+def _decodificar_escape(texto):
+    def troca(m):
+        if m.group() == "''":
+            return "'"
+        octal, hexa, u4, u8, simples = m.groups()
+        if octal or hexa or u4 or u8:
+            return chr(int(octal, 8) if octal else int(hexa or u4 or u8, 16))
+        return _ESCAPES_SIMPLES.get(simples, simples)
+    return _ESCAPES_E.sub(troca, texto)
+
+
+def _literal(partes):
+    """Valor Python de um valor da tupla (lista de tokens), ou EXPRESSAO"""
+    # 'texto'::tipo, 1::int: o cast fica a cargo da coluna de destino
+    if len(partes) >= 3 and partes[1] == ('cast', '::'):
+        partes = partes[:1]
+    if len(partes) != 1:
+        return EXPRESSAO
+    tipo, texto = partes[0]
+    if tipo == 'texto':
+        return texto[1:-1].replace("''", "'")
+    if tipo == 'escape':
+        return _decodificar_escape(texto[2:-1])
+    if tipo == 'dolar':
+        # Conteúdo literal, sem escapes
+        tag = _ABERTURA_DOLAR.match(texto).group()
+        return texto[len(tag):-len(tag)]
+    if tipo == 'palavra':
+        chave = texto.upper()
+        if chave == 'NULL':
+            return None
+        if chave in ('TRUE', 'FALSE'):
+            return chave == 'TRUE'
+        if _NUMERO.fullmatch(texto):
+            return texto
+    return EXPRESSAO
+
+
+def _sql(partes):
+    """Texto SQL dos tokens (espaço só entre palavras/literais vizinhos)"""
+    saida = []
+    anterior = None
+    for tipo, texto in partes:
+        if anterior in _LITERAIS and tipo in _LITERAIS:
+            saida.append(' ')
+        saida.append(texto)
+        anterior = tipo
+    return ''.join(saida)
+
+
+def _nome(texto):
+    return texto[1:-1].replace('""', '"') if texto.startswith('"') else texto.lower()
+
+
+def _tuplas(it, tabela, colunas):
+    """Tuplas do VALUES até o primeiro token de nível superior que não seja ','"""
+    while True:
+        token = next(it, None)
+        if token != ('pontuacao', '('):
+            raise ValueError(f"Esperado '(' no VALUES de {tabela}, encontrado {token[1] if token else 'fim do arquivo'!r}")
+        valores = []
+        partes = []
+        profundidade = 0
+        for tipo, texto in it:
+            if tipo == 'pontuacao' and profundidade == 0 and texto in (',', ')'):
+                valores.append(Valor(_sql(partes), _literal(partes)))
+                partes = []
+                if texto == ')':
+                    break
+                continue
+            if tipo == 'pontuacao' and texto in '()':
+                profundidade += 1 if texto == '(' else -1
+            elif tipo == 'pontuacao' and texto == ';':
+                raise ValueError(f"';' dentro de uma tupla do VALUES de {tabela}")
+            partes.append((tipo, texto))
+        else:
+            raise ValueError(f"Arquivo terminou dentro de uma tupla do VALUES de {tabela}")
+        if colunas is not None and len(valores) != len(colunas):
+            raise ValueError(f"Tupla com {len(valores)} valores para {len(colunas)} colunas em {tabela}")
+        yield Tupla(tabela, colunas, valores)
+        if next(it, None) != ('pontuacao', ','):
+            return
+
+
+def ler_values(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """Tupla(tabela, colunas, valores) de cada linha de cada INSERT ... VALUES do arquivo texto"""
+    it = tokens(arquivo, tamanho_bloco)
+    for tipo, texto in it:
+        if tipo != 'palavra' or texto.upper() != 'INSERT':
+            continue
+        if next(it, (None, ''))[1].upper() != 'INTO':
+            continue
+        nome = []
+        colunas = None
+        for tipo, texto in it:
+            if tipo == 'pontuacao' and texto == '(' and colunas is None:
+                colunas = []
+                for tipo, texto in it:
+                    if tipo == 'pontuacao' and texto == ')':
+                        break
+                    if tipo != 'pontuacao':
+                        colunas.append(_nome(texto))
+                continue
+            if tipo == 'palavra' and texto.upper() in ('VALUES', 'SELECT', 'DEFAULT', 'WITH') or tipo == 'pontuacao':
+                break
+            nome.append(texto)
+        # INSERT ... SELECT / DEFAULT VALUES não têm tuplas para extrair
+        if tipo == 'palavra' and texto.upper() == 'VALUES':
+            yield from _tuplas(it, ''.join(nome), colunas)
+
+
+def texto_copy(valor):
+    """Campo do formato texto do COPY: \\N para NULL, t/f para booleanos, escapes de \\, tab e quebras de linha"""
+    if valor is None:
+        return '\\N'
+    if valor is True or valor is False:
+        return 't' if valor else 'f'
+    if valor is EXPRESSAO:
+        raise ValueError('Valor não literal não pode ir para COPY')
+    return (valor.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def linha_copy(valores):
+    """Linha do COPY (texto, terminada em \\n) a partir dos valores Python"""
+    return '\t'.join(texto_copy(v) for v in valores) + '\n'